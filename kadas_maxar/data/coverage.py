@@ -0,0 +1,245 @@
+"""
+Footprint coverage over an area of interest.
+
+The AOI (a WGS84 bbox, optionally restricted to polygons) is discretized in
+a regular grid of at most ``MAX_CELLS`` cells per axis; a footprint covers
+the AOI cells whose centre falls inside its polygons (even-odd rule, so
+holes are honoured). Each footprint is then a flat array of cell indices,
+and coverage questions become numpy set operations on those arrays.
+
+``greedy_cover`` picks a near-minimal set of footprints covering the AOI
+(weighted set cover, lazy greedy: best newly covered cells per unit cost).
+``CoverageEngine`` keeps the overlap depth of every cell for a set of
+footprints that changes with the filters.
+"""
+
+import heapq
+from datetime import date as _date
+
+import numpy as np
+
+# Grid resolution along the longest AOI side
+MAX_CELLS = 512
+# Kilometres per degree of latitude
+KM_PER_DEGREE = 111.32
+
+PREFER_CLOUD = "cloud"
+PREFER_RECENT = "recent"
+PREFER_GSD = "gsd"
+PREFER_POST_EVENT = "post_event"
+
+# Weights of (cloud, age, gsd, pre-event) in the cost of a footprint
+PREFERENCE_WEIGHTS = {
+    PREFER_CLOUD: (4.0, 1.0, 1.0, 0.0),
+    PREFER_RECENT: (1.0, 4.0, 1.0, 0.0),
+    PREFER_GSD: (1.0, 1.0, 4.0, 0.0),
+    PREFER_POST_EVENT: (1.0, 1.0, 1.0, 4.0),
+}
+
+
+def points_in_polygons(x, y, polygons):
+    """Boolean mask of the points (x, y arrays) inside ``polygons``.
+
+    ``polygons``: [[ring, ...], ...] with rings as [(x, y), ...].
+    """
+    inside = np.zeros(np.shape(x), dtype=bool)
+    for polygon in polygons:
+        odd = np.zeros(np.shape(x), dtype=bool)
+        for ring in polygon:
+            ring = np.asarray(ring, dtype=np.float64)
+            if len(ring) < 3:
+                continue
+            x1, y1 = ring[:, 0], ring[:, 1]
+            x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+            for ax, ay, bx, by in zip(x1, y1, x2, y2):
+                if ay == by:
+                    continue
+                crosses = (ay > y) != (by > y)
+                at = ax + (y - ay) * (bx - ax) / (by - ay)
+                odd ^= crosses & (x < at)
+        inside |= odd
+    return inside
+
+
+class AoiGrid:
+    """Regular grid of cell centres over an AOI (WGS84)."""
+
+    def __init__(self, bbox, polygons=None, max_cells=MAX_CELLS):
+        xmin, ymin, xmax, ymax = (float(v) for v in bbox)
+        self.bbox = (xmin, ymin, xmax, ymax)
+        self.cell = max(xmax - xmin, ymax - ymin, 1e-9) / max_cells
+        self.cols = max(int(np.ceil((xmax - xmin) / self.cell)), 1)
+        self.rows = max(int(np.ceil((ymax - ymin) / self.cell)), 1)
+        xs = xmin + (np.arange(self.cols) + 0.5) * self.cell
+        ys = ymin + (np.arange(self.rows) + 0.5) * self.cell
+        self.x, self.y = np.meshgrid(xs, ys)
+        if polygons:
+            self.mask = points_in_polygons(self.x, self.y, polygons).ravel()
+        else:
+            self.mask = np.ones(self.rows * self.cols, dtype=bool)
+        # Area of one cell per row (km²), shrinking with the latitude
+        side = self.cell * KM_PER_DEGREE
+        self.row_area = side * side * np.cos(np.radians(ys))
+
+    @property
+    def size(self):
+        return self.rows * self.cols
+
+    def cells(self, polygons, bbox=None):
+        """Flat indices of the AOI cells covered by ``polygons``."""
+        if bbox is None:
+            points = [pt for polygon in polygons for ring in polygon for pt in ring]
+            if not points:
+                return np.zeros(0, dtype=np.int64)
+            xy = np.asarray(points, dtype=np.float64)
+            bbox = (xy[:, 0].min(), xy[:, 1].min(), xy[:, 0].max(), xy[:, 1].max())
+        xmin, ymin = self.bbox[0], self.bbox[1]
+        c0 = max(int((bbox[0] - xmin) / self.cell), 0)
+        r0 = max(int((bbox[1] - ymin) / self.cell), 0)
+        c1 = min(int(np.ceil((bbox[2] - xmin) / self.cell)), self.cols)
+        r1 = min(int(np.ceil((bbox[3] - ymin) / self.cell)), self.rows)
+        if c1 <= c0 or r1 <= r0:
+            return np.zeros(0, dtype=np.int64)
+        inside = points_in_polygons(self.x[r0:r1, c0:c1], self.y[r0:r1, c0:c1], polygons)
+        rows, cols = np.nonzero(inside)
+        flat = (rows + r0) * self.cols + (cols + c0)
+        return flat[self.mask[flat]].astype(np.int64)
+
+    def area_km2(self, mask):
+        """Area (km²) of the cells set in the flat boolean ``mask``."""
+        per_row = np.asarray(mask, dtype=bool).reshape(self.rows, self.cols).sum(axis=1)
+        return float((per_row * self.row_area).sum())
+
+
+def _parse_date(value):
+    try:
+        return _date.fromisoformat(value[:10]) if value else None
+    except ValueError:
+        return None
+
+
+def cover_costs(records, prefer=PREFER_CLOUD, event_date=None):
+    """Cost of each record (>= 1, lower is better) for ``greedy_cover``.
+
+    Unknown cloud cover or GSD count as average; without ``event_date`` the
+    post-event term is zero.
+    """
+    w_cloud, w_age, w_gsd, w_pre = PREFERENCE_WEIGHTS[prefer]
+    dates = [_parse_date(r.datetime) for r in records]
+    known = [d for d in dates if d is not None]
+    newest, oldest = (max(known), min(known)) if known else (None, None)
+    span = max((newest - oldest).days, 1) if known else 1
+    gsds = [r.gsd for r in records if r.gsd]
+    finest = min(gsds) if gsds else None
+    costs = []
+    for record, day in zip(records, dates):
+        cloud = record.cloud_cover / 100.0 if record.cloud_cover is not None else 0.5
+        age = (newest - day).days / span if day is not None else 0.5
+        gsd = min(record.gsd / finest - 1.0, 1.0) if (record.gsd and finest) else 0.5
+        pre = 1.0 if (event_date is not None and day is not None and day < event_date) else 0.0
+        costs.append(1.0 + w_cloud * cloud + w_age * age + w_gsd * gsd + w_pre * pre)
+    return costs
+
+
+def greedy_cover(cells, costs, size, mask=None):
+    """Near-minimal weighted cover of the ``mask`` cells.
+
+    ``cells``: flat cell indices per candidate; ``costs``: one per
+    candidate. Returns (chosen candidate positions in pick order, boolean
+    array of the cells left uncovered).
+    """
+    uncovered = np.ones(size, dtype=bool) if mask is None else np.array(mask, dtype=bool)
+    heap = [(-len(c) / cost, i) for i, (c, cost) in enumerate(zip(cells, costs)) if len(c)]
+    heapq.heapify(heap)
+    chosen = []
+    while heap and uncovered.any():
+        _, i = heapq.heappop(heap)
+        gain = int(uncovered[cells[i]].sum())
+        if not gain:
+            continue
+        ratio = gain / costs[i]
+        # Guadagno ricalcolato: se non è più il migliore torna in coda
+        if heap and ratio < -heap[0][0]:
+            heapq.heappush(heap, (-ratio, i))
+            continue
+        chosen.append(i)
+        uncovered[cells[i]] = False
+    return chosen, uncovered
+
+
+class CoverageEngine:
+    """Overlap depth of a changing set of footprints over one AOI grid.
+
+    Cell arrays of the footprints are cached, so a new filter set only
+    adds/subtracts the footprints that entered/left it.
+    """
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.depth = np.zeros(grid.size, dtype=np.int32)
+        self.members = set()
+        self._cells = {}
+
+    def update(self, indices, polygons_of, cancelled=None):
+        """Make the member set ``indices``; ``polygons_of(index)`` gives footprint polygons.
+
+        Returns False if ``cancelled()`` stopped the update (the state stays
+        consistent, only part of the change is applied).
+        """
+        indices = set(indices)
+        for index in self.members - indices:
+            np.subtract.at(self.depth, self._cells[index], 1)
+            self.members.discard(index)
+        for index in indices - self.members:
+            if cancelled is not None and cancelled():
+                return False
+            cells = self._cells.get(index)
+            if cells is None:
+                cells = self._cells[index] = self.grid.cells(polygons_of(index))
+            np.add.at(self.depth, cells, 1)
+            self.members.add(index)
+        return True
+
+    def stats(self):
+        """Covered/gap area (km²), coverage ratio and overlap depth over the AOI."""
+        mask = self.grid.mask
+        depth = self.depth[mask]
+        covered = mask & (self.depth > 0)
+        total_km2 = self.grid.area_km2(mask)
+        covered_km2 = self.grid.area_km2(covered)
+        return {
+            "footprints": len(self.members),
+            "aoi_km2": total_km2,
+            "covered_km2": covered_km2,
+            "gap_km2": total_km2 - covered_km2,
+            "ratio": covered_km2 / total_km2 if total_km2 else 0.0,
+            "max_depth": int(depth.max()) if depth.size else 0,
+            "mean_depth": float(depth[depth > 0].mean()) if (depth > 0).any() else 0.0,
+            # Celle per profondità: [0, 1, 2, 3+]
+            "depth_cells": [int((depth == d).sum()) for d in range(3)] + [int((depth >= 3).sum())],
+        }
+
+    def gap_rectangles(self):
+        """WGS84 rectangles (xmin, ymin, xmax, ymax) covering the uncovered AOI cells.
+
+        Runs of gap cells along a row are merged, then identical runs of
+        consecutive rows.
+        """
+        grid = self.grid
+        gaps = (grid.mask & (self.depth == 0)).reshape(grid.rows, grid.cols)
+        x0, y0, cell = grid.bbox[0], grid.bbox[1], grid.cell
+        rectangles = []
+        open_runs = {}  # (start, end) -> first row
+        for row in range(grid.rows + 1):
+            runs = set()
+            if row < grid.rows:
+                line = np.concatenate(([False], gaps[row], [False]))
+                edges = np.flatnonzero(line[1:] != line[:-1])
+                runs = set(zip(edges[::2].tolist(), edges[1::2].tolist()))
+            for run in list(open_runs):
+                if run not in runs:
+                    first = open_runs.pop(run)
+                    rectangles.append((x0 + run[0] * cell, y0 + first * cell, x0 + run[1] * cell, y0 + row * cell))
+            for run in runs:
+                open_runs.setdefault(run, row)
+        return rectangles
@@ -0,0 +1,192 @@
+"""
+In-memory LRU cache of parsed events.
+
+Keeps the last N events the user opened (FootprintStore, SpatialIndex and,
+optionally, the footprints memory layer taken out of the project) so that
+switching back to an event needs no fetch, parse or layer build. The cache is
+bounded both by entry count and by an estimated memory budget; the least
+recently used events are evicted first.
+"""
+
+import sys
+from collections import OrderedDict
+
+from kadas_maxar.logger import get_logger
+
+DEFAULT_MAX_ENTRIES = 4
+DEFAULT_MAX_MB = 256
+
+# Rough cost of a memory-provider feature (QgsFeature, attributes, fid) and of
+# its double-precision geometry compared to the varint-encoded rings
+LAYER_FEATURE_BYTES = 256
+LAYER_GEOMETRY_FACTOR = 8
+
+_SAMPLE_SIZE = 64
+
+
+def _record_bytes(records):
+    """Estimated heap size of the FootprintRecord list (sampled)."""
+    if not records:
+        return 0
+    sample = records[:_SAMPLE_SIZE]
+    total = 0
+    for record in sample:
+        total += sys.getsizeof(record)
+        # Interned strings are shared between records: count only per-record values
+        for value in (record.gsd, record.cloud_cover, record.quadkey,
+                      record._visual, record._ms_analytic, record._pan_analytic):
+            if value is not None:
+                total += sys.getsizeof(value)
+    return sys.getsizeof(records) + total * len(records) // len(sample)
+
+
+def estimate_nbytes(store, index=None, layer=None, feature_count=0):
+    """Estimated memory held by one cache entry."""
+    total = _record_bytes(store.records) + store.rings.nbytes
+    if index is not None:
+        total += index.nbytes
+    if layer is not None:
+        total += feature_count * LAYER_FEATURE_BYTES
+        total += LAYER_GEOMETRY_FACTOR * len(store.rings.data)
+    return total
+
+
+class CachedEvent:
+    """One cached event."""
+
+    __slots__ = ("event", "store", "index", "layer", "layer_id", "feature_ids", "nbytes")
+
+    def __init__(self, event, store, index=None, layer=None, feature_ids=None):
+        self.event = event
+        self.store = store
+        self.index = index
+        self.layer = layer
+        self.layer_id = layer.id() if layer is not None else None
+        # record index -> feature id in ``layer``
+        self.feature_ids = feature_ids or {}
+        self.nbytes = estimate_nbytes(store, index, layer, len(self.feature_ids))
+
+    def drop_layer(self):
+        """Forget the layer (e.g. deleted by the user); keeps store and index."""
+        self.layer = None
+        self.layer_id = None
+        self.feature_ids = {}
+        self.nbytes = estimate_nbytes(self.store, self.index)
+
+
+class EventCache:
+    """LRU of CachedEvent bounded by entry count and estimated bytes.
+
+    Args:
+        max_entries: maximum number of events kept (0 disables the cache)
+        max_bytes: memory budget for all entries
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self._entries = OrderedDict()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, event):
+        return event in self._entries
+
+    @property
+    def nbytes(self):
+        return sum(entry.nbytes for entry in self._entries.values())
+
+    def get(self, event):
+        """Cached entry for ``event`` (marked as most recently used) or None."""
+        entry = self._entries.get(event)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(event)
+        self.hits += 1
+        return entry
+
+    def peek(self, event):
+        """Like get() but without touching LRU order or statistics."""
+        return self._entries.get(event)
+
+    def find_layer(self, layer_id):
+        """Entry holding the layer with id ``layer_id`` or None."""
+        for entry in self._entries.values():
+            if layer_id is not None and entry.layer_id == layer_id:
+                return entry
+        return None
+
+    def put(self, event, store, index=None, layer=None, feature_ids=None):
+        """Cache an event, evicting older ones to respect the limits.
+
+        Returns the new entry, or None if caching is disabled or the event
+        alone exceeds the memory budget.
+        """
+        self.discard(event)
+        if self.max_entries <= 0:
+            return None
+        entry = CachedEvent(event, store, index, layer, feature_ids)
+        if entry.nbytes > self.max_bytes:
+            get_logger().info(
+                f"Event cache: {event} not cached ({entry.nbytes / 1048576:.1f} MB exceeds budget)"
+            )
+            return None
+        self._entries[event] = entry
+        self._shrink()
+        return entry
+
+    def discard(self, event):
+        """Remove ``event`` without counting it as an eviction."""
+        return self._entries.pop(event, None)
+
+    def resize(self, max_entries=None, max_bytes=None):
+        """Change the limits, evicting entries as needed."""
+        if max_entries is not None:
+            self.max_entries = max_entries
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+        self._shrink()
+
+    def clear(self):
+        while self._entries:
+            self._evict()
+
+    def _shrink(self):
+        while self._entries and (
+            len(self._entries) > self.max_entries or self.nbytes > self.max_bytes
+        ):
+            self._evict()
+
+    def _evict(self):
+        event, entry = self._entries.popitem(last=False)
+        self.evictions += 1
+        get_logger().info(
+            f"Event cache: evicted {event} ({entry.nbytes / 1048576:.1f} MB); {self.stats_text()}"
+        )
+        # Dropping the last reference deletes a layer taken out of the project
+        entry.layer = None
+
+    def stats(self):
+        """Counters for logging and the status line."""
+        return {
+            "entries": len(self._entries),
+            "bytes": self.nbytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def stats_text(self):
+        s = self.stats()
+        return (
+            f"{s['entries']}/{s['max_entries']} events, "
+            f"{s['bytes'] / 1048576:.1f}/{s['max_bytes'] / 1048576:.0f} MB, "
+            f"hits {s['hits']}, misses {s['misses']}, evictions {s['evictions']}"
+        )
@@ -0,0 +1,217 @@
+"""
+Lightweight per-footprint records.
+
+The dock used to keep every GeoJSON feature dict (and a second reference to
+the whole FeatureCollection) alive and call ``props.get(...)`` everywhere.
+``FootprintRecord`` keeps only the fields the plugin uses, in ``__slots__``,
+with repeated strings interned and COG URLs split into an interned directory
+prefix shared by the ``visual``/``ms_analytic``/``pan_analytic`` assets plus
+short per-asset file names.
+"""
+
+import sys
+
+from kadas_maxar.data.geometry import RingStore
+
+IMAGERY_TYPES = ("visual", "ms_analytic", "pan_analytic")
+
+_intern = sys.intern
+
+
+def _intern_str(value):
+    return _intern(value) if isinstance(value, str) else value
+
+
+def _split_url(url, base):
+    """Return (base, suffix) for ``url``, reusing ``base`` when it matches."""
+    if not url:
+        return base, None
+    if base is not None and url.startswith(base):
+        return base, url[len(base):]
+    if base is None:
+        cut = url.rfind("/") + 1
+        if cut > 0:
+            base = _intern(url[:cut])
+            return base, url[cut:]
+    # different directory than the other assets: keep the absolute URL
+    return base, url
+
+
+class FootprintRecord:
+    """One imagery footprint (a quadkey tile of one acquisition)."""
+
+    __slots__ = (
+        "index",
+        "datetime",
+        "platform",
+        "gsd",
+        "cloud_cover",
+        "catalog_id",
+        "quadkey",
+        "epsg",
+        "_url_base",
+        "_visual",
+        "_ms_analytic",
+        "_pan_analytic",
+    )
+
+    def __init__(self, index, datetime="", platform="", gsd=None, cloud_cover=None,
+                 catalog_id="", quadkey="", epsg=None, urls=None):
+        self.index = index
+        self.datetime = _intern_str(datetime or "")
+        self.platform = _intern_str(platform or "")
+        self.gsd = gsd
+        self.cloud_cover = cloud_cover
+        self.catalog_id = _intern_str(catalog_id or "")
+        self.quadkey = quadkey or ""
+        self.epsg = epsg
+        base = None
+        suffixes = {}
+        for imagery_type in IMAGERY_TYPES:
+            base, suffixes[imagery_type] = _split_url((urls or {}).get(imagery_type), base)
+        self._url_base = base
+        self._visual = suffixes["visual"]
+        self._ms_analytic = suffixes["ms_analytic"]
+        self._pan_analytic = suffixes["pan_analytic"]
+
+    @classmethod
+    def from_properties(cls, index, props):
+        """Build a record from GeoJSON feature properties."""
+        return cls(
+            index,
+            datetime=props.get("datetime"),
+            platform=props.get("platform"),
+            gsd=props.get("gsd"),
+            cloud_cover=props.get("cloud_cover"),
+            catalog_id=props.get("catalog_id"),
+            quadkey=props.get("quadkey"),
+            epsg=props.get("proj:epsg"),
+            urls={t: props.get(t) for t in IMAGERY_TYPES},
+        )
+
+    def url(self, imagery_type):
+        """Full COG URL for ``imagery_type`` or None if not available."""
+        suffix = getattr(self, f"_{imagery_type}", None)
+        if not suffix:
+            return None
+        if "://" in suffix or self._url_base is None:
+            return suffix
+        return self._url_base + suffix
+
+    @property
+    def date(self):
+        """Acquisition date (YYYY-MM-DD) or "no-date"."""
+        return self.datetime[:10] if self.datetime else "no-date"
+
+    def __repr__(self):
+        return f"FootprintRecord({self.index}, {self.catalog_id!r}, {self.quadkey!r})"
+
+
+class FootprintStore:
+    """Records plus quantized geometry of one event, aligned by index."""
+
+    def __init__(self, records=None, rings=None, event=None):
+        self.records = records if records is not None else []
+        self.rings = rings if rings is not None else RingStore()
+        self.event = event
+        self._quadkeys = None
+
+    @property
+    def quadkeys(self):
+        """QuadkeyIndex over the records (built on first use)."""
+        if self._quadkeys is None:
+            from kadas_maxar.data.quadkey import QuadkeyIndex
+            self._quadkeys = QuadkeyIndex.from_records(self.records)
+        return self._quadkeys
+
+    def bounds(self):
+        """(n, 4) numpy array of footprint bboxes (WGS84).
+
+        Uses the geometry bbox and falls back to the quadkey tile for records
+        without geometry; rows stay NaN if neither is known.
+        """
+        import numpy as np
+        bounds = np.array(self.rings.bbox, dtype=np.float64).reshape(-1, 4)
+        missing = np.isnan(bounds).any(axis=1)
+        if missing.any() and len(self.records) == len(bounds):
+            bounds[missing] = self.quadkeys.bounds[missing]
+        return bounds
+
+    def extent(self, indices):
+        """WGS84 extent of the given records from their quadkeys.
+
+        Falls back to the stored geometry bbox for records without a valid
+        quadkey; returns None if nothing is known.
+        """
+        indices = list(indices)
+        boxes = []
+        missing = indices
+        try:
+            bounds = self.quadkeys.bounds
+            missing = []
+            for index in indices:
+                row = bounds[index]
+                if row[0] == row[0]:  # not NaN
+                    boxes.append(tuple(float(v) for v in row))
+                else:
+                    missing.append(index)
+        except ImportError:
+            pass
+        for index in missing:
+            box = self.rings.bounds(index)
+            if box is not None:
+                boxes.append(box)
+        if not boxes:
+            return None
+        return (
+            min(b[0] for b in boxes), min(b[1] for b in boxes),
+            max(b[2] for b in boxes), max(b[3] for b in boxes),
+        )
+
+    @classmethod
+    def from_features(cls, features, event=None):
+        """Build from parsed GeoJSON features (the dicts can be dropped afterwards)."""
+        records = []
+        rings = RingStore()
+        for index, feat in enumerate(features):
+            records.append(FootprintRecord.from_properties(index, feat.get("properties") or {}))
+            rings.append(feat.get("geometry"))
+        return cls(records, rings, event=event)
+
+    @classmethod
+    def from_snapshot(cls, snapshot, event=None):
+        """Build from a memory-mapped snapshot; geometry stays in the mapping.
+
+        Only the columns used by the records are decoded, one column at a
+        time (no per-feature property dicts).
+        """
+        count = len(snapshot)
+        missing = [None] * count
+
+        def values(name):
+            column = snapshot.column_values(name)
+            return column if column is not None else missing
+
+        records = [
+            FootprintRecord(
+                index, datetime=datetime, platform=platform, gsd=gsd, cloud_cover=cloud_cover,
+                catalog_id=catalog_id, quadkey=quadkey, epsg=epsg,
+                urls={"visual": visual, "ms_analytic": ms_analytic, "pan_analytic": pan_analytic},
+            )
+            for index, (datetime, platform, gsd, cloud_cover, catalog_id, quadkey, epsg,
+                        visual, ms_analytic, pan_analytic) in enumerate(zip(
+                values("datetime"), values("platform"), values("gsd"), values("cloud_cover"),
+                values("catalog_id"), values("quadkey"), values("proj:epsg"),
+                *(values(imagery_type) for imagery_type in IMAGERY_TYPES),
+            ))
+        ]
+        return cls(records, snapshot.rings, event=event or snapshot.event)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        return self.records[index]
+
+    def __iter__(self):
+        return iter(self.records)
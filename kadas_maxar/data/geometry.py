@@ -0,0 +1,170 @@
+"""
+Compact polygon storage for footprints.
+
+Rings are quantized to integer units of ``1 / COORD_SCALE`` degrees (1e-7,
+about 1 cm, far below the precision of a tile outline), delta encoded and
+packed as zigzag varints in one byte buffer. A typical 5-vertex tile ring
+then costs a few dozen bytes instead of several kilobytes of nested Python
+lists. Geometries are only decoded when a layer or a zoom needs them.
+
+Offsets follow the GeoArrow layout::
+
+    geom_offsets  feature -> first polygon
+    poly_offsets  polygon -> first ring
+    ring_offsets  ring    -> first byte in ``data``
+"""
+
+from array import array
+
+COORD_SCALE = 10_000_000
+
+GEOM_NONE = 0
+GEOM_POLYGON = 1
+GEOM_MULTIPOLYGON = 2
+
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+
+def _unzigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+
+def encode_ring(ring, out):
+    """Append ``ring`` ([[x, y], ...] in degrees) to the bytearray ``out``."""
+    prev_x = prev_y = 0
+    for point in ring:
+        x = int(round(point[0] * COORD_SCALE))
+        y = int(round(point[1] * COORD_SCALE))
+        for delta in (x - prev_x, y - prev_y):
+            value = _zigzag(delta)
+            while value >= 0x80:
+                out.append((value & 0x7F) | 0x80)
+                value >>= 7
+            out.append(value)
+        prev_x, prev_y = x, y
+
+
+def decode_ring(buffer):
+    """Decode one ring encoded by :func:`encode_ring` into [(x, y), ...]."""
+    values = []
+    value = shift = 0
+    for byte in buffer:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        values.append(_unzigzag(value))
+        value = shift = 0
+
+    points = []
+    x = y = 0
+    for i in range(0, len(values) - 1, 2):
+        x += values[i]
+        y += values[i + 1]
+        points.append((x / COORD_SCALE, y / COORD_SCALE))
+    return points
+
+
+def polygons_of(geometry):
+    """Return (geom_type, [polygon rings]) for a GeoJSON geometry dict."""
+    if not geometry:
+        return GEOM_NONE, []
+    gtype = geometry.get("type")
+    coords = geometry.get("coordinates") or []
+    if gtype == "Polygon":
+        return GEOM_POLYGON, [coords] if coords else []
+    if gtype == "MultiPolygon":
+        return GEOM_MULTIPOLYGON, [p for p in coords if p]
+    return GEOM_NONE, []
+
+
+class RingStore:
+    """Quantized, delta-encoded polygon rings indexed by feature position.
+
+    Buffers may be Python arrays (built in memory) or numpy views over a
+    memory-mapped snapshot; only slicing and ``bytes()`` are required.
+    """
+
+    def __init__(self, data=None, geom_types=None, geom_offsets=None,
+                 poly_offsets=None, ring_offsets=None, bbox=None):
+        self.data = data if data is not None else bytearray()
+        self.geom_types = geom_types if geom_types is not None else array("B")
+        self.geom_offsets = geom_offsets if geom_offsets is not None else array("q", [0])
+        self.poly_offsets = poly_offsets if poly_offsets is not None else array("q", [0])
+        self.ring_offsets = ring_offsets if ring_offsets is not None else array("q", [0])
+        # minx, miny, maxx, maxy per feature (flat); NaN when there is no geometry
+        self.bbox = bbox if bbox is not None else array("d")
+
+    @classmethod
+    def from_features(cls, features):
+        store = cls()
+        for feat in features:
+            store.append(feat.get("geometry"))
+        return store
+
+    def append(self, geometry):
+        """Encode a GeoJSON (Multi)Polygon and return its feature index."""
+        gtype, polygons = polygons_of(geometry)
+        minx = miny = float("inf")
+        maxx = maxy = float("-inf")
+        for polygon in polygons:
+            for ring in polygon:
+                encode_ring(ring, self.data)
+                self.ring_offsets.append(len(self.data))
+                for point in ring:
+                    minx = min(minx, point[0])
+                    maxx = max(maxx, point[0])
+                    miny = min(miny, point[1])
+                    maxy = max(maxy, point[1])
+            self.poly_offsets.append(len(self.ring_offsets) - 1)
+        self.geom_offsets.append(len(self.poly_offsets) - 1)
+        self.geom_types.append(gtype)
+        if minx == float("inf"):
+            self.bbox.extend((float("nan"),) * 4)
+        else:
+            self.bbox.extend((minx, miny, maxx, maxy))
+        return len(self.geom_types) - 1
+
+    def __len__(self):
+        return len(self.geom_types)
+
+    @property
+    def nbytes(self):
+        """Approximate memory used by the encoded geometry."""
+        total = len(self.data)
+        for buf in (self.geom_types, self.geom_offsets, self.poly_offsets, self.ring_offsets, self.bbox):
+            total += len(buf) * getattr(buf, "itemsize", 8)
+        return total
+
+    def geom_type(self, index):
+        return int(self.geom_types[index])
+
+    def bounds(self, index):
+        """(minx, miny, maxx, maxy) of a feature, or None without geometry."""
+        minx, miny, maxx, maxy = (float(v) for v in self.bbox[4 * index:4 * index + 4])
+        if minx != minx:  # NaN
+            return None
+        return minx, miny, maxx, maxy
+
+    def polygons(self, index):
+        """Decode a feature into [[ring, ...], ...] with rings as [(x, y), ...]."""
+        polygons = []
+        for p in range(int(self.geom_offsets[index]), int(self.geom_offsets[index + 1])):
+            rings = []
+            for r in range(int(self.poly_offsets[p]), int(self.poly_offsets[p + 1])):
+                start, end = int(self.ring_offsets[r]), int(self.ring_offsets[r + 1])
+                rings.append(decode_ring(bytes(self.data[start:end])))
+            polygons.append(rings)
+        return polygons
+
+    def geometry(self, index):
+        """Decode a feature back into a GeoJSON geometry dict."""
+        gtype = self.geom_type(index)
+        if gtype == GEOM_NONE:
+            return None
+        polygons = [[[list(pt) for pt in ring] for ring in polygon] for polygon in self.polygons(index)]
+        if gtype == GEOM_POLYGON:
+            return {"type": "Polygon", "coordinates": polygons[0] if polygons else []}
+        return {"type": "MultiPolygon", "coordinates": polygons}
@@ -0,0 +1,195 @@
+"""
+Footprint index across events.
+
+Every event that has been shown, cached or saved as snapshot contributes
+its footprint bboxes, acquisition days and cloud cover as flat arrays; all
+events share one ``SpatialIndex`` rebuilt (vectorized) when the set of
+events changes.
+
+``nearest`` answers "what imagery is near this point, from any event": the
+query box around the point doubles until it holds ``k`` footprints passing
+the filters and no footprint outside it can be closer, so only the grid
+cells around the point are visited. Distances are point-to-bbox, in km on
+an equirectangular approximation at the point latitude (0 when the point
+is inside the footprint bbox); ties are broken by the newest acquisition.
+"""
+
+import math
+from datetime import date as _date
+
+import numpy as np
+
+from kadas_maxar.data.quadkey import quadkeys_to_bounds
+from kadas_maxar.data.spatial_index import SpatialIndex
+
+# Kilometres per degree of latitude
+KM_PER_DEGREE = 111.32
+# Acquisition day of footprints without a valid date
+NO_DAY = -1
+
+
+def day_ordinals(datetimes):
+    """int32 array of ``date.toordinal()`` of ISO datetimes (``NO_DAY`` if unknown)."""
+    days = np.full(len(datetimes), NO_DAY, dtype=np.int32)
+    for i, value in enumerate(datetimes):
+        if value:
+            try:
+                days[i] = _date.fromisoformat(value[:10]).toordinal()
+            except ValueError:
+                pass
+    return days
+
+
+class NearestHit:
+    """One footprint returned by ``GlobalFootprintIndex.nearest``."""
+
+    __slots__ = ("event", "index", "distance_km", "date", "cloud_cover")
+
+    def __init__(self, event, index, distance_km, day, cloud_cover):
+        self.event = event
+        self.index = index
+        self.distance_km = distance_km
+        self.date = _date.fromordinal(day) if day != NO_DAY else None
+        self.cloud_cover = cloud_cover
+
+    def __repr__(self):
+        return f"NearestHit({self.event!r}, {self.index}, {self.distance_km:.2f} km, {self.date})"
+
+
+class GlobalFootprintIndex:
+    """Footprints of several events behind one spatial index."""
+
+    def __init__(self):
+        self._events = {}  # event -> (version, bounds, days, clouds)
+        self._index = None
+        self._event_names = []
+        self._event_ids = self._records = self._days = self._clouds = None
+        self._extent = None
+
+    def __contains__(self, event):
+        return event in self._events
+
+    def __len__(self):
+        return sum(len(entry[2]) for entry in self._events.values())
+
+    def events(self):
+        return list(self._events)
+
+    def version(self, event):
+        """Version passed to ``add`` for ``event`` (None if not indexed)."""
+        entry = self._events.get(event)
+        return entry[0] if entry is not None else None
+
+    def add(self, event, bounds, datetimes, clouds, version=None):
+        """Index (or replace) the footprints of ``event``.
+
+        Args:
+            bounds: (n, 4) WGS84 bboxes, NaN rows for unknown geometry
+            datetimes: n ISO datetimes (None/"" if unknown)
+            clouds: n cloud cover values (None/NaN if unknown)
+            version: any value identifying this content (see ``version``)
+        """
+        bounds = np.array(bounds, dtype=np.float64).reshape(-1, 4)
+        clouds = np.array([np.nan if c is None else c for c in clouds], dtype=np.float64)
+        self._events[event] = (version, bounds, day_ordinals(datetimes), clouds)
+        self._index = None
+
+    def add_store(self, event, store, version=None):
+        """Index the records of a FootprintStore."""
+        records = store.records
+        self.add(
+            event, store.bounds(), [r.datetime for r in records], [r.cloud_cover for r in records],
+            version=version,
+        )
+
+    def add_snapshot(self, snapshot, version=None):
+        """Index a FootprintSnapshot from its columns (no record objects)."""
+        count = len(snapshot)
+        bounds = np.array(snapshot.bbox, dtype=np.float64).reshape(-1, 4)
+        missing = np.isnan(bounds).any(axis=1)
+        quadkeys = snapshot.column("quadkey")
+        if missing.any() and quadkeys is not None:
+            bounds[missing] = quadkeys_to_bounds([quadkeys[i] for i in np.nonzero(missing)[0]])
+        datetimes = snapshot.column("datetime") or [None] * count
+        clouds = snapshot.column("cloud_cover")
+        self.add(
+            snapshot.event, bounds, datetimes,
+            clouds if clouds is not None else np.full(count, np.nan), version=version,
+        )
+
+    def discard(self, event):
+        if self._events.pop(event, None) is not None:
+            self._index = None
+
+    def _build(self):
+        self._event_names = list(self._events)
+        entries = [self._events[name] for name in self._event_names]
+        if not entries:
+            entries = [(None, np.zeros((0, 4)), np.zeros(0, dtype=np.int32), np.zeros(0))]
+        bounds = np.concatenate([entry[1] for entry in entries])
+        self._event_ids = np.concatenate([np.full(len(e[1]), i, dtype=np.int32) for i, e in enumerate(entries)])
+        self._records = np.concatenate([np.arange(len(e[1]), dtype=np.int32) for e in entries])
+        self._days = np.concatenate([entry[2] for entry in entries])
+        self._clouds = np.concatenate([entry[3] for entry in entries])
+        self._index = SpatialIndex(bounds)
+        valid = bounds[~np.isnan(bounds).any(axis=1)]
+        if len(valid):
+            self._extent = (valid[:, 0].min(), valid[:, 1].min(), valid[:, 2].max(), valid[:, 3].max())
+
+    def nearest(self, x, y, k=10, since=None, until=None, max_cloud=None):
+        """The ``k`` footprints nearest to (``x``, ``y``) (WGS84) passing the filters.
+
+        Args:
+            since, until: acquisition date range (dates; footprints without a
+                date are excluded when either is given)
+            max_cloud: maximum cloud cover (footprints without it pass)
+
+        Returns:
+            list of NearestHit, nearest (then newest) first
+        """
+        if self._index is None:
+            self._build()
+        index = self._index
+        if not len(index) or k <= 0:
+            return []
+        cos_lat = max(math.cos(math.radians(y)), 0.01)
+        extent = self._extent
+        # Punto fuori dall'area indicizzata: si parte dal bordo più vicino
+        radius = max(extent[0] - x, x - extent[2], extent[1] - y, y - extent[3], 0.0) + index.cell
+        while True:
+            box = (x - radius, y - radius, x + radius, y + radius)
+            cells = (2.0 * radius / index.cell + 1.0) ** 2
+            # Riquadro ampio quanto l'indice (scansione lineare): ultimo giro
+            final = cells * 4 >= index.cols * index.rows or (
+                box[0] <= extent[0] and box[1] <= extent[1] and box[2] >= extent[2] and box[3] >= extent[3]
+            )
+            candidates = index.query(extent if final else box)
+            keep = np.ones(len(candidates), dtype=bool)
+            if since is not None:
+                keep &= self._days[candidates] >= since.toordinal()
+            if until is not None:
+                keep &= (self._days[candidates] <= until.toordinal()) & (self._days[candidates] != NO_DAY)
+            if max_cloud is not None:
+                keep &= ~(self._clouds[candidates] > max_cloud)
+            candidates = candidates[keep]
+            b = index.bounds[candidates]
+            dx = np.maximum(np.maximum(b[:, 0] - x, x - b[:, 2]), 0.0) * cos_lat
+            dy = np.maximum(np.maximum(b[:, 1] - y, y - b[:, 3]), 0.0)
+            distances = KM_PER_DEGREE * np.hypot(dx, dy)
+            # Fuori dal riquadro nessun footprint è più vicino di questo
+            reach = KM_PER_DEGREE * radius * cos_lat
+            if final or (len(candidates) >= k and np.partition(distances, k - 1)[k - 1] <= reach):
+                break
+            radius *= 2.0
+        if len(candidates) > k:
+            # Solo i k più vicini (e i pari merito) vengono ordinati
+            near = np.nonzero(distances <= np.partition(distances, k - 1)[k - 1])[0]
+            candidates, distances = candidates[near], distances[near]
+        order = np.lexsort((-self._days[candidates], distances))[:k]
+        return [
+            NearestHit(
+                self._event_names[self._event_ids[i]], int(self._records[i]), float(distances[j]),
+                int(self._days[i]), None if np.isnan(self._clouds[i]) else float(self._clouds[i]),
+            )
+            for j, i in ((j, candidates[j]) for j in order.tolist())
+        ]
@@ -0,0 +1,134 @@
+"""
+Registry of the map layers created by the plugin.
+
+Every plugin layer is tagged with custom properties (owner, source key and
+kind) before it is added to the project; the registry indexes the tagged
+layers from the project's ``layersAdded`` / ``layersWillBeRemoved`` signals.
+Custom properties are saved with the project, so layers of a reopened
+project are recognised as well.
+
+Lookups by (source, kind) are dict hits, a reload of a layer already in the
+project becomes a no-op, and "Clear All Layers" is one ``removeMapLayers``
+call over the registered ids instead of a scan of layer names.
+
+Imagery layers also record their members: the URL of every COG they read
+and the GDAL source it is opened with (``/vsicurl``, local VRT wrapper or
+downloaded file). ``reading(url)`` finds every layer built over a COG,
+mosaics and pansharpened/preset VRTs included, whatever their own source.
+"""
+
+import hashlib
+import json
+
+OWNER_PROPERTY = "maxar/owner"
+KEY_PROPERTY = "maxar/source"
+KIND_PROPERTY = "maxar/kind"
+MEMBERS_PROPERTY = "maxar/members"
+OWNER = "kadas_maxar"
+
+
+def mosaic_key(urls):
+    """Source key of a mosaic of ``urls`` (independent of their order)."""
+    digest = hashlib.sha1("\n".join(sorted(urls)).encode("utf-8")).hexdigest()
+    return f"mosaic:{digest}"
+
+
+class LayerRegistry:
+    """Plugin layers of ``project`` indexed by (source key, kind)."""
+
+    def __init__(self, project):
+        self.project = project
+        self._by_key = {}  # (key, kind) -> layer id
+        self._keys = {}  # layer id -> (key, kind)
+        self._readers = {}  # COG URL -> ids of the layers reading it
+        self._members = {}  # layer id -> COG URLs
+        project.layersAdded.connect(self._on_layers_added)
+        project.layersWillBeRemoved.connect(self._on_layers_removed)
+        self._on_layers_added(project.mapLayers().values())
+
+    @staticmethod
+    def tag(layer, key, kind, members=None):
+        """Mark ``layer`` as a plugin layer for (``key``, ``kind``).
+
+        ``members`` maps the URL of every COG the layer reads to its GDAL
+        source.
+        """
+        layer.setCustomProperty(OWNER_PROPERTY, OWNER)
+        layer.setCustomProperty(KEY_PROPERTY, key or "")
+        layer.setCustomProperty(KIND_PROPERTY, kind or "")
+        if members:
+            layer.setCustomProperty(MEMBERS_PROPERTY, json.dumps(members))
+
+    @staticmethod
+    def members_of(layer):
+        """{COG URL: GDAL source} recorded by ``tag`` ({} if none)."""
+        try:
+            return dict(json.loads(layer.customProperty(MEMBERS_PROPERTY) or "{}"))
+        except (TypeError, ValueError):
+            return {}
+
+    @staticmethod
+    def key_of(layer):
+        """(key, kind) of a tagged layer, None for other layers."""
+        if layer.customProperty(OWNER_PROPERTY) != OWNER:
+            return None
+        return layer.customProperty(KEY_PROPERTY) or "", layer.customProperty(KIND_PROPERTY) or ""
+
+    def _on_layers_added(self, layers):
+        for layer in layers:
+            key = self.key_of(layer)
+            if key is not None:
+                self._by_key[key] = layer.id()
+                self._keys[layer.id()] = key
+                self._members[layer.id()] = list(self.members_of(layer))
+                for url in self._members[layer.id()]:
+                    self._readers.setdefault(url, set()).add(layer.id())
+
+    def _on_layers_removed(self, layer_ids):
+        for layer_id in layer_ids:
+            key = self._keys.pop(layer_id, None)
+            if key is not None and self._by_key.get(key) == layer_id:
+                del self._by_key[key]
+            for url in self._members.pop(layer_id, ()):
+                readers = self._readers.get(url)
+                if readers is not None:
+                    readers.discard(layer_id)
+                    if not readers:
+                        del self._readers[url]
+
+    def find(self, key, kind):
+        """Layer in the project for (``key``, ``kind``) or None."""
+        layer_id = self._by_key.get((key or "", kind or ""))
+        return self.project.mapLayer(layer_id) if layer_id is not None else None
+
+    def reading(self, url):
+        """Layers in the project that read the COG at ``url``."""
+        layers = (self.project.mapLayer(layer_id) for layer_id in self._readers.get(url, ()))
+        return [layer for layer in layers if layer is not None]
+
+    def layer_ids(self, kind=None):
+        """Ids of the registered layers (of ``kind`` if given)."""
+        return [layer_id for layer_id, key in self._keys.items() if kind is None or key[1] == kind]
+
+    def remove_all(self):
+        """Remove every registered layer with one ``removeMapLayers`` call; returns the count."""
+        layer_ids = self.layer_ids()
+        if layer_ids:
+            self.project.removeMapLayers(layer_ids)
+        return len(layer_ids)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._by_key
+
+    def disconnect(self):
+        for signal, slot in (
+            (self.project.layersAdded, self._on_layers_added),
+            (self.project.layersWillBeRemoved, self._on_layers_removed),
+        ):
+            try:
+                signal.disconnect(slot)
+            except Exception:
+                pass
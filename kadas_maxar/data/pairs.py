@@ -0,0 +1,185 @@
+"""
+Pre/post-event image pairs over the same ground.
+
+Candidate pairs come from a hash join instead of all-pairs geometry tests:
+
+- quadkey: every footprint of one side is looked up, with each prefix of
+  its quadkey, in a dict of the other side's quadkeys. Equal tiles and
+  tiles nested at a different zoom (mismatched grids) match in
+  ``O(zoom)`` dict hits per footprint;
+- bbox: footprints without a quadkey are matched through the
+  ``SpatialIndex`` of the other side (strict overlap of the bboxes).
+
+Pairs run from the earlier to the later acquisition (before/after the event
+date when one is given), never within the same catalog id, and are ranked
+by time gap and mean cloud cover. Only the best ``per_footprint`` pairs of
+each "before" footprint are kept, so the output stays linear in the input.
+"""
+
+import heapq
+from collections import defaultdict
+from datetime import date as _date
+
+from kadas_maxar.data.spatial_index import SpatialIndex
+
+# Days of time gap worth a fully clouded pair (cloud weight in the score)
+CLOUD_DAYS = 30.0
+# Best pairs kept per "before" footprint
+PER_FOOTPRINT = 3
+
+MATCH_QUADKEY = "quadkey"
+MATCH_BBOX = "bbox"
+
+
+class ImagePair:
+    """A before/after pair of footprints (records of their events' stores)."""
+
+    __slots__ = ("before_event", "before", "after_event", "after", "days", "cloud", "score", "match")
+
+    def __init__(self, before_event, before, after_event, after, days, cloud, match):
+        self.before_event = before_event
+        self.before = before
+        self.after_event = after_event
+        self.after = after
+        self.days = days
+        self.cloud = cloud
+        self.score = days + CLOUD_DAYS * (cloud if cloud is not None else 50.0) / 100.0
+        self.match = match
+
+    def __repr__(self):
+        return (
+            f"ImagePair({self.before.catalog_id!r} {self.before.date} -> "
+            f"{self.after.catalog_id!r} {self.after.date}, {self.days}d, {self.match})"
+        )
+
+
+def _day(record):
+    try:
+        return _date.fromisoformat(record.datetime[:10]) if record.datetime else None
+    except ValueError:
+        return None
+
+
+def _candidates(store, max_cloud):
+    """{index: acquisition day} of the records usable in a pair."""
+    days = {}
+    for record in store.records:
+        if max_cloud is not None and record.cloud_cover is not None and record.cloud_cover > max_cloud:
+            continue
+        day = _day(record)
+        if day is not None:
+            days[record.index] = day
+    return days
+
+
+def _by_quadkey(store, indices):
+    table = defaultdict(list)
+    for index in indices:
+        quadkey = store.records[index].quadkey
+        if quadkey:
+            table[quadkey].append(index)
+    return table
+
+
+def _bbox_matches(store, indices, other_bounds, other_indices):
+    """(index, other index) with strictly overlapping bboxes, via a SpatialIndex."""
+    if not indices or not other_indices:
+        return
+    bounds = store.bounds()
+    index = SpatialIndex(other_bounds)
+    allowed = set(other_indices)
+    for i in indices:
+        box = bounds[i]
+        if box[0] != box[0]:  # NaN
+            continue
+        for j in index.query(box):
+            j = int(j)
+            other = other_bounds[j]
+            if j in allowed and other[0] < box[2] and box[0] < other[2] and other[1] < box[3] and box[1] < other[3]:
+                yield i, j
+
+
+def join(a, a_indices, b, b_indices):
+    """Overlapping footprints of stores ``a`` and ``b``: yields (i, j, match).
+
+    Each overlapping (i, j) is produced once.
+    """
+    a_qk = _by_quadkey(a, a_indices)
+    b_qk = _by_quadkey(b, b_indices)
+    # Tile di b uguale o discendente di un tile di a
+    for j in b_indices:
+        quadkey = b.records[j].quadkey
+        for level in range(1, len(quadkey) + 1):
+            for i in a_qk.get(quadkey[:level], ()):
+                yield i, j, MATCH_QUADKEY
+    # Tile di a discendente (strettamente) di un tile di b
+    for i in a_indices:
+        quadkey = a.records[i].quadkey
+        for level in range(1, len(quadkey)):
+            for j in b_qk.get(quadkey[:level], ()):
+                yield i, j, MATCH_QUADKEY
+    # Griglie diverse: footprints senza quadkey confrontati per bbox
+    a_plain = [i for i in a_indices if not a.records[i].quadkey]
+    b_plain = [j for j in b_indices if not b.records[j].quadkey]
+    a_tiled = [i for i in a_indices if a.records[i].quadkey]
+    for i, j in _bbox_matches(a, a_plain, b.bounds(), b_indices):
+        yield i, j, MATCH_BBOX
+    for j, i in _bbox_matches(b, b_plain, a.bounds(), a_tiled):
+        yield i, j, MATCH_BBOX
+
+
+def find_pairs(before, after=None, event_date=None, max_days=None, max_cloud=None, per_footprint=PER_FOOTPRINT):
+    """Ranked before/after pairs of footprints over the same ground.
+
+    Args:
+        before: FootprintStore of the (first) event
+        after: FootprintStore of a second event, None to pair within ``before``
+        event_date: if given, "before" images are acquired before this date
+            and "after" images on or after it
+        max_days: maximum time gap
+        max_cloud: footprints above this cloud cover (%) are ignored
+        per_footprint: best pairs kept per "before" footprint
+
+    Returns:
+        list of ImagePair, best (lowest score) first
+    """
+    same = after is None or after is before
+    after = before if same else after
+    a_days = _candidates(before, max_cloud)
+    b_days = a_days if same else _candidates(after, max_cloud)
+    a_indices, b_indices = sorted(a_days), sorted(b_days)
+
+    best = defaultdict(list)  # (side, before index) -> heap of (-score, n, pair)
+    count = 0
+    for i, j, match in join(before, a_indices, after, b_indices):
+        if same and i >= j:
+            # Il join di uno store con sé stesso è simmetrico
+            continue
+        first, second = (0, before, i, a_days[i]), (1, after, j, b_days[j])
+        if after.records[j].datetime < before.records[i].datetime:
+            first, second = second, first
+        side, s1, i1, d1 = first
+        _, s2, i2, d2 = second
+        r1, r2 = s1.records[i1], s2.records[i2]
+        if r1.datetime == r2.datetime or (r1.catalog_id and r1.catalog_id == r2.catalog_id):
+            continue
+        if event_date is not None and not d1 < event_date <= d2:
+            continue
+        days = (d2 - d1).days
+        if max_days is not None and days > max_days:
+            continue
+        clouds = [c for c in (r1.cloud_cover, r2.cloud_cover) if c is not None]
+        pair = ImagePair(
+            s1.event, r1, s2.event, r2, days,
+            sum(clouds) / len(clouds) if clouds else None, match,
+        )
+        heap = best[(0 if same else side, i1)]
+        count += 1
+        item = (-pair.score, count, pair)
+        if len(heap) < per_footprint:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+    pairs = [pair for heap in best.values() for _, _, pair in heap]
+    pairs.sort(key=lambda pair: (pair.score, pair.before.index, pair.after.index))
+    return pairs
@@ -0,0 +1,179 @@
+"""
+Batch coverage lookup for points of interest.
+
+Every point is located in the ``SpatialIndex`` grid with array arithmetic,
+the footprints registered in its cell are expanded through the CSR arrays
+and filtered by bbox, and the remaining (point, footprint) candidates are
+refined against the footprint outlines in one vectorized crossing test
+(even-odd rule over all the rings of a footprint). There is no per-point
+query: the cost grows with the number of points plus the number of
+candidate pairs, in chunks of at most ``CHUNK_EDGES`` edge tests.
+
+Footprints without geometry (known only by their quadkey tile) cover the
+points inside their bbox.
+"""
+
+import csv
+
+import numpy as np
+
+# Point/edge tests evaluated per numpy pass
+CHUNK_EDGES = 4_000_000
+
+LON_COLUMNS = ("lon", "lng", "long", "longitude", "x")
+LAT_COLUMNS = ("lat", "latitude", "y")
+NAME_COLUMNS = ("name", "nome", "label", "id")
+
+
+def read_csv_points(path):
+    """Points of a CSV file with longitude/latitude columns (WGS84).
+
+    Returns (x, y, names): float arrays and the value of the name column
+    (row number if there is none). Rows without valid coordinates are
+    skipped.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        sample = f.read(64 * 1024)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(f, dialect)
+        header = [name.strip().lower() for name in next(reader, [])]
+
+        def column(names):
+            return next((header.index(name) for name in names if name in header), None)
+
+        lon, lat, label = column(LON_COLUMNS), column(LAT_COLUMNS), column(NAME_COLUMNS)
+        if lon is None or lat is None:
+            raise ValueError(f"No longitude/latitude columns in {path} (header: {', '.join(header)})")
+        xs, ys, names = [], [], []
+        for row_number, row in enumerate(reader, start=2):
+            try:
+                x = float(row[lon].replace(",", "."))
+                y = float(row[lat].replace(",", "."))
+            except (IndexError, ValueError):
+                continue
+            if not (-180.0 <= x <= 180.0 and -90.0 <= y <= 90.0):
+                continue
+            xs.append(x)
+            ys.append(y)
+            names.append(row[label] if label is not None and label < len(row) else str(row_number))
+    return np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64), names
+
+
+def _expand(starts, counts):
+    """Positions ``starts[k] .. starts[k] + counts[k]`` for every k, concatenated."""
+    owner = np.repeat(np.arange(len(counts)), counts)
+    local = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, starts[owner] + local
+
+
+def bbox_candidates(index, x, y):
+    """(point, footprint) index arrays of the footprint bboxes containing each point."""
+    empty = np.zeros(0, dtype=np.int64)
+    if not index.cols or not len(x):
+        return empty, empty
+    col = np.floor((x - index.origin_x) / index.cell).astype(np.int64)
+    row = np.floor((y - index.origin_y) / index.cell).astype(np.int64)
+    inside = (col >= 0) & (col < index.cols) & (row >= 0) & (row < index.rows)
+    points = np.nonzero(inside)[0]
+    cells = row[points] * index.cols + col[points]
+    starts = index.starts[cells]
+    owner, positions = _expand(starts, index.starts[cells + 1] - starts)
+    pts = points[owner]
+    fps = index.items[positions].astype(np.int64)
+    b = index.bounds[fps]
+    px, py = x[pts], y[pts]
+    keep = (b[:, 0] <= px) & (px <= b[:, 2]) & (b[:, 1] <= py) & (py <= b[:, 3])
+    return pts[keep], fps[keep]
+
+
+class EdgeTable:
+    """Outline edges of footprints in CSR layout (footprint -> its edge slice)."""
+
+    def __init__(self, footprints, polygons_of):
+        footprints = np.unique(np.asarray(footprints, dtype=np.int64))
+        size = int(footprints.max()) + 1 if footprints.size else 0
+        self.starts = np.zeros(size, dtype=np.int64)
+        self.counts = np.zeros(size, dtype=np.int64)
+        chunks = []
+        total = 0
+        for footprint in footprints.tolist():
+            rings = [np.asarray(ring, dtype=np.float64) for polygon in polygons_of(footprint) for ring in polygon]
+            rings = [ring for ring in rings if len(ring) >= 3]
+            if not rings:
+                continue
+            edges = np.concatenate([np.hstack((ring, np.roll(ring, -1, axis=0))) for ring in rings])
+            # Lati orizzontali: mai attraversati dalla semiretta
+            edges = edges[edges[:, 1] != edges[:, 3]]
+            self.starts[footprint] = total
+            self.counts[footprint] = len(edges)
+            total += len(edges)
+            chunks.append(edges)
+        self.edges = np.concatenate(chunks) if chunks else np.zeros((0, 4))
+
+    def contains(self, x, y, pts, fps, chunk_edges=CHUNK_EDGES):
+        """Boolean mask of the (point, footprint) pairs with the point inside the outline."""
+        result = np.ones(len(pts), dtype=bool)
+        counts = self.counts[fps]
+        outlined = np.nonzero(counts)[0]
+        if not outlined.size:
+            return result
+        # Blocchi di coppie con al più ``chunk_edges`` test punto/lato
+        cumulative = np.cumsum(counts[outlined])
+        bounds = np.searchsorted(cumulative, np.arange(chunk_edges, cumulative[-1], chunk_edges))
+        for block in np.split(outlined, bounds):
+            if not block.size:
+                continue
+            owner, edge_ids = _expand(self.starts[fps[block]], counts[block])
+            ax, ay, bx, by = self.edges[edge_ids].T
+            px, py = x[pts[block]][owner], y[pts[block]][owner]
+            crosses = ((ay > py) != (by > py)) & (px < ax + (py - ay) * (bx - ax) / (by - ay))
+            result[block] = np.bincount(owner, weights=crosses, minlength=block.size).astype(np.int64) % 2 == 1
+        return result
+
+
+def covering(index, x, y, polygons_of, allowed=None):
+    """(point, footprint) arrays of every footprint outline covering every point.
+
+    Args:
+        index: SpatialIndex of the footprints
+        x, y: WGS84 point coordinates (arrays)
+        polygons_of: callable giving the polygons of a footprint index
+        allowed: optional footprint indices to consider (e.g. the filtered
+            ones)
+
+    Returns:
+        pairs sorted by point
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    pts, fps = bbox_candidates(index, x, y)
+    if allowed is not None:
+        mask = np.zeros(len(index.bounds), dtype=bool)
+        mask[np.asarray(list(allowed), dtype=np.int64)] = True
+        keep = mask[fps]
+        pts, fps = pts[keep], fps[keep]
+    if pts.size:
+        keep = EdgeTable(fps, polygons_of).contains(x, y, pts, fps)
+        pts, fps = pts[keep], fps[keep]
+    order = np.lexsort((fps, pts))
+    return pts[order], fps[order]
+
+
+def best_per_point(pts, fps, costs, count):
+    """(lowest-cost footprint, number of footprints) of each of ``count`` points.
+
+    The best footprint is -1 where none covers the point.
+    """
+    best = np.full(count, -1, dtype=np.int64)
+    counts = np.bincount(pts, minlength=count) if len(pts) else np.zeros(count, dtype=np.int64)
+    if not len(pts):
+        return best, counts
+    order = np.lexsort((np.asarray(costs, dtype=np.float64)[fps], pts))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = pts[order][1:] != pts[order][:-1]
+    best[pts[order][first]] = fps[order][first]
+    return best, counts
@@ -0,0 +1,147 @@
+"""
+Bing-style quadkey helpers.
+
+Every Vantor ARD footprint carries the ``quadkey`` of its Web Mercator tile,
+which already encodes the tile bounds and its position in the tile
+hierarchy. Extents, zoom targets, prefix queries ("all tiles under 12023")
+and per-parent counts can therefore be computed from the strings alone,
+without decoding any footprint geometry.
+"""
+
+import math
+from bisect import bisect_left
+from collections import Counter
+
+import numpy as np
+
+
+def quadkey_to_tile(quadkey):
+    """Return (x, y, zoom) of a quadkey string."""
+    x = y = 0
+    for char in quadkey:
+        digit = ord(char) - 48
+        if not 0 <= digit <= 3:
+            raise ValueError(f"Invalid quadkey digit {char!r} in {quadkey!r}")
+        x = (x << 1) | (digit & 1)
+        y = (y << 1) | (digit >> 1)
+    return x, y, len(quadkey)
+
+
+def tile_bounds(x, y, zoom):
+    """(min_lon, min_lat, max_lon, max_lat) of a Web Mercator tile."""
+    n = float(1 << zoom)
+    min_lon = x / n * 360.0 - 180.0
+    max_lon = (x + 1) / n * 360.0 - 180.0
+    max_lat = math.degrees(math.atan(math.sinh(math.pi * (1.0 - 2.0 * y / n))))
+    min_lat = math.degrees(math.atan(math.sinh(math.pi * (1.0 - 2.0 * (y + 1) / n))))
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def quadkey_bounds(quadkey):
+    """Bounds in EPSG:4326 of the tile identified by ``quadkey``."""
+    return tile_bounds(*quadkey_to_tile(quadkey))
+
+
+def quadkeys_to_bounds(quadkeys):
+    """Vectorized bounds for a sequence of quadkeys.
+
+    Quadkeys may have different lengths; empty or invalid entries yield NaN.
+
+    Returns:
+        (n, 4) float64 array of min_lon, min_lat, max_lon, max_lat
+    """
+    count = len(quadkeys)
+    result = np.full((count, 4), np.nan)
+    if count == 0:
+        return result
+    chars = np.asarray([qk or "" for qk in quadkeys], dtype=str)
+    width = chars.dtype.itemsize // 4
+    if width == 0:
+        return result
+    codes = chars.view(np.uint32).reshape(count, width).astype(np.int64)
+    present = codes != 0
+    digits = codes - 48
+    valid = np.all(~present | ((digits >= 0) & (digits <= 3)), axis=1)
+    zoom = present.sum(axis=1)
+    valid &= zoom > 0
+
+    x = np.zeros(count, dtype=np.int64)
+    y = np.zeros(count, dtype=np.int64)
+    for level in range(width):
+        digit = np.where(present[:, level], digits[:, level], 0)
+        step = present[:, level]
+        x = np.where(step, (x << 1) | (digit & 1), x)
+        y = np.where(step, (y << 1) | (digit >> 1), y)
+
+    n = np.ldexp(1.0, zoom)
+    result[:, 0] = x / n * 360.0 - 180.0
+    result[:, 2] = (x + 1) / n * 360.0 - 180.0
+    result[:, 3] = np.degrees(np.arctan(np.sinh(np.pi * (1.0 - 2.0 * y / n))))
+    result[:, 1] = np.degrees(np.arctan(np.sinh(np.pi * (1.0 - 2.0 * (y + 1) / n))))
+    result[~valid] = np.nan
+    return result
+
+
+def union_bounds(bounds):
+    """Union of an (n, 4) bounds array, or None if every row is NaN."""
+    bounds = np.asarray(bounds, dtype=float).reshape(-1, 4)
+    rows = bounds[~np.isnan(bounds).any(axis=1)]
+    if rows.size == 0:
+        return None
+    return (
+        float(rows[:, 0].min()), float(rows[:, 1].min()),
+        float(rows[:, 2].max()), float(rows[:, 3].max()),
+    )
+
+
+class QuadkeyIndex:
+    """Sorted quadkey index over footprint records.
+
+    Sorting the quadkey strings puts every tile right after its ancestors, so
+    "all tiles under prefix P" is one contiguous slice found by bisection.
+    """
+
+    def __init__(self, quadkeys):
+        order = sorted(range(len(quadkeys)), key=lambda i: quadkeys[i] or "")
+        self._keys = [quadkeys[i] or "" for i in order]
+        self._order = order
+        self._bounds = None
+        self._quadkeys = list(quadkeys)
+
+    @classmethod
+    def from_records(cls, records):
+        return cls([record.quadkey for record in records])
+
+    def __len__(self):
+        return len(self._keys)
+
+    @property
+    def bounds(self):
+        """(n, 4) tile bounds aligned with the original record order."""
+        if self._bounds is None:
+            self._bounds = quadkeys_to_bounds(self._quadkeys)
+        return self._bounds
+
+    def prefix(self, prefix):
+        """Record indices of all tiles at or below ``prefix`` in the hierarchy."""
+        start = bisect_left(self._keys, prefix)
+        # "4" sorts right after "3": the first key outside the subtree
+        end = bisect_left(self._keys, prefix + "4", lo=start)
+        return [self._order[i] for i in range(start, end) if self._keys[i]]
+
+    def counts(self, level):
+        """Number of footprints per parent quadkey truncated to ``level``."""
+        return Counter(key[:level] for key in self._keys if len(key) >= level)
+
+    def extent(self, indices=None):
+        """Union of the tile bounds of ``indices`` (all records if None)."""
+        bounds = self.bounds if indices is None else self.bounds[list(indices)]
+        return union_bounds(bounds)
+
+    def intersecting(self, bbox):
+        """Record indices whose tile intersects ``bbox`` (coarse spatial filter)."""
+        min_x, min_y, max_x, max_y = bbox
+        b = self.bounds
+        with np.errstate(invalid="ignore"):
+            mask = (b[:, 0] <= max_x) & (b[:, 2] >= min_x) & (b[:, 1] <= max_y) & (b[:, 3] >= min_y)
+        return np.nonzero(mask)[0].tolist()
@@ -0,0 +1,427 @@
+"""
+Binary footprint snapshots.
+
+A snapshot is a columnar copy of an event GeoJSON written after the first
+parse and reopened later with ``numpy.memmap``, so that switching back to an
+event costs an mmap instead of a download plus ``json.loads``.
+
+File layout (little endian, every array 8-byte aligned)::
+
+    magic      8 bytes   b"KMXSNAP\\0"
+    version    uint32    SNAPSHOT_VERSION
+    header_len uint32    length of the JSON header
+    header     JSON      event, source, etag, count, columns, arrays
+    arrays     raw       described by header["arrays"] (dtype, shape, offset)
+
+Geometry is stored as in :class:`kadas_maxar.data.geometry.RingStore`:
+``geom_offsets`` (feature -> polygons), ``poly_offsets`` (polygon -> rings),
+``ring_offsets`` (ring -> bytes) over the quantized, delta-encoded
+``ring_data`` buffer, plus one ``bbox`` row per feature.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import struct
+import time
+
+import numpy as np
+
+from kadas_maxar.data.geometry import RingStore
+from kadas_maxar.paths import get_cache_dir
+
+SNAPSHOT_MAGIC = b"KMXSNAP\0"
+# v2: quantized delta-encoded rings instead of float64 coordinates
+SNAPSHOT_VERSION = 2
+SNAPSHOT_SUFFIX = ".snap"
+
+_PREAMBLE = struct.Struct("<8sII")
+_ALIGN = 8
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is missing, corrupt or of another version."""
+
+
+def _pad(size):
+    return (-size) % _ALIGN
+
+
+def _column_kind(values):
+    """Infer the storage kind of a property column from its non-null values."""
+    kind = None
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, bool) or isinstance(value, (list, dict)):
+            return "json"
+        if isinstance(value, (int, float)):
+            current = "int" if isinstance(value, int) else "float"
+        elif isinstance(value, str):
+            current = "string"
+        else:
+            return "json"
+        if kind is None:
+            kind = current
+        elif kind != current:
+            if {kind, current} == {"int", "float"}:
+                kind = "float"
+            else:
+                return "json"
+    return kind or "string"
+
+
+def _encode_strings(values):
+    """Encode a list of str/None into (offsets, data) arrays."""
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    chunks = []
+    pos = 0
+    for i, value in enumerate(values):
+        if value is not None:
+            encoded = value.encode("utf-8")
+            chunks.append(encoded)
+            pos += len(encoded)
+        offsets[i + 1] = pos
+    data = np.frombuffer(b"".join(chunks), dtype=np.uint8) if pos else np.zeros(0, dtype=np.uint8)
+    return offsets, data
+
+
+def build_arrays(features, rings=None):
+    """Convert GeoJSON features into the snapshot columns.
+
+    ``rings`` may pass an already encoded RingStore for ``features``; the
+    feature dicts then do not need to carry their geometry any more.
+
+    Returns:
+        (columns, arrays): column schema list and a name -> ndarray dict
+    """
+    count = len(features)
+    props_list = [feat.get("properties") or {} for feat in features]
+
+    keys = []
+    seen = set()
+    for props in props_list:
+        for key in props:
+            if key not in seen:
+                seen.add(key)
+                keys.append(key)
+
+    arrays = {}
+    columns = []
+    for index, key in enumerate(keys):
+        values = [props.get(key) for props in props_list]
+        kind = _column_kind(values)
+        prefix = f"c{index}"
+        valid = np.fromiter((v is not None for v in values), dtype=np.uint8, count=count)
+        arrays[f"{prefix}.valid"] = valid
+        if kind in ("int", "float"):
+            arrays[f"{prefix}.values"] = np.fromiter(
+                (float(v) if v is not None else math.nan for v in values),
+                dtype=np.float64, count=count,
+            )
+        else:
+            if kind == "json":
+                values = [json.dumps(v) if v is not None else None for v in values]
+            offsets, data = _encode_strings(values)
+            arrays[f"{prefix}.offsets"] = offsets
+            arrays[f"{prefix}.data"] = data
+        columns.append({"name": key, "kind": kind, "prefix": prefix})
+
+    if rings is None:
+        rings = RingStore.from_features(features)
+    arrays["geom_types"] = np.frombuffer(rings.geom_types, dtype=np.uint8)
+    arrays["bbox"] = np.frombuffer(rings.bbox, dtype=np.float64).reshape(-1, 4)
+    arrays["geom_offsets"] = np.frombuffer(rings.geom_offsets, dtype=np.int64)
+    arrays["poly_offsets"] = np.frombuffer(rings.poly_offsets, dtype=np.int64)
+    arrays["ring_offsets"] = np.frombuffer(rings.ring_offsets, dtype=np.int64)
+    arrays["ring_data"] = np.frombuffer(bytes(rings.data), dtype=np.uint8)
+    return columns, arrays
+
+
+def write_snapshot(path, features, etag=None, source=None, event=None, rings=None):
+    """Write ``features`` to ``path`` as a binary snapshot (atomic replace)."""
+    columns, arrays = build_arrays(features, rings=rings)
+
+    specs = {}
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        specs[name] = {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": offset,
+        }
+        offset += array.nbytes + _pad(array.nbytes)
+
+    header = {
+        "event": event,
+        "source": source,
+        "etag": etag,
+        "count": len(features),
+        "created": time.time(),
+        "columns": columns,
+        "arrays": specs,
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+    header_bytes += b" " * _pad(_PREAMBLE.size + len(header_bytes))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as fh:
+        fh.write(_PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(header_bytes)))
+        fh.write(header_bytes)
+        for name, array in arrays.items():
+            fh.write(array.tobytes())
+            fh.write(b"\0" * _pad(array.nbytes))
+    os.replace(tmp_path, path)
+    return path
+
+
+class FootprintSnapshot:
+    """Read-only, memory-mapped view over a snapshot file.
+
+    Behaves as a sequence of GeoJSON-like feature dicts built on demand, so
+    it can stand in for the parsed ``features`` list.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            raw = np.memmap(path, dtype=np.uint8, mode="r")
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"Cannot map snapshot {path}: {e}")
+        if raw.size < _PREAMBLE.size:
+            raise SnapshotError(f"Snapshot too short: {path}")
+        magic, version, header_len = _PREAMBLE.unpack(bytes(raw[:_PREAMBLE.size]))
+        if magic != SNAPSHOT_MAGIC:
+            raise SnapshotError(f"Not a snapshot file: {path}")
+        if version != SNAPSHOT_VERSION:
+            raise SnapshotError(f"Snapshot version {version} != {SNAPSHOT_VERSION}: {path}")
+        try:
+            self.header = json.loads(bytes(raw[_PREAMBLE.size:_PREAMBLE.size + header_len]))
+        except ValueError as e:
+            raise SnapshotError(f"Corrupt snapshot header in {path}: {e}")
+
+        base = _PREAMBLE.size + header_len
+        self._raw = raw
+        self._arrays = {}
+        for name, spec in self.header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            shape = tuple(spec["shape"])
+            nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+            start = base + spec["offset"]
+            if start + nbytes > raw.size:
+                raise SnapshotError(f"Truncated snapshot array '{name}' in {path}")
+            self._arrays[name] = raw[start:start + nbytes].view(dtype).reshape(shape)
+        self.columns = self.header["columns"]
+        self.rings = RingStore(
+            data=self._arrays["ring_data"],
+            geom_types=self._arrays["geom_types"],
+            geom_offsets=self._arrays["geom_offsets"],
+            poly_offsets=self._arrays["poly_offsets"],
+            ring_offsets=self._arrays["ring_offsets"],
+            bbox=self._arrays["bbox"].reshape(-1),
+        )
+
+    @property
+    def etag(self):
+        return self.header.get("etag")
+
+    @property
+    def source(self):
+        return self.header.get("source")
+
+    @property
+    def event(self):
+        return self.header.get("event")
+
+    @property
+    def bbox(self):
+        """(n, 4) array of minx, miny, maxx, maxy in EPSG:4326."""
+        return self._arrays["bbox"]
+
+    def array(self, name):
+        return self._arrays[name]
+
+    def __len__(self):
+        return int(self.header["count"])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return {
+            "type": "Feature",
+            "properties": self.properties(index),
+            "geometry": self.geometry(index),
+        }
+
+    def value(self, column, index):
+        """Decode one attribute value for the feature at ``index``."""
+        prefix = column["prefix"]
+        if not self._arrays[f"{prefix}.valid"][index]:
+            return None
+        kind = column["kind"]
+        if kind in ("int", "float"):
+            value = float(self._arrays[f"{prefix}.values"][index])
+            return int(value) if kind == "int" else value
+        offsets = self._arrays[f"{prefix}.offsets"]
+        text = bytes(self._arrays[f"{prefix}.data"][offsets[index]:offsets[index + 1]]).decode("utf-8")
+        return json.loads(text) if kind == "json" else text
+
+    def column(self, name):
+        """Every value of the property ``name`` without building feature dicts.
+
+        Numeric columns come back as a float array (NaN where missing), the
+        others as a list of str (None where missing); None if no feature has
+        the property.
+        """
+        column = next((c for c in self.columns if c["name"] == name), None)
+        if column is None:
+            return None
+        prefix = column["prefix"]
+        valid = self._arrays[f"{prefix}.valid"].astype(bool)
+        if column["kind"] in ("int", "float"):
+            return np.where(valid, self._arrays[f"{prefix}.values"], np.nan)
+        offsets = self._arrays[f"{prefix}.offsets"].tolist()
+        data = bytes(self._arrays[f"{prefix}.data"])
+        if data.isascii():
+            # Byte offsets are character offsets: one decode for the column
+            data = data.decode("ascii")
+            return [data[offsets[i]:offsets[i + 1]] if ok else None for i, ok in enumerate(valid.tolist())]
+        return [
+            data[offsets[i]:offsets[i + 1]].decode("utf-8") if ok else None
+            for i, ok in enumerate(valid.tolist())
+        ]
+
+    def column_values(self, name):
+        """Python values of the property ``name`` for every feature.
+
+        Same values as ``properties`` (int/float/str/decoded JSON, None where
+        missing), decoded column by column; None if no feature has the
+        property.
+        """
+        column = next((c for c in self.columns if c["name"] == name), None)
+        if column is None:
+            return None
+        values = self.column(name)
+        kind = column["kind"]
+        if kind in ("int", "float"):
+            cast = int if kind == "int" else float
+            return [None if v != v else cast(v) for v in values.tolist()]
+        if kind == "json":
+            return [json.loads(v) if v is not None else None for v in values]
+        return values
+
+    def properties(self, index):
+        props = {}
+        for column in self.columns:
+            value = self.value(column, index)
+            if value is not None:
+                props[column["name"]] = value
+        return props
+
+    def geometry(self, index):
+        return self.rings.geometry(index)
+
+    def close(self):
+        """Drop the array views; the mapping is released once unreferenced."""
+        self._arrays = {}
+        self.rings = None
+        self._raw = None
+
+
+class SnapshotStore:
+    """Directory of per-event snapshots keyed by the source ETag.
+
+    Files are named ``<event>.<etag digest>.snap``: a new ETag produces a new
+    file instead of overwriting one that may still be mapped (Windows refuses
+    to replace mapped files), and older generations are pruned best-effort.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or get_cache_dir("snapshots")
+
+    @staticmethod
+    def _safe_name(event):
+        return re.sub(r"[^A-Za-z0-9._-]", "_", event)
+
+    @staticmethod
+    def _digest(etag):
+        return hashlib.sha1((etag or "").encode("utf-8")).hexdigest()[:16]
+
+    def path_for(self, event, etag):
+        return os.path.join(self.directory, f"{self._safe_name(event)}.{self._digest(etag)}{SNAPSHOT_SUFFIX}")
+
+    def _candidates(self, event):
+        prefix = f"{self._safe_name(event)}."
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        paths = [
+            os.path.join(self.directory, name)
+            for name in names
+            if name.startswith(prefix) and name.endswith(SNAPSHOT_SUFFIX)
+            and name.count(".") == prefix.count(".") + 1
+        ]
+        return sorted(paths, key=lambda p: os.path.getmtime(p), reverse=True)
+
+    def open(self, event, etag=None):
+        """Open the newest valid snapshot for ``event`` (optionally a given ETag).
+
+        Returns None when no usable snapshot exists; stale or corrupt files
+        are removed on the way.
+        """
+        paths = [self.path_for(event, etag)] if etag is not None else self._candidates(event)
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            try:
+                return FootprintSnapshot(path)
+            except SnapshotError:
+                self._remove(path)
+        return None
+
+    def snapshots(self):
+        """Open every valid snapshot in the directory (newest generation per event)."""
+        try:
+            paths = [
+                os.path.join(self.directory, name)
+                for name in os.listdir(self.directory) if name.endswith(SNAPSHOT_SUFFIX)
+            ]
+            paths.sort(key=os.path.getmtime, reverse=True)
+        except OSError:
+            return
+        seen = set()
+        for path in paths:
+            try:
+                snapshot = FootprintSnapshot(path)
+            except SnapshotError:
+                continue
+            if snapshot.event and snapshot.event not in seen:
+                seen.add(snapshot.event)
+                yield snapshot
+
+    def save(self, event, features, etag=None, source=None, rings=None):
+        """Write a snapshot for ``event`` and prune previous generations."""
+        path = self.path_for(event, etag)
+        write_snapshot(path, features, etag=etag, source=source, event=event, rings=rings)
+        for old in self._candidates(event):
+            if old != path:
+                self._remove(old)
+        return path
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,103 @@
+"""
+Bounding-box spatial index for footprints.
+
+A uniform grid in CSR layout: every footprint bbox is registered in the grid
+cells it overlaps, cell entries are stored contiguously (``items``) and
+``starts[cell]:starts[cell + 1]`` is the slice of one cell. Building is fully
+vectorized with numpy and the whole index is three flat integer arrays, so it
+is cheap to keep one per cached event.
+"""
+
+import numpy as np
+
+# Upper bound of grid cells along one axis (keeps the CSR arrays small for
+# events spanning the whole globe with a few tiny footprints)
+MAX_CELLS_PER_AXIS = 1024
+
+
+class SpatialIndex:
+    """Grid index over an (n, 4) array of min_x, min_y, max_x, max_y.
+
+    Rows containing NaN (footprints without geometry) are never returned.
+    """
+
+    def __init__(self, bounds):
+        self.bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 4)
+        self._valid = ~np.isnan(self.bounds).any(axis=1)
+        self.items = np.zeros(0, dtype=np.int32)
+        self.starts = np.zeros(1, dtype=np.int64)
+        self.cols = self.rows = 0
+        valid = np.nonzero(self._valid)[0]
+        if valid.size:
+            self._build(valid)
+
+    def _build(self, valid):
+        b = self.bounds[valid]
+        self.origin_x = float(b[:, 0].min())
+        self.origin_y = float(b[:, 1].min())
+        width = float(b[:, 2].max()) - self.origin_x
+        height = float(b[:, 3].max()) - self.origin_y
+
+        # Cells about the size of a typical footprint: each bbox lands in ~1-4 cells
+        typical = float(np.median(np.maximum(b[:, 2] - b[:, 0], b[:, 3] - b[:, 1])))
+        cell = max(typical, width / MAX_CELLS_PER_AXIS, height / MAX_CELLS_PER_AXIS, 1e-9)
+        self.cell = cell
+        self.cols = int(width // cell) + 1
+        self.rows = int(height // cell) + 1
+
+        x0, y0, x1, y1 = self._cell_range(b[:, 0], b[:, 1], b[:, 2], b[:, 3])
+        nx = x1 - x0 + 1
+        ny = y1 - y0 + 1
+        per_item = nx * ny
+        owner = np.repeat(np.arange(valid.size), per_item)
+        # position of each entry inside its item's nx * ny block
+        local = np.arange(per_item.sum()) - np.repeat(np.cumsum(per_item) - per_item, per_item)
+        cx = x0[owner] + local % nx[owner]
+        cy = y0[owner] + local // nx[owner]
+        cells = cy * self.cols + cx
+
+        order = np.argsort(cells, kind="stable")
+        self.items = valid[owner[order]].astype(np.int32)
+        counts = np.bincount(cells, minlength=self.cols * self.rows)
+        self.starts = np.concatenate(([0], np.cumsum(counts)))
+
+    def _cell_range(self, min_x, min_y, max_x, max_y):
+        def clip(values, upper):
+            return np.clip(np.floor(values).astype(np.int64), 0, upper - 1)
+        return (
+            clip((np.asarray(min_x) - self.origin_x) / self.cell, self.cols),
+            clip((np.asarray(min_y) - self.origin_y) / self.cell, self.rows),
+            clip((np.asarray(max_x) - self.origin_x) / self.cell, self.cols),
+            clip((np.asarray(max_y) - self.origin_y) / self.cell, self.rows),
+        )
+
+    @classmethod
+    def from_store(cls, store):
+        """Index the footprint bboxes of a FootprintStore."""
+        return cls(store.bounds())
+
+    def __len__(self):
+        return int(self._valid.sum())
+
+    @property
+    def nbytes(self):
+        return int(self.bounds.nbytes + self.items.nbytes + self.starts.nbytes + self._valid.nbytes)
+
+    def query(self, bbox):
+        """Sorted indices of footprints whose bbox intersects ``bbox``."""
+        if not self.cols:
+            return np.zeros(0, dtype=np.int64)
+        min_x, min_y, max_x, max_y = bbox
+        x0, y0, x1, y1 = (int(v) for v in self._cell_range(min_x, min_y, max_x, max_y))
+        if (x1 - x0 + 1) * (y1 - y0 + 1) * 4 >= self.cols * self.rows:
+            # Query covers most of the grid: a linear scan is cheaper
+            candidates = np.nonzero(self._valid)[0]
+        else:
+            chunks = [
+                self.items[self.starts[row * self.cols + x0]:self.starts[row * self.cols + x1 + 1]]
+                for row in range(y0, y1 + 1)
+            ]
+            candidates = np.unique(np.concatenate(chunks)) if chunks else np.zeros(0, dtype=np.int64)
+        b = self.bounds[candidates]
+        mask = (b[:, 0] <= max_x) & (b[:, 2] >= min_x) & (b[:, 1] <= max_y) & (b[:, 3] >= min_y)
+        return candidates[mask].astype(np.int64)
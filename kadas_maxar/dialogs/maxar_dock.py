@@ -16,6 +16,7 @@ try:
         QPushButton,
         QComboBox,
         QSpinBox,
+        QDoubleSpinBox,
         QCheckBox,
         QGroupBox,
         QProgressBar,
@@ -35,7 +36,7 @@ except Exception:
     from qgis.PyQt.QtCore import QSettings
     from qgis.PyQt.QtWidgets import (
         QDockWidget, QWidget, QVBoxLayout, QHBoxLayout, QFormLayout,
-        QLabel, QLineEdit, QPushButton, QComboBox, QSpinBox, QCheckBox, QGroupBox,
+        QLabel, QLineEdit, QPushButton, QComboBox, QSpinBox, QDoubleSpinBox, QCheckBox, QGroupBox,
         QProgressBar, QTableWidget, QTableWidgetItem, QHeaderView,
         QAbstractItemView, QSplitter, QMessageBox, QDateEdit, QApplication
     )
@@ -142,8 +143,68 @@ except Exception:
         def __init__(self, symbol):
             self.symbol = symbol
 
+import functools
 import json
+import os
+import time
 from kadas_maxar.logger import get_logger
+from kadas_maxar.data.geometry import GEOM_POLYGON
+from kadas_maxar.data.footprints import FootprintStore
+from kadas_maxar.data.event_cache import EventCache, DEFAULT_MAX_ENTRIES, DEFAULT_MAX_MB
+from kadas_maxar.data.layer_registry import LayerRegistry, mosaic_key
+from kadas_maxar.imagery.cog_loader import CogJob, CogLoadManager
+from kadas_maxar.imagery.cog_metadata import cog_metadata_cache
+from kadas_maxar.imagery.gdal_profile import cog_access_profile
+from kadas_maxar.imagery.cache_server import block_cache_server, shutdown_block_cache
+from kadas_maxar.imagery.downloads import (
+    DownloadQueue,
+    DownloadTask,
+    DownloadWorker,
+    Downloader,
+    default_download_dir,
+    local_path,
+)
+from kadas_maxar.imagery.extract import ExtractJob, ExtractWorker, extract_path
+from kadas_maxar.imagery.prefetch import ViewPrefetcher
+from kadas_maxar.imagery.layer_tree import LayerInsertQueue
+from kadas_maxar.imagery.activation import ViewActivator, set_footprint
+from kadas_maxar.imagery.occlusion import OUTLINE_PROPERTY, polygons_wkt
+from kadas_maxar.imagery.pansharpen import build_pansharpened
+from kadas_maxar.imagery.band_presets import PRESETS, build_preset_vrt, is_index, style_index_layer
+from kadas_maxar.imagery.stretch import GROUP_PROPERTY, apply_stretch, stretch_cache
+from kadas_maxar.imagery.mosaic import (
+    MOSAIC_TILES, MOSAIC_ACQUISITION, MOSAIC_SELECTION, group_records, replace_source,
+)
+
+try:
+    from kadas_maxar.data.snapshot import SnapshotStore
+except Exception:
+    # numpy non disponibile: nessuno snapshot binario
+    SnapshotStore = None
+try:
+    from kadas_maxar.data.spatial_index import SpatialIndex
+except ImportError:
+    # numpy non disponibile: nessun indice spaziale
+    SpatialIndex = None
+try:
+    from kadas_maxar.data.global_index import GlobalFootprintIndex
+except ImportError:
+    GlobalFootprintIndex = None
+try:
+    from kadas_maxar.data import pairs
+except ImportError:
+    # numpy non disponibile
+    pairs = None
+try:
+    from kadas_maxar.data import poi
+except ImportError:
+    # numpy non disponibile
+    poi = None
+try:
+    from kadas_maxar.data import coverage
+except ImportError:
+    # numpy non disponibile: nessuna analisi di copertura
+    coverage = None
 
 # GitHub URLs per i dati Maxar Open Data (stesso pattern del plugin originale)
 GITHUB_RAW_URL = "https://raw.githubusercontent.com/opengeos/maxar-open-data/master"
@@ -289,11 +350,14 @@ class DataFetchWorker(QThread):
     finished = pyqtSignal(str)
     error = pyqtSignal(str)
 
-    def __init__(self, url, data_type="text", timeout=120):
+    def __init__(self, url, data_type="text", timeout=120, headers=None):
         super().__init__()
         self.url = url
         self.data_type = data_type
         self.timeout = timeout
+        self.headers = headers or {}
+        self.etag = None  # ETag della risposta (per snapshot/revalidation)
+        self.not_modified = False  # True se il server risponde 304
 
     def run(self):
         """Fetch data in background using QGIS network manager (proxy aware)."""
@@ -316,6 +380,8 @@ class DataFetchWorker(QThread):
             # Configura headers per compatibilità
             req.setRawHeader(b"User-Agent", b"KADAS-Vantor-Plugin/0.1.0")
             req.setAttribute(QNetworkRequest.CacheLoadControlAttribute, QNetworkRequest.AlwaysNetwork)
+            for name, value in self.headers.items():
+                req.setRawHeader(name.encode("ascii"), value.encode("utf-8"))
             
             get_logger().debug(f"Network request created for: {req.url().toString()}")
             
@@ -356,6 +422,15 @@ class DataFetchWorker(QThread):
             status_code = reply.attribute(QNetworkRequest.HttpStatusCodeAttribute)
             get_logger().debug(f"HTTP Status Code: {status_code}")
             
+            etag = reply.rawHeader(b"ETag").data().decode("utf-8", "replace")
+            self.etag = etag or None
+            
+            if status_code == 304:
+                get_logger().info(f"Not modified (ETag {self.etag}): {self.url}")
+                self.not_modified = True
+                self.finished.emit("")
+                return
+            
             if status_code and status_code >= 400:
                 error_msg = f"HTTP error {status_code} from {self.url}"
                 get_logger().error(error_msg)
@@ -373,6 +448,30 @@ class DataFetchWorker(QThread):
             self.error.emit(error_msg)
 
 
+class CoverageWorker(QThread):
+    """Aggiorna in background la copertura dei footprints filtrati."""
+    computed = pyqtSignal(object, object)  # statistiche, rettangoli dei gap
+    error = pyqtSignal(str)
+
+    def __init__(self, engine, indices, polygons_of):
+        super().__init__()
+        self.engine = engine
+        self.indices = indices
+        self.polygons_of = polygons_of
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        try:
+            if self.engine.update(self.indices, self.polygons_of, cancelled=lambda: self._cancelled):
+                self.computed.emit(self.engine.stats(), self.engine.gap_rectangles())
+        except Exception as e:
+            get_logger().error(f"Coverage analysis failed: {e}", exc_info=True)
+            self.error.emit(str(e))
+
+
 class NumericTableWidgetItem(QTableWidgetItem):
     """Custom table item that sorts numerically."""
     def __lt__(self, other):
@@ -391,20 +490,70 @@ class MaxarDockWidget(QDockWidget):
         self.iface = iface
         self.settings = QSettings()
         self.events = []
-        self.current_geojson = None
         self.footprints_layer = None
         self.fetch_worker = None
         self._sort_order = {}
-        self.all_features = []
+        self.store = FootprintStore()  # Record + geometrie quantizzate dell'evento
+        self.all_features = self.store.records  # FootprintRecord, indicizzati per record.index
         self._updating_selection = False  # Prevent selection feedback loops
-        self._feature_id_to_quadkey = {}  # Map layer feature IDs to quadkeys
-        self._quadkey_to_feature_id = {}  # Map quadkeys to layer feature IDs
+        self._feature_id_to_index = {}  # Map layer feature IDs to record indices
+        self._index_to_feature_id = {}  # Map record indices to layer feature IDs
         self.selection_tool = None  # Custom map tool for interactive selection
         self._previous_map_tool = None  # Store previous tool when entering selection mode
+        self._loading_event = None  # Evento del fetch footprints in corso
+        self._loading_url = None
+        self._footprints_worker = None  # Ultimo fetch footprints avviato
+        # Fetch footprints ancora in esecuzione (anche superati da un altro evento):
+        # il riferimento resta fino alla fine del thread
+        self._fetch_workers = set()
+        self.snapshot_store = SnapshotStore() if SnapshotStore is not None else None
+        self.spatial_index = None  # SpatialIndex dell'evento mostrato
+        self._shown_event = None  # Evento attualmente in tabella/mappa
+        self.event_cache = EventCache()  # LRU degli eventi già caricati
+        self._configure_event_cache()
+        self.cog_loader = None  # CogLoadManager (creato al primo caricamento)
+        self.download_queue = DownloadQueue()  # Coda persistente dei download
+        self.download_worker = None
+        self._download_failures = 0
+        self.extract_worker = None  # ExtractWorker dell'estrazione AOI in corso
+        self._extract_results = ([], [])  # (layer aggiunti, errori)
+        self.layer_registry = LayerRegistry(QgsProject.instance())  # Layer creati dal plugin
+        self._coverage = None  # Analisi di copertura attiva (evento, AOI, CoverageEngine)
+        self.coverage_worker = None
+        self._coverage_pending = False
+        self._pairs = []  # ImagePair mostrate nella tabella coppie
+        self._pair_stores = {}  # evento -> FootprintStore delle coppie mostrate
+        # Footprints di tutti gli eventi mostrati, in cache o con snapshot
+        self.global_index = GlobalFootprintIndex() if GlobalFootprintIndex is not None else None
+        self._snapshots_indexed = False  # Snapshot su disco già aggiunti all'indice globale
+        self._nearest = []  # NearestHit mostrati nella tabella
+        self._pending_selection = None  # (evento, indici) da selezionare quando l'evento è mostrato
 
         self.setAllowedAreas(Qt.LeftDockWidgetArea | Qt.RightDockWidgetArea)
         self._setup_ui()
         self._load_events()
+        # Download interrotti alla chiusura precedente
+        self._start_downloads()
+        # Prefetch delle overview dei COG visibili dopo ogni navigazione
+        self.prefetcher = ViewPrefetcher(
+            self.iface.mapCanvas(),
+            enabled=lambda: self.settings.value("MaxarOpenData/prefetch", True, type=bool),
+            parent=self,
+        )
+        # Inserimento a blocchi nei gruppi evento/acquisizione
+        self.layer_queue = LayerInsertQueue(
+            self.iface.mapCanvas(),
+            grouped=lambda: self.settings.value("MaxarOpenData/group_layers", True, type=bool),
+            parent=self,
+        )
+        # Tile lontani dalla vista disattivati fino a quando la vista si avvicina
+        self.activator = ViewActivator(
+            self.iface.mapCanvas(),
+            self.layer_registry.layer_ids,
+            enabled=lambda: self.settings.value("MaxarOpenData/deferred_activation", True, type=bool),
+            occlusion=lambda: self.settings.value("MaxarOpenData/occlusion_culling", True, type=bool),
+            parent=self,
+        )
 
     def _setup_ui(self):
         """Set up the dock widget UI."""
@@ -582,6 +731,41 @@ class MaxarDockWidget(QDockWidget):
         self.zoom_btn.setEnabled(True)
         actions_inner.addWidget(self.zoom_btn)
 
+        # Copertura minima dell'AOI (vista o poligoni selezionati nel layer attivo)
+        cover_layout = QHBoxLayout()
+        cover_layout.addWidget(QLabel("Prefer:"))
+        self.cover_prefer_combo = QComboBox()
+        self.cover_prefer_combo.addItem("Low cloud", "cloud")
+        self.cover_prefer_combo.addItem("Recent", "recent")
+        self.cover_prefer_combo.addItem("Fine GSD", "gsd")
+        self.cover_prefer_combo.addItem("Post-event (after start date)", "post_event")
+        cover_layout.addWidget(self.cover_prefer_combo, 1)
+        self.best_coverage_btn = QPushButton("Select Best Coverage")
+        self.best_coverage_btn.setToolTip(
+            "Select a near-minimal set of the filtered footprints covering the map view, "
+            "or the selected polygons of the active layer"
+        )
+        self.best_coverage_btn.clicked.connect(self._select_best_coverage)
+        cover_layout.addWidget(self.best_coverage_btn)
+        self.coverage_btn = QPushButton("Coverage")
+        self.coverage_btn.setToolTip(
+            "Covered area, gaps (temporary layer) and overlap depth of the filtered footprints "
+            "over the same AOI; updated when the filters change"
+        )
+        self.coverage_btn.clicked.connect(self._analyze_coverage)
+        cover_layout.addWidget(self.coverage_btn)
+        actions_inner.addLayout(cover_layout)
+
+        # Copertura di punti di interesse (layer di punti attivo o CSV)
+        self.poi_coverage_btn = QPushButton("POI Coverage...")
+        self.poi_coverage_btn.setToolTip(
+            "For every point of the active point layer (selected points, if any) or of a CSV "
+            "with lon/lat columns: the filtered footprints covering it and the best one "
+            "(\"Prefer\" criterion), as temporary layers"
+        )
+        self.poi_coverage_btn.clicked.connect(self._poi_coverage)
+        actions_inner.addWidget(self.poi_coverage_btn)
+
         # Load imagery buttons
         imagery_layout = QHBoxLayout()
 
@@ -603,14 +787,199 @@ class MaxarDockWidget(QDockWidget):
         self.load_pan_btn.setEnabled(True)
         imagery_layout.addWidget(self.load_pan_btn)
 
+        self.load_pansharpened_btn = QPushButton("Load Pansharpened")
+        self.load_pansharpened_btn.setToolTip(
+            "Load a virtual pansharpened RGB layer from Pan + MS (computed per visible block)"
+        )
+        self.load_pansharpened_btn.clicked.connect(self._load_pansharpened)
+        self.load_pansharpened_btn.setEnabled(True)
+        imagery_layout.addWidget(self.load_pansharpened_btn)
+
         actions_inner.addLayout(imagery_layout)
 
+        # Preset multispettrali: VRT con le sole bande necessarie
+        preset_layout = QHBoxLayout()
+        preset_layout.addWidget(QLabel("MS preset:"))
+        self.preset_combo = QComboBox()
+        for preset, (label, _, _) in PRESETS.items():
+            self.preset_combo.addItem(label, preset)
+        self.preset_combo.setToolTip(
+            "Band subset or index VRT over the multispectral COG (only the needed bands are read)"
+        )
+        preset_layout.addWidget(self.preset_combo, 1)
+        self.load_preset_btn = QPushButton("Load")
+        self.load_preset_btn.clicked.connect(self._load_ms_preset)
+        preset_layout.addWidget(self.load_preset_btn)
+        actions_inner.addLayout(preset_layout)
+
+        # Un layer per tile o mosaico VRT
+        mosaic_layout = QHBoxLayout()
+        mosaic_layout.addWidget(QLabel("Layers:"))
+        self.mosaic_combo = QComboBox()
+        self.mosaic_combo.addItem("One per tile", MOSAIC_TILES)
+        self.mosaic_combo.addItem("Mosaic per acquisition", MOSAIC_ACQUISITION)
+        self.mosaic_combo.addItem("Single mosaic", MOSAIC_SELECTION)
+        self.mosaic_combo.setToolTip(
+            "Build one virtual mosaic (VRT) over the selected tiles instead of one layer per tile"
+        )
+        mosaic_index = self.mosaic_combo.findData(
+            self.settings.value("MaxarOpenData/mosaic_mode", MOSAIC_TILES)
+        )
+        self.mosaic_combo.setCurrentIndex(max(mosaic_index, 0))
+        self.mosaic_combo.currentIndexChanged.connect(
+            lambda _: self.settings.setValue("MaxarOpenData/mosaic_mode", self.mosaic_combo.currentData())
+        )
+        mosaic_layout.addWidget(self.mosaic_combo, 1)
+        actions_inner.addLayout(mosaic_layout)
+
+        # Download dei COG selezionati (copia locale completa)
+        download_layout = QHBoxLayout()
+        self.download_combo = QComboBox()
+        self.download_combo.addItem("Visual", "visual")
+        self.download_combo.addItem("MS", "ms_analytic")
+        self.download_combo.addItem("Pan", "pan_analytic")
+        download_layout.addWidget(self.download_combo, 1)
+        self.download_btn = QPushButton("Download")
+        self.download_btn.setToolTip(
+            "Download the selected COGs at full resolution (parallel, resumed after a restart); "
+            "loaded layers switch to the local files"
+        )
+        self.download_btn.clicked.connect(self._download_selected)
+        download_layout.addWidget(self.download_btn)
+        self.extract_btn = QPushButton("Extract AOI")
+        self.extract_btn.setToolTip(
+            "Clip the selected COGs to the current map view and save them as local GeoTIFFs "
+            "in the project CRS (only the needed blocks are read)"
+        )
+        self.extract_btn.clicked.connect(self._extract_aoi)
+        download_layout.addWidget(self.extract_btn)
+        actions_inner.addLayout(download_layout)
+
+        extract_layout = QHBoxLayout()
+        extract_layout.addWidget(QLabel("AOI GSD:"))
+        self.extract_gsd_spin = QDoubleSpinBox()
+        self.extract_gsd_spin.setRange(0.0, 100.0)
+        self.extract_gsd_spin.setDecimals(2)
+        self.extract_gsd_spin.setSingleStep(0.5)
+        self.extract_gsd_spin.setSuffix(" m")
+        self.extract_gsd_spin.setSpecialValueText("Native")
+        self.extract_gsd_spin.setToolTip("Output resolution; the matching COG overview is read")
+        self.extract_gsd_spin.setValue(self.settings.value("MaxarOpenData/extract_gsd", 0.0, type=float))
+        self.extract_gsd_spin.valueChanged.connect(
+            lambda value: self.settings.setValue("MaxarOpenData/extract_gsd", value)
+        )
+        extract_layout.addWidget(self.extract_gsd_spin, 1)
+        actions_inner.addLayout(extract_layout)
+
+        download_progress_layout = QHBoxLayout()
+        self.download_progress = QProgressBar()
+        self.download_progress.setVisible(False)
+        download_progress_layout.addWidget(self.download_progress)
+        self.cancel_download_btn = QPushButton("Stop")
+        self.cancel_download_btn.setToolTip("Pause the downloads (partial files are kept)")
+        self.cancel_download_btn.clicked.connect(self._cancel_downloads)
+        self.cancel_download_btn.setVisible(False)
+        download_progress_layout.addWidget(self.cancel_download_btn)
+        actions_inner.addLayout(download_progress_layout)
+
+        # Avanzamento caricamento immagini (in background) + annulla
+        imagery_progress_layout = QHBoxLayout()
+        self.imagery_progress = QProgressBar()
+        self.imagery_progress.setVisible(False)
+        imagery_progress_layout.addWidget(self.imagery_progress)
+        self.cancel_imagery_btn = QPushButton("Cancel")
+        self.cancel_imagery_btn.setToolTip("Stop loading the remaining imagery")
+        self.cancel_imagery_btn.clicked.connect(self._cancel_imagery)
+        self.cancel_imagery_btn.setVisible(False)
+        imagery_progress_layout.addWidget(self.cancel_imagery_btn)
+        actions_inner.addLayout(imagery_progress_layout)
+
         # Clear layers button
         self.clear_btn = QPushButton("Clear All Layers")
         self.clear_btn.clicked.connect(self._clear_layers)
         actions_inner.addWidget(self.clear_btn)
 
         actions_layout.addWidget(actions_group)
+
+        # Coppie pre/post evento sullo stesso terreno
+        pairs_group = QGroupBox("Pre/Post Pairs")
+        pairs_group.setStyleSheet("QGroupBox { color: #ffffff; font-weight: bold; }")
+        pairs_inner = QVBoxLayout(pairs_group)
+        pairs_options = QHBoxLayout()
+        pairs_options.addWidget(QLabel("Compare with:"))
+        self.pair_event_combo = QComboBox()
+        self.pair_event_combo.addItem("Same event", None)
+        self.pair_event_combo.setToolTip(
+            "Pair the footprints of the loaded event among themselves or with another event "
+            "(loaded before or saved as snapshot)"
+        )
+        pairs_options.addWidget(self.pair_event_combo, 1)
+        self.pair_days_spin = QSpinBox()
+        self.pair_days_spin.setRange(0, 3650)
+        self.pair_days_spin.setSuffix(" d")
+        self.pair_days_spin.setSpecialValueText("Any gap")
+        self.pair_days_spin.setToolTip("Maximum time between the two acquisitions")
+        pairs_options.addWidget(self.pair_days_spin)
+        self.find_pairs_btn = QPushButton("Find Pairs")
+        self.find_pairs_btn.setToolTip(
+            "Before/after pairs over the same tiles, ranked by time gap and cloud cover; "
+            "with the date filter on, the start date splits before from after"
+        )
+        self.find_pairs_btn.clicked.connect(self._find_pairs)
+        pairs_options.addWidget(self.find_pairs_btn)
+        pairs_inner.addLayout(pairs_options)
+        self.pairs_table = QTableWidget()
+        self.pairs_table.setColumnCount(5)
+        self.pairs_table.setHorizontalHeaderLabels(["Before", "After", "Gap (d)", "Cloud %", "Match"])
+        self.pairs_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.pairs_table.horizontalHeader().setStretchLastSection(True)
+        self.pairs_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.pairs_table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.pairs_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.pairs_table.cellDoubleClicked.connect(lambda row, _: self._load_pair(row))
+        self.pairs_table.setVisible(False)
+        pairs_inner.addWidget(self.pairs_table)
+        self.load_pair_btn = QPushButton("Load Pair")
+        self.load_pair_btn.setToolTip("Load the visual imagery of both footprints of the selected pair")
+        self.load_pair_btn.clicked.connect(lambda: self._load_pair(self.pairs_table.currentRow()))
+        self.load_pair_btn.setVisible(False)
+        pairs_inner.addWidget(self.load_pair_btn)
+        actions_layout.addWidget(pairs_group)
+
+        # Immagini più vicine a un punto, da qualsiasi evento già caricato
+        nearest_group = QGroupBox("Nearest Imagery")
+        nearest_group.setStyleSheet("QGroupBox { color: #ffffff; font-weight: bold; }")
+        nearest_inner = QVBoxLayout(nearest_group)
+        nearest_options = QHBoxLayout()
+        self.nearest_edit = QLineEdit()
+        self.nearest_edit.setPlaceholderText("lat, lon (empty: map centre)")
+        self.nearest_edit.returnPressed.connect(self._find_nearest)
+        nearest_options.addWidget(self.nearest_edit, 1)
+        self.nearest_k_spin = QSpinBox()
+        self.nearest_k_spin.setRange(1, 100)
+        self.nearest_k_spin.setValue(10)
+        self.nearest_k_spin.setToolTip("Number of footprints")
+        nearest_options.addWidget(self.nearest_k_spin)
+        self.find_nearest_btn = QPushButton("Find Nearest")
+        self.find_nearest_btn.setToolTip(
+            "Nearest (then newest) footprints of every event loaded, cached or saved as snapshot, "
+            "with the cloud and date filters; double-click a row to open the event"
+        )
+        self.find_nearest_btn.clicked.connect(self._find_nearest)
+        nearest_options.addWidget(self.find_nearest_btn)
+        nearest_inner.addLayout(nearest_options)
+        self.nearest_table = QTableWidget()
+        self.nearest_table.setColumnCount(6)
+        self.nearest_table.setHorizontalHeaderLabels(["Event", "Date", "Distance (km)", "Cloud %", "Catalog ID", "Quadkey"])
+        self.nearest_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.nearest_table.horizontalHeader().setStretchLastSection(True)
+        self.nearest_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.nearest_table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.nearest_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.nearest_table.cellDoubleClicked.connect(lambda row, _: self._jump_to_nearest(row))
+        self.nearest_table.setVisible(False)
+        nearest_inner.addWidget(self.nearest_table)
+        actions_layout.addWidget(nearest_group)
         splitter.addWidget(actions_widget)
 
         # Set splitter sizes
@@ -667,6 +1036,10 @@ class MaxarDockWidget(QDockWidget):
         self.event_combo.addItem("-- Seleziona un evento --", None)
         for event_name, count in self.events:
             self.event_combo.addItem(f"{event_name} ({count} tiles)", event_name)
+        self.pair_event_combo.clear()
+        self.pair_event_combo.addItem("Same event", None)
+        for event_name, _ in self.events:
+            self.pair_event_combo.addItem(event_name, event_name)
 
         self.status_label.setText(f"Caricati {len(self.events)} eventi")
         self.status_label.setStyleSheet("color: #00ffbf; font-size: 10px;")
@@ -690,7 +1063,7 @@ class MaxarDockWidget(QDockWidget):
         event_name = self.event_combo.currentData()
         self.load_footprints_btn.setEnabled(event_name is not None)
         self.apply_filters_btn.setEnabled(True)
-        self.footprints_layer = None  # Reset layer quando cambi evento
+        # Il layer footprints resta valido fino al caricamento del nuovo evento
         if event_name:
             self.status_label.setText(f"Selezionato: {self.event_combo.currentText()}")
             self.status_label.setStyleSheet("color: gray; font-size: 10px;")
@@ -718,6 +1091,18 @@ class MaxarDockWidget(QDockWidget):
         if not event_name:
             return
 
+        # Evento già in memoria: nessun fetch, parse o costruzione del layer
+        self._configure_event_cache()
+        cached = self.event_cache.get(event_name)
+        if cached is not None:
+            self._loading_event = event_name
+            self._footprints_worker = None
+            self._show_footprints(cached.store, cached=cached)
+            self.status_label.setText(f"Caricati {len(cached.store)} footprints (cache)")
+            self.status_label.setStyleSheet("color: #00ffbf; font-size: 10px;")
+            get_logger().info(f"Event cache hit for {event_name}; {self.event_cache.stats_text()}")
+            return
+
         self.load_footprints_btn.setEnabled(False)
         self.progress_bar.setVisible(True)
         self.progress_bar.setRange(0, 0)
@@ -727,6 +1112,22 @@ class MaxarDockWidget(QDockWidget):
         # Costruisci URL GeoJSON
         url = GEOJSON_URL_TEMPLATE.format(event=event_name)
         get_logger().info(f"Loading footprints from: {url}")
+        self._loading_event = event_name
+        self._loading_url = url
+        self._footprints_worker = None
+        
+        # Snapshot binario: mostra subito i dati (solo mmap) e rivalida in background
+        headers = {}
+        snapshot = self._open_snapshot(event_name)
+        if snapshot is not None:
+            self.progress_bar.setVisible(False)
+            self.load_footprints_btn.setEnabled(True)
+            self._show_footprints(FootprintStore.from_snapshot(snapshot, event=event_name))
+            self.status_label.setText(f"Caricati {len(snapshot)} footprints (snapshot locale)")
+            self.status_label.setStyleSheet("color: #00ffbf; font-size: 10px;")
+            if not snapshot.etag:
+                return
+            headers["If-None-Match"] = snapshot.etag
         
         # Ottieni timeout dalle impostazioni (default 180 secondi per i GeoJSON grandi)
         timeout = self.settings.value("MaxarOpenData/timeout", 180, type=int)
@@ -736,10 +1137,24 @@ class MaxarDockWidget(QDockWidget):
             timeout = 180
             get_logger().info(f"Migrated old timeout (30s) to new default for footprints (180s)")
         
-        self.fetch_worker = DataFetchWorker(url, data_type="json", timeout=timeout)
-        self.fetch_worker.finished.connect(self._on_footprints_loaded)
-        self.fetch_worker.error.connect(self._on_footprints_error)
-        self.fetch_worker.start()
+        worker = DataFetchWorker(url, data_type="json", timeout=timeout, headers=headers)
+        worker.event = event_name
+        # Il worker è legato allo slot: un risultato arrivato dopo il cambio di
+        # evento viene riconosciuto e scartato
+        worker.finished.connect(functools.partial(self._on_footprints_loaded, worker))
+        worker.error.connect(functools.partial(self._on_footprints_error, worker))
+        self._fetch_workers.add(worker)
+        self._footprints_worker = worker
+        worker.start()
+
+    def _release_fetch_worker(self, worker):
+        """Fine di un fetch footprints: attende l'uscita del thread e rilascia il riferimento."""
+        worker.wait()
+        self._fetch_workers.discard(worker)
+
+    def _is_current_fetch(self, worker):
+        """True se ``worker`` è il fetch footprints dell'evento richiesto per ultimo."""
+        return worker is self._footprints_worker and worker.event == self._loading_event
 
     def _apply_current_filters(self):
         """Applica i filtri selezionati alla tabella dei footprints."""
@@ -750,9 +1165,8 @@ class MaxarDockWidget(QDockWidget):
 
         filtered = []
         for feat in self.all_features:
-            props = feat.get("properties", {})
-            cloud = props.get("cloud_cover", 0)
-            date_str = props.get("datetime", "")
+            cloud = feat.cloud_cover
+            date_str = feat.datetime
             try:
                 from datetime import datetime
                 date = datetime.fromisoformat(date_str.replace("Z", "+00:00")).date() if date_str else None
@@ -769,6 +1183,9 @@ class MaxarDockWidget(QDockWidget):
         self._populate_footprints_table(filtered)
         self.status_label.setText(f"Filtrati {len(filtered)} footprints")
         self.status_label.setStyleSheet("color: #00ffbf; font-size: 10px;")
+        if self._coverage is not None and self._coverage["event"] == self._shown_event:
+            # Analisi attiva: aggiorna solo i footprints entrati/usciti dal filtro
+            self._run_coverage()
 
     def _on_footprint_selection_changed(self):
         """Gestisce la selezione delle righe nella tabella footprints."""
@@ -781,21 +1198,18 @@ class MaxarDockWidget(QDockWidget):
         self.load_visual_btn.setEnabled(has_selection)
         self.load_ms_btn.setEnabled(has_selection)
         self.load_pan_btn.setEnabled(has_selection)
+        self.load_pansharpened_btn.setEnabled(has_selection)
         self.select_from_map_btn.setEnabled(self.footprints_layer is not None)
         self.status_label.setText(f"Selezionati {len(selected)//self.footprints_table.columnCount()} footprints")
         self.status_label.setStyleSheet("color: #00ffbf; font-size: 10px;")
         
         # Sincronizza selezione → layer
         if self.footprints_layer:
-            selected_rows = set(idx.row() for idx in self.footprints_table.selectedIndexes())
             selected_fids = []
-            for row in selected_rows:
-                quadkey_item = self.footprints_table.item(row, 5)
-                if quadkey_item:
-                    quadkey = quadkey_item.text()
-                    fid = self._quadkey_to_feature_id.get(quadkey)
-                    if fid is not None:
-                        selected_fids.append(fid)
+            for record in self._selected_records():
+                fid = self._index_to_feature_id.get(record.index)
+                if fid is not None:
+                    selected_fids.append(fid)
             
             self._updating_selection = True
             self.footprints_layer.selectByIds(selected_fids)
@@ -811,50 +1225,101 @@ class MaxarDockWidget(QDockWidget):
             # Ottieni gli ID delle feature selezionate
             selected_fids = self.footprints_layer.selectedFeatureIds()
             
-            # Converti in quadkeys
-            selected_quadkeys = set()
+            # Converti in indici dei record
+            selected_indices = set()
             for fid in selected_fids:
-                quadkey = self._feature_id_to_quadkey.get(fid)
-                if quadkey:
-                    selected_quadkeys.add(quadkey)
+                index = self._feature_id_to_index.get(fid)
+                if index is not None:
+                    selected_indices.add(index)
             
             # Seleziona le righe corrispondenti nella tabella
             self.footprints_table.clearSelection()
             for row in range(self.footprints_table.rowCount()):
-                quadkey_item = self.footprints_table.item(row, 5)
-                if quadkey_item and quadkey_item.text() in selected_quadkeys:
+                if self._row_index(row) in selected_indices:
                     self.footprints_table.selectRow(row)
         finally:
             self._updating_selection = False
 
+    def _row_index(self, row):
+        """Indice del FootprintRecord mostrato in una riga (sort/filter-safe)."""
+        item = self.footprints_table.item(row, 0)
+        return item.data(Qt.UserRole) if item is not None else None
+
+    def _selected_records(self):
+        """FootprintRecord delle righe selezionate nella tabella."""
+        rows = set(idx.row() for idx in self.footprints_table.selectedIndexes())
+        records = []
+        for row in sorted(rows):
+            index = self._row_index(row)
+            if index is not None and index < len(self.all_features):
+                records.append(self.all_features[index])
+        return records
+
     def _populate_footprints_table(self, features):
-        """Popola la tabella footprints con le feature fornite."""
+        """Popola la tabella footprints con i FootprintRecord forniti."""
         self.footprints_table.setRowCount(0)
         for feat in features:
-            props = feat.get("properties", {})
             row = self.footprints_table.rowCount()
             self.footprints_table.insertRow(row)
-            # Data
-            self.footprints_table.setItem(row, 0, QTableWidgetItem(props.get("datetime", "")))
+            # Data (porta anche l'indice del record)
+            date_item = QTableWidgetItem(feat.datetime)
+            date_item.setData(Qt.UserRole, feat.index)
+            self.footprints_table.setItem(row, 0, date_item)
             # Platform
-            self.footprints_table.setItem(row, 1, QTableWidgetItem(props.get("platform", "")))
+            self.footprints_table.setItem(row, 1, QTableWidgetItem(feat.platform))
             # GSD
-            gsd = props.get("gsd", "")
+            gsd = feat.gsd
             self.footprints_table.setItem(row, 2, NumericTableWidgetItem(str(gsd) if gsd is not None else ""))
             # Cloud cover
-            cloud = props.get("cloud_cover", "")
+            cloud = feat.cloud_cover
             self.footprints_table.setItem(row, 3, NumericTableWidgetItem(str(cloud) if cloud is not None else ""))
             # Catalog ID
-            self.footprints_table.setItem(row, 4, QTableWidgetItem(props.get("catalog_id", "")))
+            self.footprints_table.setItem(row, 4, QTableWidgetItem(feat.catalog_id))
             # Quadkey
-            self.footprints_table.setItem(row, 5, QTableWidgetItem(props.get("quadkey", "")))
+            self.footprints_table.setItem(row, 5, QTableWidgetItem(feat.quadkey))
 
-    def _on_footprints_loaded(self, geojson_data):
+    def _open_snapshot(self, event_name):
+        """Apre lo snapshot binario dell'evento, se presente (None altrimenti)."""
+        if self.snapshot_store is None:
+            return None
+        try:
+            snapshot = self.snapshot_store.open(event_name)
+        except Exception as e:
+            get_logger().warning(f"Cannot open snapshot for {event_name}: {e}")
+            return None
+        if snapshot is not None:
+            get_logger().info(f"Snapshot hit for {event_name}: {snapshot.path} (ETag {snapshot.etag})")
+        return snapshot
+
+    def _save_snapshot(self, event_name, features, store, etag):
+        """Scrive lo snapshot binario dopo il primo parse del GeoJSON."""
+        if self.snapshot_store is None or not event_name or not features:
+            return
+        try:
+            path = self.snapshot_store.save(
+                event_name, features, etag=etag, source=self._loading_url, rings=store.rings
+            )
+            get_logger().info(f"Snapshot written for {event_name}: {path}")
+        except Exception as e:
+            get_logger().warning(f"Cannot write snapshot for {event_name}: {e}", exc_info=True)
+
+    def _on_footprints_loaded(self, worker, geojson_data):
         """Gestisce il caricamento dei footprints da GitHub GeoJSON."""
+        self._release_fetch_worker(worker)
+        if not self._is_current_fetch(worker):
+            # Nel frattempo è stato richiesto un altro evento (cache, snapshot o rete)
+            get_logger().info(f"Ignoring stale footprints for {worker.event}")
+            return
+        self._footprints_worker = None
         self.progress_bar.setVisible(False)
         self.load_footprints_btn.setEnabled(True)
         self.apply_filters_btn.setEnabled(True)
         
+        if worker.not_modified:
+            # 304: lo snapshot già mostrato è aggiornato
+            get_logger().info(f"Snapshot for {worker.event} is up to date")
+            return
+        
         # Parse JSON string to dict
         try:
             geojson_dict = json.loads(geojson_data) if isinstance(geojson_data, str) else geojson_data
@@ -864,111 +1329,56 @@ class MaxarDockWidget(QDockWidget):
             self.status_label.setStyleSheet("color: red; font-size: 10px;")
             return
         
-        self.current_geojson = geojson_dict
         features = geojson_dict.get("features", [])
         
-        self.all_features = features
+        # Record compatti + geometrie quantizzate; l'albero GeoJSON viene rilasciato
+        store = FootprintStore.from_features(features, event=worker.event)
+        self._save_snapshot(worker.event, features, store, worker.etag)
+        del geojson_dict, features
+        self._show_footprints(store)
+
+    def _show_footprints(self, store, cached=None):
+        """Popola tabella e layer footprints da un FootprintStore (GeoJSON, snapshot o cache)."""
+        event_name = store.event or self._loading_event
+        self.store = store
+        self.all_features = features = store.records
         self._populate_footprints_table(features)
         self.status_label.setText(f"Caricati {len(features)} footprints")
         self.status_label.setStyleSheet("color: #00ffbf; font-size: 10px;")
-        
+
+        # Indice spaziale (riutilizzato dalla cache se presente)
+        index = cached.index if cached is not None else None
+        if index is None and SpatialIndex is not None and features:
+            try:
+                index = SpatialIndex.from_store(store)
+            except Exception as e:
+                get_logger().warning(f"Cannot build spatial index for {event_name}: {e}")
+        self.spatial_index = index
+
         # Crea il layer footprints (se serve per selezione da mappa)
         if features:
-            # Crea un layer temporaneo per la selezione da mappa
-            from qgis.core import (
-                QgsVectorLayer, QgsProject, QgsFeature, QgsGeometry, 
-                QgsFields, QgsField, QgsPointXY
-            )
-            from qgis.PyQt.QtCore import QVariant
-
-            # Crea un layer temporaneo per footprints
-            layer = QgsVectorLayer("Polygon?crs=EPSG:4326", "Footprints", "memory")
-            pr = layer.dataProvider()
-
-            # Definisci i campi
-            fields = QgsFields()
-            fields.append(QgsField("datetime", QVariant.String))
-            fields.append(QgsField("platform", QVariant.String))
-            fields.append(QgsField("gsd", QVariant.Double))
-            fields.append(QgsField("cloud_cover", QVariant.Double))
-            fields.append(QgsField("catalog_id", QVariant.String))
-            fields.append(QgsField("quadkey", QVariant.String))
-            pr.addAttributes(fields)
-            layer.updateFields()
-
-            self._feature_id_to_quadkey = {}
-            self._quadkey_to_feature_id = {}
-
-            for feat in features:
-                props = feat.get("properties", {})
-                geom = feat.get("geometry", {})
-                qgs_geom = None
-                
-                if geom and geom.get("type") == "Polygon":
-                    # Coordinates format: [[[lon, lat], [lon, lat], ...]]
-                    coords = geom.get("coordinates", [])
-                    if coords and len(coords) > 0:
-                        # Outer ring
-                        points = [QgsPointXY(pt[0], pt[1]) for pt in coords[0]]
-                        qgs_geom = QgsGeometry.fromPolygonXY([points])
-                        
-                elif geom and geom.get("type") == "MultiPolygon":
-                    # Coordinates format: [[[[lon, lat], [lon, lat], ...]], ...]
-                    coords = geom.get("coordinates", [])
-                    polygons = []
-                    for polygon in coords:
-                        if polygon and len(polygon) > 0:
-                            # Outer ring of each polygon
-                            points = [QgsPointXY(pt[0], pt[1]) for pt in polygon[0]]
-                            polygons.append([points])
-                    if polygons:
-                        qgs_geom = QgsGeometry.fromMultiPolygonXY(polygons)
-
-                if qgs_geom:
-                    feature = QgsFeature(fields)  # Inizializza con i campi
-                    feature.setGeometry(qgs_geom)
-                    
-                    # Imposta i valori dei campi usando gli indici
-                    feature.setAttribute("datetime", props.get("datetime", ""))
-                    feature.setAttribute("platform", props.get("platform", ""))
-                    feature.setAttribute("gsd", props.get("gsd", 0.0))
-                    feature.setAttribute("cloud_cover", props.get("cloud_cover", 0.0))
-                    feature.setAttribute("catalog_id", props.get("catalog_id", ""))
-                    feature.setAttribute("quadkey", props.get("quadkey", ""))
-                    
-                    pr.addFeature(feature)
+            from qgis.core import QgsProject
 
-                    # Mappa gli ID delle feature ai quadkey (per selezione da mappa)
-                    fid = feature.id()
-                    quadkey = props.get("quadkey")
-                    if quadkey:
-                        self._feature_id_to_quadkey[fid] = quadkey
-                        self._quadkey_to_feature_id[quadkey] = fid
+            layer = cached.layer if cached is not None else None
+            if layer is not None:
+                # Layer nascosto della cache: nessuna ricostruzione delle geometrie
+                self._index_to_feature_id = dict(cached.feature_ids)
+                self._feature_id_to_index = {fid: index for index, fid in cached.feature_ids.items()}
+            else:
+                layer = self._build_footprints_layer(store)
 
-            # Update layer extent
-            layer.updateExtents()
-            
-            # Apply styling to layer
-            from qgis.core import QgsSimpleFillSymbolLayer, QgsFillSymbol
-            from qgis.PyQt.QtGui import QColor
-            
-            symbol = QgsFillSymbol.createSimple({
-                'color': '0,255,191,50',  # Semi-transparent cyan
-                'outline_color': '0,255,191,255',  # Solid cyan border
-                'outline_width': '0.5'
-            })
-            layer.renderer().setSymbol(symbol)
-            
-            # Rimuovi layer precedente se esiste
-            existing_layers = QgsProject.instance().mapLayersByName("Footprints")
-            for existing_layer in existing_layers:
-                QgsProject.instance().removeMapLayer(existing_layer.id())
+            # Rimuovi (o metti in cache) il layer precedente
+            self._detach_footprints_layer()
+            stale = [lid for lid in self.layer_registry.layer_ids("footprints") if lid != layer.id()]
+            if stale:
+                QgsProject.instance().removeMapLayers(stale)
             
             # Invalida selection tool perché il vecchio layer è stato rimosso
             if self.selection_tool is not None:
                 self.selection_tool = None
             
             # Aggiungi il nuovo layer al progetto
+            LayerRegistry.tag(layer, event_name, "footprints")
             QgsProject.instance().addMapLayer(layer)
             
             # Connetti selezione layer → tabella
@@ -1005,10 +1415,176 @@ class MaxarDockWidget(QDockWidget):
             get_logger().info(f"Footprints layer created with {len(features)} features")
             get_logger().debug(f"Layer extent: {layer.extent().toString()}")
         else:
+            self._detach_footprints_layer()
             get_logger().warning("No features found in GeoJSON")
 
-    def _on_footprints_error(self, error_msg):
+        if event_name != self._shown_event:
+            # La copertura si riferisce ai record dell'evento precedente
+            self._coverage = None
+            if self.coverage_worker is not None:
+                self.coverage_worker.cancel()
+        self._shown_event = event_name
+        if self.global_index is not None and event_name and self.global_index.version(event_name) != id(store):
+            try:
+                self.global_index.add_store(event_name, store, version=id(store))
+            except Exception as e:
+                get_logger().warning(f"Cannot index {event_name} for nearest queries: {e}")
+        if self._pending_selection is not None and self._pending_selection[0] == event_name:
+            # Arrivati da "Nearest Imagery": seleziona le righe trovate
+            indices = self._pending_selection[1]
+            self._pending_selection = None
+            self._select_indices(indices)
+            self._zoom_to_selected()
+        keep_layer = self.settings.value("MaxarOpenData/event_cache_layers", True, type=bool)
+        if event_name and (cached is None or (keep_layer and cached.layer is None)):
+            self.event_cache.put(
+                event_name, store, index,
+                layer=self.footprints_layer if keep_layer else None,
+                feature_ids=self._index_to_feature_id if keep_layer else None,
+            )
+            get_logger().debug(f"Event cache: {self.event_cache.stats_text()}")
+
+    def _build_footprints_layer(self, store):
+        """Crea il memory layer dei footprints e le mappe feature id ↔ indice record."""
+        from qgis.core import (
+            QgsVectorLayer, QgsFeature, QgsGeometry,
+            QgsFields, QgsField, QgsPointXY
+        )
+        from qgis.PyQt.QtCore import QVariant
+
+        features = store.records
+        geometries = store.rings
+
+        # Crea un layer temporaneo per footprints
+        layer = QgsVectorLayer("Polygon?crs=EPSG:4326", "Footprints", "memory")
+        pr = layer.dataProvider()
+
+        # Definisci i campi
+        fields = QgsFields()
+        fields.append(QgsField("datetime", QVariant.String))
+        fields.append(QgsField("platform", QVariant.String))
+        fields.append(QgsField("gsd", QVariant.Double))
+        fields.append(QgsField("cloud_cover", QVariant.Double))
+        fields.append(QgsField("catalog_id", QVariant.String))
+        fields.append(QgsField("quadkey", QVariant.String))
+        pr.addAttributes(fields)
+        layer.updateFields()
+
+        self._feature_id_to_index = {}
+        self._index_to_feature_id = {}
+
+        for feat in features:
+            index = feat.index
+            qgs_geom = None
+            
+            # Decodifica lazy dagli anelli quantizzati (solo anello esterno)
+            polygons = [
+                [[QgsPointXY(x, y) for x, y in rings[0]]]
+                for rings in geometries.polygons(index) if rings
+            ]
+            if polygons and geometries.geom_type(index) == GEOM_POLYGON:
+                qgs_geom = QgsGeometry.fromPolygonXY(polygons[0])
+            elif polygons:
+                qgs_geom = QgsGeometry.fromMultiPolygonXY(polygons)
+
+            if qgs_geom:
+                feature = QgsFeature(fields)  # Inizializza con i campi
+                feature.setGeometry(qgs_geom)
+                
+                # Imposta i valori dei campi usando gli indici
+                feature.setAttribute("datetime", feat.datetime)
+                feature.setAttribute("platform", feat.platform)
+                feature.setAttribute("gsd", feat.gsd if feat.gsd is not None else 0.0)
+                feature.setAttribute("cloud_cover", feat.cloud_cover if feat.cloud_cover is not None else 0.0)
+                feature.setAttribute("catalog_id", feat.catalog_id)
+                feature.setAttribute("quadkey", feat.quadkey)
+                
+                pr.addFeature(feature)
+
+                # Mappa gli ID delle feature agli indici dei record (per selezione da mappa)
+                fid = feature.id()
+                self._feature_id_to_index[fid] = index
+                self._index_to_feature_id[index] = fid
+
+        # Update layer extent
+        layer.updateExtents()
+        
+        # Apply styling to layer
+        from qgis.core import QgsFillSymbol
+        
+        symbol = QgsFillSymbol.createSimple({
+            'color': '0,255,191,50',  # Semi-transparent cyan
+            'outline_color': '0,255,191,255',  # Solid cyan border
+            'outline_width': '0.5'
+        })
+        layer.renderer().setSymbol(symbol)
+
+        # Se l'utente rimuove il layer, la cache non deve più riusarlo
+        layer_id = layer.id()
+        layer.willBeDeleted.connect(lambda: self._on_footprints_layer_deleted(layer_id))
+        return layer
+
+    def _detach_footprints_layer(self):
+        """Toglie dal progetto il layer footprints corrente.
+
+        Se il layer è nella cache eventi viene solo estratto dal progetto
+        (takeMapLayer) e resta vivo, nascosto, per un ritorno istantaneo
+        all'evento; altrimenti viene rimosso.
+        """
+        from qgis.core import QgsProject
+
+        layer = self.footprints_layer
+        self.footprints_layer = None
+        if layer is None:
+            return
+        try:
+            layer.selectionChanged.disconnect(self._on_layer_selection_changed)
+        except Exception:
+            pass
+        entry = self.event_cache.peek(self._shown_event)
+        try:
+            if entry is not None and entry.layer is layer:
+                QgsProject.instance().takeMapLayer(layer)
+            else:
+                QgsProject.instance().removeMapLayer(layer.id())
+        except RuntimeError:
+            # Layer già eliminato dall'utente
+            if entry is not None:
+                entry.drop_layer()
+
+    def _on_footprints_layer_deleted(self, layer_id):
+        """Il layer footprints sta per essere distrutto: dimentica i riferimenti."""
+        entry = self.event_cache.find_layer(layer_id)
+        if entry is not None:
+            entry.drop_layer()
+        try:
+            current_id = self.footprints_layer.id() if self.footprints_layer is not None else None
+        except RuntimeError:
+            current_id = layer_id
+        if current_id == layer_id:
+            self.footprints_layer = None
+            self.selection_tool = None
+
+    def _configure_event_cache(self):
+        """Applica i limiti della cache eventi dalle impostazioni."""
+        max_entries = self.settings.value("MaxarOpenData/event_cache_size", DEFAULT_MAX_ENTRIES, type=int)
+        max_mb = self.settings.value("MaxarOpenData/event_cache_mb", DEFAULT_MAX_MB, type=int)
+        self.event_cache.resize(max_entries=max_entries, max_bytes=max_mb * 1024 * 1024)
+
+    def _on_footprints_error(self, worker, error_msg):
         """Gestisce errori nel caricamento footprints."""
+        self._release_fetch_worker(worker)
+        if not self._is_current_fetch(worker):
+            get_logger().info(f"Ignoring error of stale footprints fetch for {worker.event}: {error_msg}")
+            return
+        self._footprints_worker = None
+        if "If-None-Match" in worker.headers:
+            # Rivalidazione dello snapshot già mostrato (offline, timeout):
+            # i dati in tabella restano validi, nessun errore bloccante
+            get_logger().warning(f"Cannot revalidate snapshot of {worker.event}: {error_msg}")
+            self.status_label.setText(f"Snapshot locale di {worker.event} (aggiornamento non verificato)")
+            self.status_label.setStyleSheet("color: orange; font-size: 10px;")
+            return
         self.progress_bar.setVisible(False)
         self.load_footprints_btn.setEnabled(True)
         self.apply_filters_btn.setEnabled(False)
@@ -1037,6 +1613,553 @@ class MaxarDockWidget(QDockWidget):
                 self.iface.mapCanvas().setMapTool(self._previous_map_tool)
                 self.status_label.setText("Modalità selezione da mappa disattivata")
 
+    def _table_indices(self):
+        """Indici dei record mostrati in tabella (dopo i filtri)."""
+        indices = (self._row_index(row) for row in range(self.footprints_table.rowCount()))
+        return [index for index in indices if index is not None]
+
+    def _select_indices(self, indices):
+        """Seleziona in tabella (e quindi nel layer) i record indicati."""
+        from qgis.PyQt.QtCore import QItemSelection, QItemSelectionModel
+
+        wanted = set(indices)
+        model = self.footprints_table.selectionModel()
+        selection = QItemSelection()
+        for row in range(self.footprints_table.rowCount()):
+            if self._row_index(row) in wanted:
+                index = self.footprints_table.model().index(row, 0)
+                selection.select(index, index)
+        model.select(selection, QItemSelectionModel.ClearAndSelect | QItemSelectionModel.Rows)
+
+    def _coverage_aoi(self):
+        """AOI in WGS84: (bbox, poligoni o None, descrizione).
+
+        Poligoni selezionati nel layer attivo se ce ne sono, altrimenti la vista.
+        """
+        from qgis.core import QgsGeometry, QgsWkbTypes
+
+        wgs84 = QgsCoordinateReferenceSystem("EPSG:4326")
+        layer = self.iface.activeLayer()
+        if (
+            isinstance(layer, QgsVectorLayer) and layer is not self.footprints_layer
+            and layer.geometryType() == QgsWkbTypes.PolygonGeometry and layer.selectedFeatureCount()
+        ):
+            geometry = QgsGeometry.unaryUnion([f.geometry() for f in layer.selectedFeatures()])
+            geometry.transform(QgsCoordinateTransform(layer.crs(), wgs84, QgsProject.instance()))
+            parts = geometry.asMultiPolygon() if geometry.isMultipart() else [geometry.asPolygon()]
+            polygons = [[[(p.x(), p.y()) for p in ring] for ring in part] for part in parts]
+            box = geometry.boundingBox()
+            label = f"{layer.selectedFeatureCount()} poligoni di {layer.name()}"
+        else:
+            canvas = self.iface.mapCanvas()
+            transform = QgsCoordinateTransform(canvas.mapSettings().destinationCrs(), wgs84, QgsProject.instance())
+            box = transform.transformBoundingBox(canvas.extent())
+            polygons = None
+            label = "vista corrente"
+        return (box.xMinimum(), box.yMinimum(), box.xMaximum(), box.yMaximum()), polygons, label
+
+    def _footprint_polygons(self, index):
+        """Poligoni WGS84 di un record (bbox del quadkey se manca la geometria)."""
+        return self._polygons_of(self.store, self.spatial_index, index)
+
+    @staticmethod
+    def _polygons_of(store, spatial_index, index):
+        """Come ``_footprint_polygons`` su uno store e un indice dati (uso nei worker)."""
+        polygons = store.rings.polygons(index)
+        if polygons:
+            return polygons
+        x0, y0, x1, y1 = spatial_index.bounds[index]
+        if x0 != x0:  # NaN
+            return []
+        return [[[(x0, y0), (x1, y0), (x1, y1), (x0, y1), (x0, y0)]]]
+
+    def _select_best_coverage(self):
+        """Seleziona un insieme quasi minimo di footprints che copre l'AOI
+        (set cover pesato greedy sui footprints filtrati)."""
+        if coverage is None or self.spatial_index is None or not len(self.store):
+            QMessageBox.warning(self, "Copertura", "Carica prima i footprints di un evento.")
+            return
+        try:
+            bbox, polygons, label = self._coverage_aoi()
+        except Exception as e:
+            get_logger().error(f"Cannot compute the AOI: {e}", exc_info=True)
+            return
+        shown = set(self._table_indices())
+        candidates = [int(i) for i in self.spatial_index.query(bbox) if int(i) in shown]
+        if not candidates:
+            self.status_label.setText(f"Nessun footprint filtrato interseca {label}")
+            self.status_label.setStyleSheet("color: orange; font-size: 10px;")
+            return
+
+        grid = coverage.AoiGrid(bbox, polygons)
+        cells = [grid.cells(self._footprint_polygons(i)) for i in candidates]
+        event_date = self.start_date_edit.date().toPyDate() if self.date_check.isChecked() else None
+        prefer = self.cover_prefer_combo.currentData()
+        costs = coverage.cover_costs([self.all_features[i] for i in candidates], prefer, event_date)
+        chosen, uncovered = coverage.greedy_cover(cells, costs, grid.size, grid.mask)
+
+        self._select_indices(candidates[i] for i in chosen)
+        total = grid.mask.sum()
+        covered = 100.0 * (1 - uncovered.sum() / total) if total else 0.0
+        self.status_label.setText(
+            f"Copertura migliore di {label}: {len(chosen)} di {len(candidates)} footprints, "
+            f"{covered:.1f}% coperto"
+        )
+        self.status_label.setStyleSheet(
+            f"color: {'#00ffbf' if covered >= 99.9 else 'orange'}; font-size: 10px;"
+        )
+
+    def _analyze_coverage(self):
+        """Copertura dell'AOI da parte dei footprints filtrati (in background)."""
+        if coverage is None or self.spatial_index is None or not len(self.store):
+            QMessageBox.warning(self, "Copertura", "Carica prima i footprints di un evento.")
+            return
+        try:
+            bbox, polygons, label = self._coverage_aoi()
+        except Exception as e:
+            get_logger().error(f"Cannot compute the AOI: {e}", exc_info=True)
+            return
+        key = (self._shown_event, bbox, repr(polygons))
+        if self._coverage is None or self._coverage["key"] != key:
+            self._coverage = {
+                "key": key, "event": self._shown_event, "bbox": bbox, "label": label,
+                "engine": coverage.CoverageEngine(coverage.AoiGrid(bbox, polygons)),
+            }
+        self._run_coverage()
+
+    def _run_coverage(self):
+        """Avvia (o riaccoda) l'aggiornamento della copertura attiva."""
+        if self.coverage_worker is not None and self.coverage_worker.isRunning():
+            self._coverage_pending = True
+            self.coverage_worker.cancel()
+            return
+        self._coverage_pending = False
+        shown = set(self._table_indices())
+        indices = [int(i) for i in self.spatial_index.query(self._coverage["bbox"]) if int(i) in shown]
+        # Store e indice legati al job: il worker non legge lo stato del dock,
+        # che _show_footprints può sostituire mentre il calcolo è in corso
+        polygons_of = functools.partial(self._polygons_of, self.store, self.spatial_index)
+        self.coverage_worker = CoverageWorker(self._coverage["engine"], indices, polygons_of)
+        self.coverage_worker.computed.connect(self._on_coverage_computed)
+        self.coverage_worker.finished.connect(self._on_coverage_finished)
+        self.status_label.setText(f"Analisi copertura di {len(indices)} footprints...")
+        self.status_label.setStyleSheet("color: blue; font-size: 10px;")
+        self.coverage_worker.start()
+
+    def _on_coverage_finished(self):
+        if self._coverage_pending and self._coverage is not None:
+            self._run_coverage()
+
+    def _on_coverage_computed(self, stats, gaps):
+        """Riepilogo nella status bar e layer temporaneo dei gap."""
+        if self._coverage_pending:
+            return
+        self._show_coverage_gaps(gaps)
+        label = self._coverage["label"] if self._coverage is not None else "AOI"
+        self.status_label.setText(
+            f"Copertura di {label}: {stats['ratio']:.1%} ({stats['covered_km2']:,.1f} di "
+            f"{stats['aoi_km2']:,.1f} km²), gap {stats['gap_km2']:,.1f} km², "
+            f"sovrapposizione media {stats['mean_depth']:.1f} (max {stats['max_depth']})"
+        )
+        cells = stats["depth_cells"]
+        total = max(sum(cells), 1)
+        self.status_label.setToolTip(
+            f"{stats['footprints']} footprints\n"
+            + "\n".join(
+                f"{name}: {100.0 * n / total:.1f}% dell'AOI"
+                for name, n in zip(("Nessuna immagine", "1 immagine", "2 immagini", "3 o più"), cells)
+            )
+        )
+        self.status_label.setStyleSheet(
+            f"color: {'#00ffbf' if stats['ratio'] >= 0.999 else 'orange'}; font-size: 10px;"
+        )
+
+    def _show_coverage_gaps(self, rectangles):
+        """Sostituisce il layer temporaneo delle aree non coperte."""
+        from qgis.core import QgsGeometry
+
+        project = QgsProject.instance()
+        stale = self.layer_registry.layer_ids("gaps")
+        if stale:
+            project.removeMapLayers(stale)
+        if not rectangles:
+            return
+        layer = QgsVectorLayer("Polygon?crs=EPSG:4326", "Coverage gaps", "memory")
+        feature = QgsFeature()
+        feature.setGeometry(QgsGeometry.unaryUnion([QgsGeometry.fromRect(QgsRectangle(*r)) for r in rectangles]))
+        layer.dataProvider().addFeatures([feature])
+        layer.updateExtents()
+        layer.renderer().setSymbol(QgsFillSymbol.createSimple({
+            'color': '255,64,64,70',
+            'outline_color': '255,64,64,255',
+            'outline_width': '0.4'
+        }))
+        LayerRegistry.tag(layer, self._shown_event, "gaps")
+        project.addMapLayer(layer)
+
+    def _event_store(self, event_name):
+        """FootprintStore di un evento senza mostrarlo: evento corrente, cache o snapshot."""
+        if event_name == self._shown_event:
+            return self.store
+        cached = self.event_cache.peek(event_name)
+        if cached is not None:
+            return cached.store
+        snapshot = self._open_snapshot(event_name)
+        if snapshot is not None:
+            return FootprintStore.from_snapshot(snapshot, event=event_name)
+        return None
+
+    def _find_pairs(self):
+        """Coppie prima/dopo sugli stessi tile (hash join sui quadkey)."""
+        if pairs is None or not len(self.store):
+            QMessageBox.warning(self, "Coppie", "Carica prima i footprints di un evento.")
+            return
+        other_name = self.pair_event_combo.currentData()
+        other = None
+        if other_name and other_name != self._shown_event:
+            other = self._event_store(other_name)
+            if other is None:
+                QMessageBox.warning(
+                    self, "Coppie",
+                    f"I footprints di {other_name} non sono disponibili in locale.\n"
+                    "Caricali una volta con \"Load Footprints\" e riprova.",
+                )
+                return
+        event_date = self.start_date_edit.date().toPyDate() if self.date_check.isChecked() else None
+        found = pairs.find_pairs(
+            self.store, other, event_date=event_date,
+            max_days=self.pair_days_spin.value() or None,
+            max_cloud=self.cloud_slider.value(),
+        )
+        self._pairs = found
+        self._pair_stores = {self.store.event: self.store}
+        if other is not None:
+            self._pair_stores[other.event] = other
+        self._populate_pairs_table(found)
+        where = f"tra {self._shown_event} e {other_name}" if other is not None else f"in {self._shown_event}"
+        self.status_label.setText(f"Trovate {len(found)} coppie {where}")
+        self.status_label.setStyleSheet(f"color: {'#00ffbf' if found else 'orange'}; font-size: 10px;")
+
+    def _populate_pairs_table(self, found):
+        """Una riga per coppia, dalla migliore."""
+        self.pairs_table.setRowCount(0)
+        self.pairs_table.setRowCount(len(found))
+        for row, pair in enumerate(found):
+            sides = ((pair.before, pair.before_event), (pair.after, pair.after_event))
+            for column, (record, event) in enumerate(sides):
+                item = QTableWidgetItem(f"{record.date} {record.catalog_id}")
+                item.setToolTip(f"{event}\n{record.platform} · {record.quadkey} · GSD {record.gsd}")
+                self.pairs_table.setItem(row, column, item)
+            self.pairs_table.setItem(row, 2, NumericTableWidgetItem(str(pair.days)))
+            cloud = f"{pair.cloud:.1f}" if pair.cloud is not None else ""
+            self.pairs_table.setItem(row, 3, NumericTableWidgetItem(cloud))
+            self.pairs_table.setItem(row, 4, QTableWidgetItem(pair.match))
+        self.pairs_table.setVisible(bool(found))
+        self.load_pair_btn.setVisible(bool(found))
+        if found:
+            self.pairs_table.selectRow(0)
+
+    def _load_pair(self, row):
+        """Carica le immagini visual dei due footprints di una coppia."""
+        if not 0 <= row < len(self._pairs):
+            QMessageBox.warning(self, "Nessuna selezione", "Seleziona una coppia dalla tabella.")
+            return
+        pair = self._pairs[row]
+        profile = self._imagery_profile()
+        jobs = []
+        for record, event in ((pair.before, pair.before_event), (pair.after, pair.after_event)):
+            url = record.url("visual")
+            if not url:
+                continue
+            job = CogJob(
+                self._imagery_source(profile, url),
+                f"Maxar visual - {record.catalog_id or 'unknown'} - {record.quadkey} ({record.date})",
+                "gdal", url=url, record_index=record.index, imagery_type="visual",
+                group=self._stretch_group(record, "visual"),
+            )
+            self._place_job(job, self._pair_stores.get(event, self.store))
+            jobs.append(job)
+        if not jobs:
+            QMessageBox.warning(self, "Immagini non disponibili", "Visual non disponibile per questa coppia.")
+            return
+        self._start_cog_jobs(jobs, 2 - len(jobs), "Visual")
+
+    def _poi_points(self):
+        """Punti di interesse in WGS84: (x, y, nomi, descrizione), None se annullato.
+
+        Layer di punti attivo (solo i punti selezionati, se ce ne sono),
+        altrimenti un CSV con colonne lon/lat scelto dall'utente.
+        """
+        from qgis.core import QgsFeatureRequest, QgsWkbTypes
+
+        layer = self.iface.activeLayer()
+        if (
+            isinstance(layer, QgsVectorLayer) and LayerRegistry.key_of(layer) is None
+            and layer.geometryType() == QgsWkbTypes.PointGeometry
+        ):
+            transform = QgsCoordinateTransform(
+                layer.crs(), QgsCoordinateReferenceSystem("EPSG:4326"), QgsProject.instance()
+            )
+            name_field = next((f.name() for f in layer.fields() if f.name().lower() in poi.NAME_COLUMNS), None)
+            request = QgsFeatureRequest()
+            if name_field:
+                request.setSubsetOfAttributes([name_field], layer.fields())
+            else:
+                request.setNoAttributes()
+            selected = layer.selectedFeatureCount()
+            features = layer.getSelectedFeatures(request) if selected else layer.getFeatures(request)
+            xs, ys, names = [], [], []
+            # Un'unica lettura del layer; nessuna query per punto
+            for feature in features:
+                geometry = feature.geometry()
+                if geometry.isEmpty():
+                    continue
+                geometry.transform(transform)
+                name = str(feature[name_field]) if name_field else str(feature.id())
+                for point in geometry.asMultiPoint() if geometry.isMultipart() else [geometry.asPoint()]:
+                    xs.append(point.x())
+                    ys.append(point.y())
+                    names.append(name)
+            label = f"{len(xs)} punti {'selezionati ' if selected else ''}di {layer.name()}"
+            return xs, ys, names, label
+
+        from qgis.PyQt.QtWidgets import QFileDialog
+
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Punti di interesse (CSV con colonne lon/lat)", "", "CSV (*.csv *.txt);;Tutti i file (*)"
+        )
+        if not path:
+            return None
+        x, y, names = poi.read_csv_points(path)
+        return x, y, names, f"{len(x)} punti di {os.path.basename(path)}"
+
+    def _poi_coverage(self):
+        """Footprints filtrati che coprono ogni punto di interesse, e il migliore."""
+        if poi is None or coverage is None or self.spatial_index is None or not len(self.store):
+            QMessageBox.warning(self, "Copertura POI", "Carica prima i footprints di un evento.")
+            return
+        try:
+            points = self._poi_points()
+        except Exception as e:
+            get_logger().error(f"Cannot read the points of interest: {e}", exc_info=True)
+            QMessageBox.warning(self, "Copertura POI", f"Impossibile leggere i punti:\n\n{e}")
+            return
+        if points is None:
+            return
+        x, y, names, label = points
+        if not len(names):
+            self.status_label.setText(f"Nessun punto valido ({label})")
+            self.status_label.setStyleSheet("color: orange; font-size: 10px;")
+            return
+
+        pts, fps = poi.covering(self.spatial_index, x, y, self._footprint_polygons, allowed=self._table_indices())
+        event_date = self.start_date_edit.date().toPyDate() if self.date_check.isChecked() else None
+        costs = coverage.cover_costs(self.all_features, self.cover_prefer_combo.currentData(), event_date)
+        best, counts = poi.best_per_point(pts, fps, costs, len(names))
+        self._show_poi_coverage(x, y, names, pts.tolist(), fps.tolist(), best.tolist(), counts.tolist())
+        covered = sum(1 for n in counts.tolist() if n)
+        self.status_label.setText(
+            f"Copertura POI di {label}: {covered} coperti, {len(names) - covered} senza immagini "
+            f"({len(pts)} footprints abbinati)"
+        )
+        self.status_label.setStyleSheet(
+            f"color: {'#00ffbf' if covered == len(names) else 'orange'}; font-size: 10px;"
+        )
+
+    def _show_poi_coverage(self, x, y, names, pts, fps, best, counts):
+        """Layer di punti (footprint migliore) e tabella punto/footprint."""
+        from qgis.core import QgsField, QgsGeometry, QgsPointXY
+        from qgis.PyQt.QtCore import QVariant
+
+        project = QgsProject.instance()
+        stale = self.layer_registry.layer_ids("poi")
+        if stale:
+            project.removeMapLayers(stale)
+        records = self.all_features
+
+        def attributes(index):
+            if index < 0:
+                return [None] * 6
+            r = records[index]
+            return [r.datetime, r.catalog_id, r.cloud_cover, r.gsd, r.platform, r.quadkey]
+
+        footprint_fields = [
+            QgsField("datetime", QVariant.String), QgsField("catalog_id", QVariant.String),
+            QgsField("cloud_cover", QVariant.Double), QgsField("gsd", QVariant.Double),
+            QgsField("platform", QVariant.String), QgsField("quadkey", QVariant.String),
+        ]
+
+        points_layer = QgsVectorLayer("Point?crs=EPSG:4326", "POI coverage", "memory")
+        points_layer.dataProvider().addAttributes(
+            [QgsField("poi", QVariant.Int), QgsField("name", QVariant.String), QgsField("footprints", QVariant.Int)]
+            + footprint_fields
+        )
+        points_layer.updateFields()
+        features = []
+        for point, (px, py, name, index, count) in enumerate(zip(x, y, names, best, counts)):
+            feature = QgsFeature(points_layer.fields())
+            feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(float(px), float(py))))
+            feature.setAttributes([point, name, count] + attributes(index))
+            features.append(feature)
+        points_layer.dataProvider().addFeatures(features)
+        points_layer.updateExtents()
+
+        # Tabella senza geometria: una riga per (punto, footprint che lo copre)
+        table = QgsVectorLayer("None", "POI coverage footprints", "memory")
+        table.dataProvider().addAttributes(
+            [QgsField("poi", QVariant.Int), QgsField("name", QVariant.String), QgsField("best", QVariant.Int)]
+            + footprint_fields
+        )
+        table.updateFields()
+        rows = []
+        for point, index in zip(pts, fps):
+            row = QgsFeature(table.fields())
+            row.setAttributes([point, names[point], int(best[point] == index)] + attributes(index))
+            rows.append(row)
+        table.dataProvider().addFeatures(rows)
+
+        for layer in (table, points_layer):
+            LayerRegistry.tag(layer, f"{self._shown_event}|{layer.name()}", "poi")
+        project.addMapLayers([table, points_layer])
+
+    def _index_snapshots(self):
+        """Aggiunge all'indice globale gli snapshot su disco (una volta per sessione).
+
+        Gli eventi mostrati vengono indicizzati da _show_footprints, quindi le
+        query successive non rileggono la directory. Un evento indicizzato da
+        uno snapshot viene sostituito se ne esiste una generazione più recente;
+        quelli indicizzati da uno store in memoria restano invariati.
+        """
+        if self._snapshots_indexed or self.snapshot_store is None:
+            return
+        self._snapshots_indexed = True
+        for snapshot in self.snapshot_store.snapshots():
+            version = self.global_index.version(snapshot.event)
+            if version is None or (isinstance(version, str) and version != snapshot.path):
+                try:
+                    self.global_index.add_snapshot(snapshot, version=snapshot.path)
+                except Exception as e:
+                    get_logger().warning(f"Cannot index snapshot {snapshot.path}: {e}")
+            snapshot.close()
+
+    def _nearest_location(self):
+        """Punto della ricerca in WGS84: (lon, lat) dal campo "lat, lon" o centro della mappa."""
+        text = self.nearest_edit.text().strip()
+        if text:
+            parts = [p for p in text.replace(";", ",").replace(" ", ",").split(",") if p]
+            if len(parts) != 2:
+                raise ValueError(f"Formato non valido: {text!r} (atteso \"lat, lon\")")
+            lat, lon = (float(p) for p in parts)
+            if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
+                raise ValueError(f"Coordinate fuori intervallo: {text!r}")
+            return lon, lat
+        canvas = self.iface.mapCanvas()
+        transform = QgsCoordinateTransform(
+            canvas.mapSettings().destinationCrs(), QgsCoordinateReferenceSystem("EPSG:4326"), QgsProject.instance()
+        )
+        center = transform.transform(canvas.extent().center())
+        return center.x(), center.y()
+
+    def _find_nearest(self):
+        """Footprints più vicini al punto tra tutti gli eventi indicizzati."""
+        if self.global_index is None:
+            QMessageBox.warning(self, "Immagini vicine", "Ricerca non disponibile (numpy mancante).")
+            return
+        try:
+            x, y = self._nearest_location()
+        except Exception as e:
+            QMessageBox.warning(self, "Immagini vicine", str(e))
+            return
+        use_date = self.date_check.isChecked()
+        # Il tempo mostrato include la prima lettura degli snapshot
+        started = time.perf_counter()
+        self._index_snapshots()
+        hits = self.global_index.nearest(
+            x, y, k=self.nearest_k_spin.value(),
+            since=self.start_date_edit.date().toPyDate() if use_date else None,
+            until=self.end_date_edit.date().toPyDate() if use_date else None,
+            max_cloud=self.cloud_slider.value(),
+        )
+        elapsed = (time.perf_counter() - started) * 1000.0
+        self._nearest = hits
+        self._populate_nearest_table(hits)
+        events = len(self.global_index.events())
+        self.status_label.setText(
+            f"{len(hits)} footprints vicini a {y:.5f}, {x:.5f} ({events} eventi, {elapsed:.1f} ms)"
+            if events else "Nessun evento indicizzato: carica prima i footprints di un evento"
+        )
+        self.status_label.setStyleSheet(f"color: {'#00ffbf' if hits else 'orange'}; font-size: 10px;")
+
+    def _nearest_record(self, hit):
+        """FootprintRecord di un risultato se il suo evento è in memoria (None altrimenti)."""
+        if hit.event == self._shown_event:
+            return self.store.records[hit.index]
+        cached = self.event_cache.peek(hit.event)
+        return cached.store.records[hit.index] if cached is not None else None
+
+    def _snapshot_columns(self, event):
+        """Colonne (datetime, catalog_id, quadkey) dello snapshot indicizzato di un evento.
+
+        None se lo snapshot non è più quello dell'indice globale (indici dei
+        risultati non validi) o non è leggibile.
+        """
+        snapshot = self._open_snapshot(event)
+        if snapshot is None:
+            return None
+        try:
+            if snapshot.path != self.global_index.version(event):
+                return None
+            count = len(snapshot)
+            return tuple(
+                snapshot.column(name) or [None] * count for name in ("datetime", "catalog_id", "quadkey")
+            )
+        except Exception as e:
+            get_logger().warning(f"Cannot read snapshot columns of {event}: {e}")
+            return None
+        finally:
+            snapshot.close()
+
+    def _populate_nearest_table(self, hits):
+        self.nearest_table.setRowCount(0)
+        self.nearest_table.setRowCount(len(hits))
+        columns = {}  # evento solo su snapshot -> colonne (lette una volta)
+        for row, hit in enumerate(hits):
+            record = self._nearest_record(hit)
+            if record is not None:
+                values = (record.datetime, record.catalog_id, record.quadkey)
+            else:
+                if hit.event not in columns:
+                    columns[hit.event] = self._snapshot_columns(hit.event)
+                values = tuple(c[hit.index] for c in columns[hit.event]) if columns[hit.event] else (None,) * 3
+            datetime_text, catalog_id, quadkey = values
+            self.nearest_table.setItem(row, 0, QTableWidgetItem(hit.event))
+            self.nearest_table.setItem(row, 1, QTableWidgetItem(datetime_text or str(hit.date or "")))
+            self.nearest_table.setItem(row, 2, NumericTableWidgetItem(f"{hit.distance_km:.2f}"))
+            cloud = f"{hit.cloud_cover:g}" if hit.cloud_cover is not None else ""
+            self.nearest_table.setItem(row, 3, NumericTableWidgetItem(cloud))
+            self.nearest_table.setItem(row, 4, QTableWidgetItem(catalog_id or ""))
+            self.nearest_table.setItem(row, 5, QTableWidgetItem(quadkey or ""))
+        self.nearest_table.setVisible(bool(hits))
+
+    def _jump_to_nearest(self, row):
+        """Mostra l'evento di un risultato e seleziona i suoi footprints trovati."""
+        if not 0 <= row < len(self._nearest):
+            return
+        event = self._nearest[row].event
+        indices = [hit.index for hit in self._nearest if hit.event == event]
+        if event == self._shown_event:
+            self._select_indices(indices)
+            self._zoom_to_selected()
+            return
+        combo_index = self.event_combo.findData(event)
+        if combo_index < 0:
+            QMessageBox.warning(self, "Immagini vicine", f"L'evento {event} non è più nell'elenco eventi.")
+            return
+        # Selezione applicata da _show_footprints (subito da cache/snapshot, o dopo il download)
+        self._pending_selection = (event, indices)
+        self.event_combo.setCurrentIndex(combo_index)
+        self._load_footprints()
+
     def _zoom_to_selected(self):
         """Zoom sulla selezione corrente nella tabella footprints.
         
@@ -1052,38 +2175,16 @@ class MaxarDockWidget(QDockWidget):
         - EPSG:32632 (WGS84 / UTM zone 32N)
         - Qualsiasi altro CRS supportato da PROJ
         """
-        selected_rows = set(idx.row() for idx in self.footprints_table.selectedIndexes())
-        if not selected_rows:
+        selected = self._selected_records()
+        if not selected:
             self.status_label.setText("Nessun footprint selezionato")
             return
             
-        # Calcola bounding box dalle geometrie originali (in WGS84)
-        min_x = min_y = float("inf")
-        max_x = max_y = float("-inf")
-        
-        for row in selected_rows:
-            if row < len(self.all_features):
-                feature = self.all_features[row]
-                geom = feature.get("geometry", {})
-                coords = geom.get("coordinates", [])
-                
-                if coords:
-                    # Per Polygon o MultiPolygon
-                    if geom.get("type") == "Polygon":
-                        for point in coords[0]:  # Primo anello
-                            min_x = min(min_x, point[0])
-                            max_x = max(max_x, point[0])
-                            min_y = min(min_y, point[1])
-                            max_y = max(max_y, point[1])
-                    elif geom.get("type") == "MultiPolygon":
-                        for polygon in coords:
-                            for point in polygon[0]:  # Primo anello di ogni poligono
-                                min_x = min(min_x, point[0])
-                                max_x = max(max_x, point[0])
-                                min_y = min(min_y, point[1])
-                                max_y = max(max_y, point[1])
+        # Bounding box dai quadkey (nessuna decodifica delle geometrie, in WGS84)
+        bounds = self.store.extent(record.index for record in selected)
         
-        if min_x != float("inf"):
+        if bounds is not None:
+            min_x, min_y, max_x, max_y = bounds
             from qgis.core import QgsRectangle, QgsCoordinateReferenceSystem, QgsCoordinateTransform, QgsProject
             
             # Crea extent in WGS84 (EPSG:4326)
@@ -1127,54 +2228,61 @@ class MaxarDockWidget(QDockWidget):
             self.status_label.setStyleSheet("color: orange; font-size: 10px;")
 
     def _load_imagery(self, imagery_type):
-        """Carica l'immagine selezionata (visual, ms_analytic, pan_analytic) come COG."""
-        selected_rows = set(idx.row() for idx in self.footprints_table.selectedIndexes())
-        if not selected_rows:
+        """Carica l'immagine selezionata (visual, ms_analytic, pan_analytic) come COG.
+
+        L'apertura dei COG (header e IFD via HTTP) avviene in background con al
+        massimo ``max_downloads`` aperture contemporanee; ogni layer viene
+        aggiunto al progetto appena è valido.
+        """
+        selected = self._selected_records()
+        if not selected:
             QMessageBox.warning(self, "Nessuna selezione", "Seleziona almeno un footprint dalla tabella.")
             return
             
         imagery_label = imagery_type.replace("_", " ").title()
         
-        loaded_count = 0
+        jobs = []
         not_available_count = 0
+        profile = self._imagery_profile()
         
-        for row in selected_rows:
-            if row >= len(self.all_features):
-                continue
-                
-            feature = self.all_features[row]
-            props = feature.get("properties", {})
-            
+        available = []
+        for record in selected:
             # Il GeoJSON ha campi "visual", "ms_analytic", "pan_analytic" (senza _cog_url)
-            cog_url = props.get(imagery_type)
-            
-            if not cog_url:
+            if not record.url(imagery_type):
                 not_available_count += 1
-                get_logger().debug(f"No {imagery_type} URL for quadkey {props.get('quadkey')}")
+                get_logger().debug(f"No {imagery_type} URL for quadkey {record.quadkey}")
                 continue
-                
+            available.append(record)
+
+        mosaic_mode = self.mosaic_combo.currentData() or MOSAIC_TILES
+        for label, records in group_records(available, mosaic_mode):
+            if len(records) > 1:
+                # Mosaico VRT: un solo layer, GDAL legge solo i tile visibili
+                urls = [record.url(imagery_type) for record in records]
+                sources = [self._imagery_source(profile, url) for url in urls]
+                layer_name = f"Maxar {imagery_type} - {label} - {len(records)} tiles"
+                jobs.append(CogJob(
+                    None, layer_name, "gdal", url=mosaic_key(urls),
+                    imagery_type=imagery_type, sources=sources,
+                    group=self._stretch_group(records[0], imagery_type),
+                    members=dict(zip(urls, sources)),
+                ))
+                continue
+
+            record = records[0]
+            cog_url = record.url(imagery_type)
             # Costruisci nome layer
-            catalog_id = props.get("catalog_id", "unknown")
-            quadkey = props.get("quadkey", "")
-            date = props.get("datetime", "")[:10] if props.get("datetime") else "no-date"
-            layer_name = f"Maxar {imagery_type} - {catalog_id} - {quadkey} ({date})"
-            
-            # Carica COG con GDAL vsicurl
-            cog_path = f"/vsicurl/{cog_url}"
-            raster_layer = QgsRasterLayer(cog_path, layer_name, "gdal")
+            catalog_id = record.catalog_id or "unknown"
+            layer_name = f"Maxar {imagery_type} - {catalog_id} - {record.quadkey} ({record.date})"
             
-            if raster_layer.isValid():
-                QgsProject.instance().addMapLayer(raster_layer)
-                loaded_count += 1
-                get_logger().info(f"Loaded COG: {layer_name}")
-            else:
-                get_logger().error(f"Failed to load COG: {cog_url}")
-                QMessageBox.warning(self, "Errore caricamento", f"Impossibile caricare il COG:\n{cog_url}")
+            # Carica COG con GDAL vsicurl (profilo di accesso ottimizzato)
+            jobs.append(CogJob(
+                self._imagery_source(profile, cog_url), layer_name, "gdal",
+                url=cog_url, record_index=record.index, imagery_type=imagery_type,
+                group=self._stretch_group(record, imagery_type),
+            ))
         
-        if loaded_count > 0:
-            self.status_label.setText(f"Caricate {loaded_count} immagini {imagery_label}")
-            self.status_label.setStyleSheet("color: #00ffbf; font-size: 10px;")
-        elif not_available_count > 0:
+        if not jobs:
             QMessageBox.warning(
                 self, 
                 "Immagini non disponibili", 
@@ -1183,14 +2291,460 @@ class MaxarDockWidget(QDockWidget):
             )
             self.status_label.setText(f"{imagery_label} non disponibile")
             self.status_label.setStyleSheet("color: orange; font-size: 10px;")
+            return
+
+        self._start_cog_jobs(jobs, not_available_count, imagery_label)
+
+    def _load_pansharpened(self):
+        """Carica un layer RGB pansharpened virtuale (pan_analytic + ms_analytic).
+
+        Il VRT di GDAL calcola il pansharpening per blocco al momento del
+        rendering (dalle overview quando la mappa è rimpicciolita): nessun
+        download completo, solo i blocchi visibili dei due COG.
+        """
+        selected = self._selected_records()
+        if not selected:
+            QMessageBox.warning(self, "Nessuna selezione", "Seleziona almeno un footprint dalla tabella.")
+            return
+        profile = self._imagery_profile()
+        jobs = []
+        not_available_count = 0
+        for record in selected:
+            pan_url, ms_url = record.url("pan_analytic"), record.url("ms_analytic")
+            if not pan_url or not ms_url:
+                not_available_count += 1
+                continue
+            pan, ms = self._imagery_source(profile, pan_url), self._imagery_source(profile, ms_url)
+            layer_name = (
+                f"Maxar pansharpened - {record.catalog_id or 'unknown'} - {record.quadkey} ({record.date})"
+            )
+            jobs.append(CogJob(
+                None, layer_name, "gdal", url=pan_url, record_index=record.index,
+                imagery_type="pansharpened",
+                build=lambda pan=pan, ms=ms, platform=record.platform: build_pansharpened(pan, ms, platform),
+                group=self._stretch_group(record, "pansharpened"),
+                members={pan_url: pan, ms_url: ms},
+            ))
+        if not jobs:
+            QMessageBox.warning(
+                self,
+                "Immagini non disponibili",
+                "Pan e MS non sono entrambi disponibili per i footprints selezionati.",
+            )
+            return
+        self._start_cog_jobs(jobs, not_available_count, "Pansharpened")
+
+    def _load_ms_preset(self):
+        """Carica il preset multispettrale scelto (composito o indice) come VRT."""
+        selected = self._selected_records()
+        if not selected:
+            QMessageBox.warning(self, "Nessuna selezione", "Seleziona almeno un footprint dalla tabella.")
+            return
+        preset = self.preset_combo.currentData()
+        label = PRESETS[preset][0]
+        profile = self._imagery_profile()
+        jobs = []
+        not_available_count = 0
+        for record in selected:
+            ms_url = record.url("ms_analytic")
+            if not ms_url:
+                not_available_count += 1
+                continue
+            ms = self._imagery_source(profile, ms_url)
+            layer_name = f"Maxar {label} - {record.catalog_id or 'unknown'} - {record.quadkey} ({record.date})"
+            jobs.append(CogJob(
+                None, layer_name, "gdal", url=ms_url, record_index=record.index,
+                imagery_type=preset,
+                build=lambda ms=ms, platform=record.platform: build_preset_vrt(ms, preset, platform),
+                group=None if is_index(preset) else self._stretch_group(record, preset),
+                members={ms_url: ms},
+            ))
+        if not jobs:
+            QMessageBox.warning(
+                self,
+                "Immagini non disponibili",
+                "MS non disponibile per i footprints selezionati.",
+            )
+            return
+        self._start_cog_jobs(jobs, not_available_count, label)
+
+    @staticmethod
+    def _stretch_group(record, imagery_type):
+        """Gruppo di stretch: stessa acquisizione e stesso tipo di immagine."""
+        return f"{record.catalog_id or 'unknown'}|{record.date}|{imagery_type}"
+
+    @staticmethod
+    def _acquisition_label(record):
+        """Nome del gruppo di un'acquisizione nel pannello layer."""
+        return f"{record.catalog_id or 'unknown'} ({record.date})"
+
+    def _is_loaded(self, url, imagery_type):
+        """Layer già nel progetto o in attesa di inserimento."""
+        return (
+            self.layer_registry.find(url, imagery_type) is not None
+            or self.layer_queue.pending((url, imagery_type))
+        )
+
+    def _imagery_profile(self):
+        """Profilo di accesso COG con la block cache persistente (se attiva)."""
+        profile = cog_access_profile(self.settings.value("MaxarOpenData/cog_profile", True, type=bool))
+        try:
+            profile.cache_server = block_cache_server(
+                self.settings.value("MaxarOpenData/block_cache", True, type=bool),
+                self.settings.value("MaxarOpenData/block_cache_mb", 2048, type=int),
+            )
+        except Exception as e:
+            # Cache non disponibile (disco, porta): accesso diretto
+            get_logger().warning(f"Block cache disabled: {e}")
+            profile.cache_server = None
+        return profile
+
+    def _start_cog_jobs(self, jobs, not_available_count, imagery_label):
+        """Avvia l'apertura in background dei CogJob (esclusi quelli già nel progetto)."""
+        loaded = [job for job in jobs if self._is_loaded(job.url, job.imagery_type)]
+        if loaded:
+            jobs = [job for job in jobs if job not in loaded]
+            get_logger().info(f"{len(loaded)} {imagery_label} layers already loaded, skipped")
+        if not jobs:
+            self.status_label.setText(f"{imagery_label}: già caricate ({len(loaded)})")
+            self.status_label.setStyleSheet("color: #00ffbf; font-size: 10px;")
+            return
+        for job in jobs:
+            if not job.tree_group:
+                self._place_job(job, self.store)
+        if self.cog_loader is None:
+            self.cog_loader = CogLoadManager(parent=self)
+            self.cog_loader.layerReady.connect(self._on_imagery_layer_ready)
+            self.cog_loader.progress.connect(self._on_imagery_progress)
+            self.cog_loader.finished.connect(self._on_imagery_finished)
+        self.cog_loader.max_concurrent = max(1, self.settings.value("MaxarOpenData/max_downloads", 3, type=int))
+
+        self.imagery_progress.setVisible(True)
+        self.cancel_imagery_btn.setVisible(True)
+        self.status_label.setText(f"Apertura di {len(jobs)} immagini {imagery_label}...")
+        self.status_label.setStyleSheet("color: blue; font-size: 10px;")
+        self.cog_loader.start(jobs, unavailable=not_available_count)
+
+    def _place_job(self, job, store):
+        """Gruppo nel pannello layer, bbox e contorno del footprint di un CogJob."""
+        event = store.event or self._shown_event or "Maxar"
+        record = store.records[job.record_index] if job.record_index is not None else None
+        job.tree_group = (event, self._acquisition_label(record)) if record is not None else (event,)
+        if record is not None:
+            job.footprint = store.extent([job.record_index])
+            job.outline = polygons_wkt(store.rings.polygons(job.record_index))
+
+    def _imagery_source(self, profile, url):
+        """Copia scaricata se disponibile, altrimenti /vsicurl con il profilo
+        (tramite il VRT locale se i metadati del COG sono già in cache)."""
+        local = self.download_queue.local_file(url)
+        if local:
+            return local
+        source = profile.source(url)
+        return cog_metadata_cache().wrapper(url, source) or source
+
+    def _on_imagery_layer_ready(self, job, layer):
+        """Accoda un COG appena aperto in background per l'inserimento a blocchi."""
+        if self._is_loaded(job.url, job.imagery_type):
+            # Stesso COG richiesto due volte prima che il primo fosse pronto
+            return
+        if job.imagery_type in PRESETS and is_index(job.imagery_type):
+            try:
+                style_index_layer(layer)
+            except Exception as e:
+                get_logger().warning(f"Cannot style {job.name}: {e}")
+        elif job.group:
+            self._apply_group_stretch(job, layer)
+        LayerRegistry.tag(layer, job.url, job.imagery_type, job.members)
+        if job.footprint is not None:
+            set_footprint(layer, job.footprint)
+        if job.outline:
+            layer.setCustomProperty(OUTLINE_PROPERTY, job.outline)
+        self.layer_queue.add(layer, job.tree_group, (job.url, job.imagery_type))
+
+    def _apply_group_stretch(self, job, layer):
+        """Stretch in cache (mediana dell'acquisizione) sul nuovo layer e sui
+        layer già caricati dello stesso gruppo, prima del primo rendering."""
+        stretch = stretch_cache().stretch(job.stats_key, job.group)
+        if not stretch:
+            return
+        layer.setCustomProperty(GROUP_PROPERTY, job.group)
+        try:
+            apply_stretch(layer, stretch)
+            for other in list(QgsProject.instance().mapLayers().values()) + self.layer_queue.layers():
+                if other is not layer and other.customProperty(GROUP_PROPERTY) == job.group:
+                    apply_stretch(other, stretch)
+        except Exception as e:
+            get_logger().warning(f"Cannot apply cached stretch to {job.name}: {e}")
+
+    def _on_imagery_progress(self, done, total):
+        """Aggiorna la barra di avanzamento del caricamento immagini."""
+        self.imagery_progress.setRange(0, max(total, 1))
+        self.imagery_progress.setValue(done)
+        self.imagery_progress.setFormat(f"{done}/{total}")
+
+    def _cancel_imagery(self):
+        """Annulla le aperture COG ancora in coda e l'estrazione AOI."""
+        if self.cog_loader is not None:
+            self.cog_loader.cancel()
+        if self.extract_worker is not None:
+            self.extract_worker.cancel()
+
+    def _on_imagery_finished(self, report):
+        """Report unico a fine batch (niente popup per ogni errore)."""
+        self.layer_queue.flush()
+        self.activator.update()
+        self.imagery_progress.setVisible(False)
+        self.cancel_imagery_btn.setVisible(False)
+        self.status_label.setText(report.summary())
+        color = "#00ffbf" if report.loaded and not report.failed else "orange"
+        if not report.loaded and report.failed:
+            color = "red"
+        self.status_label.setStyleSheet(f"color: {color}; font-size: 10px;")
+        cache_server = cog_access_profile().cache_server
+        if cache_server is not None:
+            cache_server.cache.log_stats()
+        if report.failed:
+            QMessageBox.warning(
+                self,
+                "Errore caricamento",
+                f"Impossibile caricare {len(report.failed)} COG su {report.total}:\n\n"
+                f"{report.failure_details()}",
+            )
+
+    def _download_selected(self):
+        """Accoda il download dei COG selezionati e avvia il gestore."""
+        selected = self._selected_records()
+        if not selected:
+            QMessageBox.warning(self, "Nessuna selezione", "Seleziona almeno un footprint dalla tabella.")
+            return
+        imagery_type = self.download_combo.currentData() or "visual"
+        root = self.settings.value("MaxarOpenData/download_dir", "") or default_download_dir()
+        added = unavailable = 0
+        for record in selected:
+            url = record.url(imagery_type)
+            if not url:
+                unavailable += 1
+                continue
+            name = f"{imagery_type} - {record.catalog_id or 'unknown'} - {record.quadkey}"
+            if self.download_queue.add(DownloadTask(url, local_path(url, root), name)):
+                added += 1
+        try:
+            self.download_queue.save()
+        except OSError as e:
+            get_logger().warning(f"Cannot save download queue: {e}")
+        message = f"{added} download in coda"
+        if unavailable:
+            message += f", {unavailable} non disponibili"
+        if added < len(selected) - unavailable:
+            message += f", {len(selected) - unavailable - added} già scaricati o in coda"
+        self.status_label.setText(message)
+        self.status_label.setStyleSheet("color: blue; font-size: 10px;")
+        self._start_downloads()
+
+    def _start_downloads(self):
+        """Avvia un batch con i download in coda (uno alla volta)."""
+        if self.download_worker is not None and self.download_worker.isRunning():
+            return  # i nuovi task vengono presi alla fine del batch
+        tasks = self.download_queue.pending()
+        if not tasks:
+            return
+        max_workers = max(1, self.settings.value("MaxarOpenData/max_downloads", 3, type=int))
+        downloader = Downloader(self.download_queue, max_workers=max_workers)
+        self.download_worker = DownloadWorker(downloader, tasks)
+        self.download_worker.progress.connect(self._on_download_progress)
+        self.download_worker.fileDone.connect(self._on_download_done)
+        self.download_worker.fileFailed.connect(self._on_download_failed)
+        self.download_worker.finished.connect(self._on_downloads_finished)
+        self._download_failures = 0
+        self.download_progress.setVisible(True)
+        self.cancel_download_btn.setVisible(True)
+        get_logger().info(f"Starting {len(tasks)} downloads ({max_workers} connections)")
+        self.download_worker.start()
+
+    def _on_download_progress(self, done, total):
+        mb = 1024 * 1024
+        self.download_progress.setRange(0, max(int(total // mb), 1))
+        self.download_progress.setValue(int(done // mb))
+        self.download_progress.setFormat(f"{done / mb:.0f}/{total / mb:.0f} MB")
+
+    def _on_download_done(self, task):
+        self.status_label.setText(f"Scaricato: {task.name}")
+        self.status_label.setStyleSheet("color: #00ffbf; font-size: 10px;")
+        self._switch_to_local(task)
+
+    def _on_download_failed(self, task):
+        self._download_failures += 1
+        self.status_label.setText(f"Download non riuscito: {task.name} ({task.error})")
+        self.status_label.setStyleSheet("color: orange; font-size: 10px;")
+
+    def _on_downloads_finished(self):
+        worker = self.download_worker
+        cancelled = worker is not None and worker.downloader.cancelled
+        self.download_progress.setVisible(False)
+        self.cancel_download_btn.setVisible(False)
+        if cancelled:
+            pending = len(self.download_queue.pending())
+            self.status_label.setText(f"Download sospesi ({pending} in coda, ripresi al prossimo avvio)")
+            return
+        if self._download_failures:
+            self.status_label.setText(f"Download terminati, {self._download_failures} errori (vedi log)")
+        if worker is not None and worker.error is not None:
+            # Batch interrotto da un errore: niente riavvio automatico (si ripeterebbe)
+            self.status_label.setText(f"Download interrotti: {worker.error} (vedi log)")
+            self.status_label.setStyleSheet("color: red; font-size: 10px;")
+            return
+        if self.download_queue.pending():
+            self._start_downloads()
+
+    def _cancel_downloads(self):
+        """Sospende i download: chunk e coda restano su disco."""
+        if self.download_worker is not None:
+            self.download_worker.cancel()
+
+    def _switch_to_local(self, task):
+        """Sposta sul file locale i layer che leggono il COG del task.
+
+        I layer sono cercati nel registro (membri registrati al caricamento),
+        non per URL nella sorgente: un COG aperto tramite il VRT locale dei
+        metadati o dentro un mosaico/VRT derivato non ha l'URL remoto nella
+        sorgente del layer.
+        """
+        from qgis.core import QgsDataProvider
+
+        for layer in self.layer_registry.reading(task.url):
+            members = LayerRegistry.members_of(layer)
+            try:
+                source = replace_source(layer.source(), members[task.url], task.path)
+            except (OSError, ValueError) as e:
+                get_logger().warning(f"Cannot switch {layer.name()} to {task.path}: {e}")
+                continue
+            if source is None:
+                continue
+            layer.setDataSource(source, layer.name(), "gdal", QgsDataProvider.ProviderOptions())
+            key, kind = LayerRegistry.key_of(layer)
+            members[task.url] = task.path
+            LayerRegistry.tag(layer, key, kind, members)
+            get_logger().info(f"Layer {layer.name()} now reads {task.path}")
+
+    def _extract_aoi(self):
+        """Ritaglia i COG selezionati sull'estensione della mappa (AOI).
+
+        Solo i blocchi del COG che intersecano l'AOI vengono letti, dal
+        livello di overview corrispondente al GSD richiesto; il risultato è
+        un GeoTIFF locale nel CRS del progetto.
+        """
+        from qgis.core import QgsCoordinateReferenceSystem, QgsCoordinateTransform, QgsRectangle
+
+        if self.extract_worker is not None and self.extract_worker.isRunning():
+            self.status_label.setText("Estrazione già in corso")
+            return
+        selected = self._selected_records()
+        if not selected:
+            QMessageBox.warning(self, "Nessuna selezione", "Seleziona almeno un footprint dalla tabella.")
+            return
+
+        project = QgsProject.instance()
+        canvas = self.iface.mapCanvas()
+        canvas_crs = canvas.mapSettings().destinationCrs()
+        project_crs = project.crs() if project.crs().isValid() else canvas_crs
+        aoi = canvas.extent()
+        if canvas_crs != project_crs:
+            aoi = QgsCoordinateTransform(canvas_crs, project_crs, project).transformBoundingBox(aoi)
+        aoi_wgs84 = QgsCoordinateTransform(
+            project_crs, QgsCoordinateReferenceSystem("EPSG:4326"), project
+        ).transformBoundingBox(aoi)
+
+        imagery_type = self.download_combo.currentData() or "visual"
+        gsd = self.extract_gsd_spin.value()
+        bounds = (aoi.xMinimum(), aoi.yMinimum(), aoi.xMaximum(), aoi.yMaximum())
+        profile = self._imagery_profile()
+        jobs = []
+        outside = 0
+        for record in selected:
+            url = record.url(imagery_type)
+            if not url:
+                continue
+            extent = self.store.extent([record.index])
+            if extent is not None and not aoi_wgs84.intersects(QgsRectangle(*extent)):
+                outside += 1
+                continue
+            name = f"Maxar {imagery_type} AOI - {record.catalog_id or 'unknown'} - {record.quadkey} ({record.date})"
+            output = extract_path(name, bounds, gsd, project_crs.authid())
+            jobs.append(ExtractJob(self._imagery_source(profile, url), name, output, url=url))
+
+        if not jobs:
+            self.status_label.setText(
+                "Nessun footprint selezionato interseca la vista corrente" if outside
+                else f"{imagery_type} non disponibile per i footprints selezionati"
+            )
+            self.status_label.setStyleSheet("color: orange; font-size: 10px;")
+            return
+
+        self._extract_results = ([], [])
+        self.extract_worker = ExtractWorker(
+            jobs, bounds, project_crs.toWkt(), gsd=gsd, geographic=project_crs.isGeographic(),
+            max_workers=self.settings.value("MaxarOpenData/max_downloads", 3, type=int),
+        )
+        self.extract_worker.extracted.connect(self._on_extracted)
+        self.extract_worker.failed.connect(lambda job, error: self._extract_results[1].append((job, error)))
+        self.extract_worker.progress.connect(self._on_imagery_progress)
+        self.extract_worker.finished.connect(self._on_extract_finished)
+        self.imagery_progress.setVisible(True)
+        self.cancel_imagery_btn.setVisible(True)
+        self.status_label.setText(f"Estrazione AOI da {len(jobs)} tile ({outside} fuori vista)...")
+        self.status_label.setStyleSheet("color: blue; font-size: 10px;")
+        self.extract_worker.start()
+
+    def _on_extracted(self, job, path):
+        layer = QgsRasterLayer(path, job.name, "gdal")
+        if layer.isValid():
+            LayerRegistry.tag(layer, path, "extract")
+            self.layer_queue.add(layer, (self._shown_event or "Maxar", "AOI"), (path, "extract"))
+            self._extract_results[0].append(job.name)
+        else:
+            self._extract_results[1].append((job, "layer non valido"))
+
+    def _on_extract_finished(self):
+        self.layer_queue.flush()
+        self.imagery_progress.setVisible(False)
+        self.cancel_imagery_btn.setVisible(False)
+        loaded, failed = self._extract_results
+        self.status_label.setText(f"Estratte {len(loaded)} AOI" + (f", {len(failed)} errori" if failed else ""))
+        self.status_label.setStyleSheet(
+            f"color: {'orange' if failed else '#00ffbf'}; font-size: 10px;"
+        )
+        if failed:
+            details = "\n".join(f"- {job.name}: {error}" for job, error in failed[:10])
+            QMessageBox.warning(self, "Errore estrazione", f"Estrazione non riuscita per {len(failed)} tile:\n\n{details}")
+
+    def shutdown(self):
+        """Ferma i lavori in background (chiamato allo scaricamento del plugin)."""
+        if self.cog_loader is not None:
+            self.cog_loader.shutdown()
+        self.prefetcher.stop()
+        if self.extract_worker is not None:
+            self.extract_worker.cancel()
+            self.extract_worker.wait(10000)
+        if self.download_worker is not None:
+            self.download_worker.cancel()
+            self.download_worker.wait(10000)
+        self.layer_queue.clear()
+        self.activator.stop()
+        if self.coverage_worker is not None:
+            self.coverage_worker.cancel()
+            self.coverage_worker.wait(5000)
+        for worker in list(self._fetch_workers):
+            worker.wait(5000)
+        self.layer_registry.disconnect()
+        cog_access_profile().uninstall()
+        cog_access_profile().cache_server = None
+        shutdown_block_cache()
 
     def _clear_layers(self):
         """Rimuove tutti i layer caricati dal plugin."""
-        project = QgsProject.instance()
-        layers_to_remove = []
-        for lyr in project.mapLayers().values():
-            if lyr.name().startswith("Event_") or lyr.name().startswith("Vantor") or "COG" in lyr.name() or lyr.name() == "Footprints":
-                layers_to_remove.append(lyr.id())
-        for lid in layers_to_remove:
-            project.removeMapLayer(lid)
+        self.layer_queue.clear()
+        # Footprints prima: se è nella cache eventi viene solo estratto dal progetto
+        self._detach_footprints_layer()
+        self.layer_registry.remove_all()
         self.status_label.setText("Tutti i layer caricati sono stati rimossi.")
\ No newline at end of file
@@ -265,6 +265,30 @@ class SettingsDockWidget(QDockWidget):
         except Exception:
             pass
         layer_layout.addRow("Group layers by event:", self.group_layers_check)
+
+        # Disattiva i tile lontani dalla vista
+        self.deferred_activation_check = QCheckBox()
+        try:
+            self.deferred_activation_check.setChecked(True)
+            self.deferred_activation_check.setToolTip(
+                "Unchecks loaded tiles far from the current view and checks them again\n"
+                "as the map approaches, so they do not take part in every render"
+            )
+        except Exception:
+            pass
+        layer_layout.addRow("Defer off-screen tiles:", self.deferred_activation_check)
+
+        # Non disegna i tile coperti interamente da quelli sopra
+        self.occlusion_culling_check = QCheckBox()
+        try:
+            self.occlusion_culling_check.setChecked(True)
+            self.occlusion_culling_check.setToolTip(
+                "Unchecks loaded tiles completely covered in the view by opaque\n"
+                "tiles above them; re-evaluated after each navigation"
+            )
+        except Exception:
+            pass
+        layer_layout.addRow("Skip hidden tiles:", self.occlusion_culling_check)
         
         # Default imagery type
         self.default_imagery_combo = QComboBox()
@@ -333,8 +357,103 @@ class SettingsDockWidget(QDockWidget):
             pass
         network_layout.addRow("Max concurrent downloads:", self.max_downloads_spin)
         
+        # Tuned GDAL /vsicurl options for the imagery bucket
+        self.cog_profile_check = QCheckBox()
+        try:
+            self.cog_profile_check.setChecked(True)
+            self.cog_profile_check.setToolTip(
+                "No directory listing, merged range requests, HTTP/2 multiplexing "
+                "and larger header reads when opening COGs"
+            )
+        except Exception:
+            pass
+        network_layout.addRow("Optimized COG access:", self.cog_profile_check)
+        
+        # Destination of the imagery downloads
+        download_layout = QHBoxLayout()
+        self.download_dir_input = QLineEdit()
+        try:
+            self.download_dir_input.setPlaceholderText("Plugin cache (default)")
+        except Exception:
+            pass
+        download_layout.addWidget(self.download_dir_input)
+        self.download_browse_btn = QPushButton("Browse...")
+        try:
+            self.download_browse_btn.clicked.connect(self._browse_download_dir)
+        except Exception:
+            pass
+        download_layout.addWidget(self.download_browse_btn)
+        network_layout.addRow("Download folder:", download_layout)
+        
         layout.addWidget(network_group)
         
+        # Cache settings group
+        cache_group = QGroupBox("Cache")
+        cache_layout = QFormLayout(cache_group)
+        
+        # Events kept in memory (0 = disabled)
+        self.event_cache_size_spin = QSpinBox()
+        try:
+            self.event_cache_size_spin.setRange(0, 20)
+            self.event_cache_size_spin.setValue(4)
+            self.event_cache_size_spin.setSuffix(" events")
+        except Exception:
+            pass
+        cache_layout.addRow("Events kept in memory:", self.event_cache_size_spin)
+        
+        # Memory budget of the event cache
+        self.event_cache_mb_spin = QSpinBox()
+        try:
+            self.event_cache_mb_spin.setRange(16, 4096)
+            self.event_cache_mb_spin.setSingleStep(16)
+            self.event_cache_mb_spin.setValue(256)
+            self.event_cache_mb_spin.setSuffix(" MB")
+        except Exception:
+            pass
+        cache_layout.addRow("Event cache memory:", self.event_cache_mb_spin)
+        
+        # Keep the hidden footprints layer of cached events
+        self.event_cache_layers_check = QCheckBox()
+        try:
+            self.event_cache_layers_check.setChecked(True)
+        except Exception:
+            pass
+        cache_layout.addRow("Keep footprint layers:", self.event_cache_layers_check)
+        
+        # Persistent block cache for COG byte ranges
+        self.block_cache_check = QCheckBox()
+        try:
+            self.block_cache_check.setChecked(True)
+            self.block_cache_check.setToolTip(
+                "Keep downloaded COG blocks on disk and reuse them across sessions"
+            )
+        except Exception:
+            pass
+        cache_layout.addRow("Persistent COG block cache:", self.block_cache_check)
+        
+        self.block_cache_mb_spin = QSpinBox()
+        try:
+            self.block_cache_mb_spin.setRange(256, 65536)
+            self.block_cache_mb_spin.setSingleStep(256)
+            self.block_cache_mb_spin.setValue(2048)
+            self.block_cache_mb_spin.setSuffix(" MB")
+        except Exception:
+            pass
+        cache_layout.addRow("Block cache disk size:", self.block_cache_mb_spin)
+        
+        # Prefetch of the overviews around the current view
+        self.prefetch_check = QCheckBox()
+        try:
+            self.prefetch_check.setChecked(True)
+            self.prefetch_check.setToolTip(
+                "Read the COG overviews of the current and adjacent views in the background"
+            )
+        except Exception:
+            pass
+        cache_layout.addRow("Prefetch around view:", self.prefetch_check)
+        
+        layout.addWidget(cache_group)
+        
         # Debug settings group
         debug_group = QGroupBox("Debug")
         debug_layout = QFormLayout(debug_group)
@@ -382,6 +501,19 @@ class SettingsDockWidget(QDockWidget):
         except Exception:
             pass
     
+    def _browse_download_dir(self):
+        """Open directory browser for the download folder."""
+        try:
+            directory = QFileDialog.getExistingDirectory(
+                self,
+                "Select Download Directory",
+                self.download_dir_input.text() or ""
+            )
+            if directory:
+                self.download_dir_input.setText(directory)
+        except Exception:
+            pass
+    
     def _load_settings(self):
         """Load settings from QSettings."""
         try:
@@ -406,6 +538,12 @@ class SettingsDockWidget(QDockWidget):
             self.group_layers_check.setChecked(
                 self.settings.value(f"{self.SETTINGS_PREFIX}group_layers", True, type=bool)
             )
+            self.deferred_activation_check.setChecked(
+                self.settings.value(f"{self.SETTINGS_PREFIX}deferred_activation", True, type=bool)
+            )
+            self.occlusion_culling_check.setChecked(
+                self.settings.value(f"{self.SETTINGS_PREFIX}occlusion_culling", True, type=bool)
+            )
             self.default_imagery_combo.setCurrentIndex(
                 self.settings.value(f"{self.SETTINGS_PREFIX}default_imagery", 0, type=int)
             )
@@ -423,6 +561,30 @@ class SettingsDockWidget(QDockWidget):
             self.max_downloads_spin.setValue(
                 self.settings.value(f"{self.SETTINGS_PREFIX}max_downloads", 3, type=int)
             )
+            self.cog_profile_check.setChecked(
+                self.settings.value(f"{self.SETTINGS_PREFIX}cog_profile", True, type=bool)
+            )
+            self.download_dir_input.setText(
+                self.settings.value(f"{self.SETTINGS_PREFIX}download_dir", "")
+            )
+            self.event_cache_size_spin.setValue(
+                self.settings.value(f"{self.SETTINGS_PREFIX}event_cache_size", 4, type=int)
+            )
+            self.event_cache_mb_spin.setValue(
+                self.settings.value(f"{self.SETTINGS_PREFIX}event_cache_mb", 256, type=int)
+            )
+            self.event_cache_layers_check.setChecked(
+                self.settings.value(f"{self.SETTINGS_PREFIX}event_cache_layers", True, type=bool)
+            )
+            self.block_cache_check.setChecked(
+                self.settings.value(f"{self.SETTINGS_PREFIX}block_cache", True, type=bool)
+            )
+            self.block_cache_mb_spin.setValue(
+                self.settings.value(f"{self.SETTINGS_PREFIX}block_cache_mb", 2048, type=int)
+            )
+            self.prefetch_check.setChecked(
+                self.settings.value(f"{self.SETTINGS_PREFIX}prefetch", True, type=bool)
+            )
             self.debug_check.setChecked(
                 self.settings.value(f"{self.SETTINGS_PREFIX}debug", False, type=bool)
             )
@@ -462,6 +624,8 @@ class SettingsDockWidget(QDockWidget):
             # Display
             self.auto_zoom_check.setChecked(True)
             self.group_layers_check.setChecked(True)
+            self.deferred_activation_check.setChecked(True)
+            self.occlusion_culling_check.setChecked(True)
             self.default_imagery_combo.setCurrentIndex(0)
             self.opacity_spin.setValue(50)
             self.show_labels_check.setChecked(False)
@@ -469,6 +633,14 @@ class SettingsDockWidget(QDockWidget):
             # Advanced
             self.timeout_spin.setValue(180)
             self.max_downloads_spin.setValue(3)
+            self.cog_profile_check.setChecked(True)
+            self.download_dir_input.setText("")
+            self.event_cache_size_spin.setValue(4)
+            self.event_cache_mb_spin.setValue(256)
+            self.event_cache_layers_check.setChecked(True)
+            self.block_cache_check.setChecked(True)
+            self.block_cache_mb_spin.setValue(2048)
+            self.prefetch_check.setChecked(True)
             self.debug_check.setChecked(False)
             self.show_urls_check.setChecked(False)
             
@@ -520,6 +692,14 @@ class SettingsDockWidget(QDockWidget):
                 f"{self.SETTINGS_PREFIX}group_layers",
                 self.group_layers_check.isChecked()
             )
+            self.settings.setValue(
+                f"{self.SETTINGS_PREFIX}deferred_activation",
+                self.deferred_activation_check.isChecked()
+            )
+            self.settings.setValue(
+                f"{self.SETTINGS_PREFIX}occlusion_culling",
+                self.occlusion_culling_check.isChecked()
+            )
             self.settings.setValue(
                 f"{self.SETTINGS_PREFIX}default_imagery",
                 self.default_imagery_combo.currentIndex()
@@ -542,6 +722,38 @@ class SettingsDockWidget(QDockWidget):
                 f"{self.SETTINGS_PREFIX}max_downloads",
                 self.max_downloads_spin.value()
             )
+            self.settings.setValue(
+                f"{self.SETTINGS_PREFIX}cog_profile",
+                self.cog_profile_check.isChecked()
+            )
+            self.settings.setValue(
+                f"{self.SETTINGS_PREFIX}download_dir",
+                self.download_dir_input.text()
+            )
+            self.settings.setValue(
+                f"{self.SETTINGS_PREFIX}event_cache_size",
+                self.event_cache_size_spin.value()
+            )
+            self.settings.setValue(
+                f"{self.SETTINGS_PREFIX}event_cache_mb",
+                self.event_cache_mb_spin.value()
+            )
+            self.settings.setValue(
+                f"{self.SETTINGS_PREFIX}event_cache_layers",
+                self.event_cache_layers_check.isChecked()
+            )
+            self.settings.setValue(
+                f"{self.SETTINGS_PREFIX}block_cache",
+                self.block_cache_check.isChecked()
+            )
+            self.settings.setValue(
+                f"{self.SETTINGS_PREFIX}block_cache_mb",
+                self.block_cache_mb_spin.value()
+            )
+            self.settings.setValue(
+                f"{self.SETTINGS_PREFIX}prefetch",
+                self.prefetch_check.isChecked()
+            )
             self.settings.setValue(
                 f"{self.SETTINGS_PREFIX}debug",
                 self.debug_check.isChecked()
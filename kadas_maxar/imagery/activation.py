@@ -0,0 +1,242 @@
+"""
+Deferred activation of plugin rasters by distance from the view.
+
+Every plugin raster carries its footprint bbox (WGS84) as a custom
+property. After each (debounced) navigation, rasters whose footprint is
+farther than ``ACTIVE_MARGIN`` view sizes from the current view are
+unchecked in the layer tree, so they stay as cheap entries that take no
+part in the render passes. As the view approaches, they are checked again.
+
+Layers hidden by the plugin carry ``SUPPRESSED_PROPERTY``, so the state
+survives a project save/reload and is never confused with layers hidden by
+the user. A suppressed layer that the user checks again is pinned and is
+no longer managed.
+
+With occlusion culling enabled, rasters completely covered in the view by
+opaque rasters above them (see ``occlusion``) are suppressed the same way.
+"""
+
+from qgis.PyQt.QtCore import QObject, QTimer
+from qgis.core import (
+    QgsCoordinateReferenceSystem,
+    QgsCoordinateTransform,
+    QgsGeometry,
+    QgsProject,
+    QgsRasterLayer,
+    QgsRectangle,
+)
+
+from kadas_maxar.logger import get_logger
+from kadas_maxar.imagery.occlusion import OUTLINE_PROPERTY, occluded_ids
+
+# Wait for the canvas to settle before (de)activating layers (ms)
+DEBOUNCE_MS = 400
+# Layers within this many view widths/heights around the view stay active
+ACTIVE_MARGIN = 1.0
+
+FOOTPRINT_PROPERTY = "maxar/footprint"
+SUPPRESSED_PROPERTY = "maxar/suppressed"
+PINNED_PROPERTY = "maxar/pinned"
+
+
+def set_footprint(layer, bounds):
+    """Store the WGS84 footprint bbox (xmin, ymin, xmax, ymax) on ``layer``."""
+    layer.setCustomProperty(FOOTPRINT_PROPERTY, ",".join(repr(float(v)) for v in bounds))
+
+
+def footprint(layer):
+    """WGS84 footprint bbox of ``layer``, from the property or its extent."""
+    value = layer.customProperty(FOOTPRINT_PROPERTY)
+    if value:
+        try:
+            return tuple(float(v) for v in str(value).split(","))
+        except ValueError:
+            pass
+    wgs84 = QgsCoordinateReferenceSystem("EPSG:4326")
+    try:
+        extent = QgsCoordinateTransform(layer.crs(), wgs84, QgsProject.instance()).transformBoundingBox(
+            layer.extent()
+        )
+    except Exception:
+        return None
+    bounds = (extent.xMinimum(), extent.yMinimum(), extent.xMaximum(), extent.yMaximum())
+    set_footprint(layer, bounds)
+    return bounds
+
+
+def expand(bounds, margin):
+    """``bounds`` grown by ``margin`` times its width/height on every side."""
+    xmin, ymin, xmax, ymax = bounds
+    dx, dy = (xmax - xmin) * margin, (ymax - ymin) * margin
+    return xmin - dx, ymin - dy, xmax + dx, ymax + dy
+
+
+def intersects(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def far_from_view(footprints, view, margin=ACTIVE_MARGIN):
+    """Ids of ``footprints`` ({id: bbox}) outside ``view`` grown by ``margin``."""
+    area = expand(view, margin)
+    return {layer_id for layer_id, bounds in footprints.items() if bounds is not None and not intersects(bounds, area)}
+
+
+class LayerSuppression:
+    """Unchecks and restores plugin layers in the layer tree.
+
+    ``apply(ids)`` makes exactly ``ids`` (minus pinned layers) suppressed,
+    leaving layers hidden by the user untouched.
+    """
+
+    def __init__(self, project=None):
+        self.project = project or QgsProject.instance()
+
+    def _node(self, layer_id):
+        return self.project.layerTreeRoot().findLayer(layer_id)
+
+    def apply(self, layer_ids, candidates):
+        """Suppress ``layer_ids`` among ``candidates`` and restore the others.
+
+        Returns (hidden, restored) counts.
+        """
+        hidden = restored = 0
+        for layer_id in candidates:
+            layer = self.project.mapLayer(layer_id)
+            node = self._node(layer_id)
+            if layer is None or node is None or layer.customProperty(PINNED_PROPERTY):
+                continue
+            suppressed = bool(layer.customProperty(SUPPRESSED_PROPERTY))
+            checked = node.itemVisibilityChecked()
+            if suppressed and checked:
+                # Riattivato a mano dall'utente: non più gestito
+                layer.removeCustomProperty(SUPPRESSED_PROPERTY)
+                layer.setCustomProperty(PINNED_PROPERTY, True)
+            elif layer_id in layer_ids and checked:
+                layer.setCustomProperty(SUPPRESSED_PROPERTY, True)
+                node.setItemVisibilityChecked(False)
+                hidden += 1
+            elif layer_id not in layer_ids and suppressed:
+                layer.removeCustomProperty(SUPPRESSED_PROPERTY)
+                node.setItemVisibilityChecked(True)
+                restored += 1
+        return hidden, restored
+
+    def restore_all(self, candidates):
+        """Check again every layer suppressed by the plugin."""
+        return self.apply(set(), candidates)[1]
+
+
+class ViewActivator(QObject):
+    """Keeps only the plugin rasters near the view active.
+
+    ``layer_ids`` returns the ids of the managed layers (the registry);
+    ``enabled`` and ``occlusion`` are callables so that the settings can
+    change at runtime.
+    """
+
+    def __init__(self, canvas, layer_ids, enabled=lambda: True, occlusion=lambda: False, parent=None):
+        super().__init__(parent)
+        self.canvas = canvas
+        self.layer_ids = layer_ids
+        self.enabled = enabled
+        self.occlusion = occlusion
+        self.suppression = LayerSuppression()
+        self._outlines = {}  # layer id -> (WKT, QgsGeometry)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(DEBOUNCE_MS)
+        self._timer.timeout.connect(self.update)
+        canvas.extentsChanged.connect(self._timer.start)
+
+    def _rasters(self):
+        project = QgsProject.instance()
+        return [
+            layer_id for layer_id in self.layer_ids()
+            if isinstance(project.mapLayer(layer_id), QgsRasterLayer)
+        ]
+
+    def _view(self):
+        wgs84 = QgsCoordinateReferenceSystem("EPSG:4326")
+        crs = self.canvas.mapSettings().destinationCrs()
+        extent = QgsCoordinateTransform(crs, wgs84, QgsProject.instance()).transformBoundingBox(self.canvas.extent())
+        return extent.xMinimum(), extent.yMinimum(), extent.xMaximum(), extent.yMaximum()
+
+    def update(self):
+        """(De)activate the managed rasters for the current view."""
+        candidates = self._rasters()
+        if not candidates:
+            return
+        deferred, occlusion = self.enabled(), self.occlusion()
+        if not deferred and not occlusion:
+            self.suppression.restore_all(candidates)
+            return
+        try:
+            view = self._view()
+        except Exception as e:
+            get_logger().debug(f"Deferred activation skipped: {e}")
+            return
+        project = QgsProject.instance()
+        footprints = {layer_id: footprint(project.mapLayer(layer_id)) for layer_id in candidates}
+        far = far_from_view(footprints, view) if deferred else set()
+        occluded = set()
+        if occlusion:
+            try:
+                occluded = self._occluded([i for i in candidates if i not in far], footprints, view)
+            except Exception as e:
+                get_logger().debug(f"Occlusion culling skipped: {e}")
+        hidden, restored = self.suppression.apply(far | occluded, candidates)
+        if hidden or restored:
+            get_logger().debug(
+                f"Deferred activation: {hidden} deactivated, {restored} activated "
+                f"({len(far)} off-screen, {len(occluded)} occluded)"
+            )
+
+    def _outline(self, layer, bounds):
+        """(footprint geometry, is a real outline) of ``layer``."""
+        wkt = layer.customProperty(OUTLINE_PROPERTY)
+        if wkt:
+            cached = self._outlines.get(layer.id())
+            if cached is None or cached[0] != wkt:
+                cached = self._outlines[layer.id()] = (wkt, QgsGeometry.fromWkt(wkt))
+            if not cached[1].isEmpty():
+                return cached[1], True
+        return QgsGeometry.fromRect(QgsRectangle(*bounds)), False
+
+    def _occluded(self, candidates, footprints, view):
+        """Candidates hidden in ``view`` by opaque plugin rasters above them."""
+        project = QgsProject.instance()
+        root = project.layerTreeRoot()
+        candidates = set(candidates)
+        stack = []
+        for layer in root.layerOrder():
+            layer_id = layer.id()
+            if layer_id not in candidates or footprints.get(layer_id) is None:
+                continue
+            node = root.findLayer(layer_id)
+            if node is None:
+                continue
+            if layer.customProperty(SUPPRESSED_PROPERTY):
+                # Nascosto da noi: conta come visibile se lo è il suo gruppo
+                shown = node.parent() is None or node.parent().isVisible()
+            else:
+                shown = node.isVisible()
+            if not shown:
+                continue
+            geometry, outlined = self._outline(layer, footprints[layer_id])
+            renderer = layer.renderer()
+            opaque = renderer is not None and renderer.opacity() >= 1.0
+            stack.append((layer_id, geometry, outlined and opaque))
+        self._outlines = {k: v for k, v in self._outlines.items() if k in candidates}
+        return occluded_ids(stack, QgsGeometry.fromRect(QgsRectangle(*view)))
+
+    def stop(self):
+        """Stop reacting to navigation and restore every deactivated layer."""
+        self._timer.stop()
+        try:
+            self.canvas.extentsChanged.disconnect(self._timer.start)
+        except Exception:
+            pass
+        try:
+            self.suppression.restore_all(self._rasters())
+        except Exception as e:
+            get_logger().debug(f"Cannot restore deactivated layers: {e}")
@@ -0,0 +1,163 @@
+"""
+Band-subset and band-math presets for multispectral COGs.
+
+A preset is a VRT over the remote ``ms_analytic`` COG that references only
+the bands it needs: a band subset for colour composites, or one derived
+band (normalized difference) for indices. GDAL evaluates the VRT per
+requested block, from the source overviews when zoomed out, so a quick-look
+reads 1-3 bands instead of all 4 or 8.
+
+Normalized differences use the built-in ``norm_diff`` pixel function
+(GDAL >= 3.8); older GDAL versions use ``normalized_difference`` below as a
+Python pixel function, enabled for this module only.
+"""
+
+import hashlib
+import os
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+
+from kadas_maxar.paths import get_cache_dir
+
+try:
+    from osgeo import gdal
+except ImportError:
+    gdal = None
+
+# MS band layout by platform
+MS_BAND_COUNT = {"WV02": 8, "WV03": 8, "GE01": 4, "QB02": 4, "WV04": 4}
+# Band number (1-based) of each role by MS band count
+BAND_ROLES = {
+    8: {"coastal": 1, "blue": 2, "green": 3, "yellow": 4, "red": 5, "rededge": 6, "nir": 7, "nir2": 8},
+    4: {"blue": 1, "green": 2, "red": 3, "nir": 4},
+}
+
+PRESET_TRUE_COLOR = "true_color"
+PRESET_FALSE_COLOR = "false_color_ir"
+PRESET_NDVI = "ndvi"
+PRESET_NDWI = "ndwi"
+
+# preset -> (label, kind, band roles); "rgb" = band subset, "index" = (a - b) / (a + b)
+PRESETS = OrderedDict([
+    (PRESET_TRUE_COLOR, ("True colour", "rgb", ("red", "green", "blue"))),
+    (PRESET_FALSE_COLOR, ("False colour IR", "rgb", ("nir", "red", "green"))),
+    (PRESET_NDVI, ("NDVI", "index", ("nir", "red"))),
+    (PRESET_NDWI, ("NDWI", "index", ("green", "nir"))),
+])
+
+_PYTHON_FUNCTION = "kadas_maxar.imagery.band_presets.normalized_difference"
+
+
+def band_numbers(platform, roles, band_count=None):
+    """MS band numbers of ``roles`` for ``platform`` (or the band count), or None."""
+    count = MS_BAND_COUNT.get((platform or "").upper()) or band_count
+    layout = BAND_ROLES.get(count)
+    if layout is None or any(role not in layout for role in roles):
+        return None
+    return tuple(layout[role] for role in roles)
+
+
+def is_index(preset):
+    return PRESETS[preset][1] == "index"
+
+
+def normalized_difference(in_ar, out_ar, *args, **kwargs):
+    """VRT Python pixel function: (a - b) / (a + b), 0 where a + b == 0."""
+    import numpy as np
+
+    a = in_ar[0].astype("float32")
+    b = in_ar[1].astype("float32")
+    total = a + b
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out_ar[:] = np.where(total != 0, (a - b) / total, 0)
+
+
+def _has_norm_diff():
+    return int(gdal.VersionInfo("VERSION_NUM")) >= 3080000
+
+
+def preset_path(source, preset, bands, directory=None):
+    """Cache file of a preset VRT (same source and bands, same file)."""
+    key = "\n".join([source, preset, ",".join(str(b) for b in bands)])
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+    return os.path.join(directory or get_cache_dir("vrt"), f"{preset}_{digest}.vrt")
+
+
+def index_vrt_xml(subset_xml, python=False):
+    """Turn a two-band subset VRT into one normalized-difference band."""
+    root = ET.fromstring(subset_xml)
+    bands = root.findall("VRTRasterBand")
+    derived = ET.Element("VRTRasterBand", {
+        "dataType": "Float32", "band": "1", "subClass": "VRTDerivedRasterBand",
+    })
+    if python:
+        ET.SubElement(derived, "PixelFunctionLanguage").text = "Python"
+        ET.SubElement(derived, "PixelFunctionType").text = _PYTHON_FUNCTION
+    else:
+        ET.SubElement(derived, "PixelFunctionType").text = "norm_diff"
+    ET.SubElement(derived, "NoDataValue").text = "nan"
+    for band in bands:
+        for source in band:
+            if source.tag.endswith("Source"):
+                derived.append(source)
+        root.remove(band)
+    root.append(derived)
+    return ET.tostring(root, encoding="unicode")
+
+
+def build_preset_vrt(source, preset, platform=None, path=None):
+    """Write (or reuse) the VRT of ``preset`` over ``source`` and return its path."""
+    if gdal is None:
+        raise RuntimeError("GDAL Python bindings not available")
+    label, kind, roles = PRESETS[preset]
+    bands = band_numbers(platform, roles)
+    ds = None
+    if bands is None:
+        ds = gdal.Open(source)
+        if ds is None:
+            raise RuntimeError(gdal.GetLastErrorMsg() or f"Cannot open {source}")
+        bands = band_numbers(platform, roles, ds.RasterCount)
+        if bands is None:
+            raise RuntimeError(f"{label} not available for {ds.RasterCount} MS bands")
+    python = kind == "index" and not _has_norm_diff()
+    if python:
+        # Anche per un VRT già in cache: l'apertura richiede la funzione Python
+        gdal.SetConfigOption("GDAL_VRT_ENABLE_PYTHON", "TRUSTED_MODULES")
+        gdal.SetConfigOption("GDAL_VRT_PYTHON_TRUSTED_MODULES", _PYTHON_FUNCTION.rsplit(".", 1)[0])
+    path = path or preset_path(source, f"{preset}_py" if python else preset, bands)
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        return path
+
+    subset = gdal.Translate("", ds or source, format="VRT", bandList=list(bands))
+    if subset is None:
+        raise RuntimeError(gdal.GetLastErrorMsg() or "VRT subset failed")
+    xml = subset.GetMetadata("xml:VRT")[0]
+    subset = None
+    if kind == "index":
+        xml = index_vrt_xml(xml, python=python)
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(xml)
+    os.replace(tmp, path)
+    return path
+
+
+def style_index_layer(layer, minimum=-1.0, maximum=1.0):
+    """Red-yellow-green pseudocolour renderer for an index layer."""
+    from qgis.core import (
+        QgsColorRampShader,
+        QgsRasterShader,
+        QgsSingleBandPseudoColorRenderer,
+        QgsStyle,
+    )
+
+    ramp = QgsStyle.defaultStyle().colorRamp("RdYlGn")
+    function = QgsColorRampShader(minimum, maximum, ramp)
+    function.classifyColorRamp(5)
+    shader = QgsRasterShader(minimum, maximum)
+    shader.setRasterShaderFunction(function)
+    renderer = QgsSingleBandPseudoColorRenderer(layer.dataProvider(), 1, shader)
+    renderer.setClassificationMin(minimum)
+    renderer.setClassificationMax(maximum)
+    layer.setRenderer(renderer)
@@ -0,0 +1,262 @@
+"""
+Persistent byte-range cache for COG reads.
+
+COG files are split into fixed-size, aligned blocks stored in one SQLite
+database under the plugin cache directory, keyed by URL and block number.
+The cache has a disk budget; least recently used blocks are evicted first.
+Hit/miss counters are kept per session for the log.
+
+The size and ETag of every file are stored next to its blocks. They are
+trusted for ``revalidate_after`` seconds; after that ``file_info`` asks for
+a fresh upstream check, and ``set_file_info`` drops the blocks when the
+ETag no longer matches.
+
+``BlockCache.read(url, start, end, fetch)`` returns the requested byte range,
+fetching only the missing runs of blocks (one upstream request per run).
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from kadas_maxar.logger import get_logger
+from kadas_maxar.paths import get_cache_dir
+
+BLOCK_SIZE = 256 * 1024
+DEFAULT_MAX_MB = 2048
+# Seconds a file's size/ETag is trusted before it is checked upstream again
+REVALIDATE_AFTER = 24 * 3600
+
+# After eviction the cache is trimmed to this fraction of the budget, so that
+# eviction does not run on every new block
+_EVICT_TARGET = 0.9
+
+
+def _url_key(url):
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+class BlockCache:
+    """SQLite-backed LRU of COG byte blocks.
+
+    Args:
+        path: database file (default: <cache dir>/blocks/blocks.sqlite)
+        max_bytes: disk budget for block data
+        block_size: size of one block
+        revalidate_after: seconds before a file's ETag is checked again
+    """
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_MB * 1024 * 1024, block_size=BLOCK_SIZE,
+                 revalidate_after=REVALIDATE_AFTER):
+        self.path = path or os.path.join(get_cache_dir("blocks"), "blocks.sqlite")
+        self.max_bytes = max_bytes
+        self.block_size = block_size
+        self.revalidate_after = revalidate_after
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                key TEXT PRIMARY KEY, url TEXT, size INTEGER, etag TEXT, block_size INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS blocks (
+                key TEXT, block INTEGER, data BLOB, size INTEGER, atime REAL,
+                PRIMARY KEY (key, block)
+            );
+            CREATE INDEX IF NOT EXISTS blocks_atime ON blocks (atime);
+            """
+        )
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(files)")]
+        if "checked" not in columns:
+            # Caches of older versions: every file is revalidated on first use
+            self._db.execute("ALTER TABLE files ADD COLUMN checked REAL DEFAULT 0")
+        self.nbytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blocks").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.bytes_served = 0
+        self.bytes_fetched = 0
+        self.evictions = 0
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # -- file metadata -----------------------------------------------------
+
+    def file_info(self, url, fresh=True):
+        """(size, etag) of a known file or None.
+
+        With ``fresh`` the info is returned only if it was checked upstream
+        less than ``revalidate_after`` seconds ago.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT size, etag, block_size, checked FROM files WHERE key = ?", (_url_key(url),)
+            ).fetchone()
+        if row is None or row[2] != self.block_size:
+            return None
+        if fresh and time.time() - (row[3] or 0) > self.revalidate_after:
+            return None
+        return row[0], row[1]
+
+    def set_file_info(self, url, size, etag=None):
+        """Record size/ETag of ``url`` as just checked upstream.
+
+        Cached blocks are dropped if the ETag (or, without ETags, the size)
+        changed.
+        """
+        key = _url_key(url)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, block_size, size FROM files WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and (
+                row[1] != self.block_size or (etag and row[0] and row[0] != etag) or row[2] != size
+            ):
+                self._drop_blocks(key)
+            self._db.execute(
+                "INSERT OR REPLACE INTO files (key, url, size, etag, block_size, checked) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, url, size, etag, self.block_size, time.time()),
+            )
+
+    def _drop_blocks(self, key):
+        freed = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM blocks WHERE key = ?", (key,)
+        ).fetchone()[0]
+        self._db.execute("DELETE FROM blocks WHERE key = ?", (key,))
+        self.nbytes -= freed
+
+    # -- blocks --------------------------------------------------------------
+
+    def _get_blocks(self, key, first, last):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT block, data FROM blocks WHERE key = ? AND block BETWEEN ? AND ?",
+                (key, first, last),
+            ).fetchall()
+            self.hits += len(rows)
+            if rows:
+                self._db.execute(
+                    "UPDATE blocks SET atime = ? WHERE key = ? AND block BETWEEN ? AND ?",
+                    (time.time(), key, first, last),
+                )
+        return {block: bytes(data) for block, data in rows}
+
+    def _put_blocks(self, key, blocks):
+        now = time.time()
+        with self._lock:
+            added = 0
+            self._db.execute("BEGIN")
+            try:
+                for block, data in blocks.items():
+                    previous = self._db.execute(
+                        "SELECT size FROM blocks WHERE key = ? AND block = ?", (key, block)
+                    ).fetchone()
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO blocks (key, block, data, size, atime) VALUES (?, ?, ?, ?, ?)",
+                        (key, block, sqlite3.Binary(data), len(data), now),
+                    )
+                    added += len(data) - (previous[0] if previous else 0)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            self.nbytes += added
+            if self.nbytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        target = int(self.max_bytes * _EVICT_TARGET)
+        while self.nbytes > target:
+            rows = self._db.execute(
+                "SELECT key, block, size FROM blocks ORDER BY atime LIMIT 256"
+            ).fetchall()
+            if not rows:
+                self.nbytes = 0
+                break
+            self._db.execute("BEGIN")
+            for key, block, size in rows:
+                self._db.execute("DELETE FROM blocks WHERE key = ? AND block = ?", (key, block))
+                self.nbytes -= size
+                self.evictions += 1
+                if self.nbytes <= target:
+                    break
+            self._db.execute("COMMIT")
+
+    def read(self, url, start, end, fetch):
+        """Bytes ``start``..``end`` (inclusive) of ``url``.
+
+        ``fetch(url, start, end)`` must return the upstream bytes of an
+        inclusive range (shorter at end of file). Missing blocks are fetched
+        in contiguous runs and stored.
+        """
+        if end < start:
+            return b""
+        key = _url_key(url)
+        bs = self.block_size
+        first, last = start // bs, end // bs
+        blocks = self._get_blocks(key, first, last)
+
+        fetched = {}
+        block = first
+        while block <= last:
+            if block in blocks:
+                block += 1
+                continue
+            run_end = block
+            while run_end + 1 <= last and run_end + 1 not in blocks:
+                run_end += 1
+            data = fetch(url, block * bs, (run_end + 1) * bs - 1)
+            # Concurrent reads from the HTTP server threads
+            with self._lock:
+                self.misses += run_end - block + 1
+                self.bytes_fetched += len(data)
+            for i in range(block, run_end + 1):
+                piece = data[(i - block) * bs:(i - block + 1) * bs]
+                if piece:
+                    fetched[i] = piece
+            block = run_end + 1
+        if fetched:
+            self._put_blocks(key, fetched)
+            blocks.update(fetched)
+
+        out = b"".join(blocks.get(i, b"") for i in range(first, last + 1))
+        out = out[start - first * bs:end - first * bs + 1]
+        with self._lock:
+            self.bytes_served += len(out)
+        return out
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM blocks")
+            self._db.execute("DELETE FROM files")
+            self._db.execute("VACUUM")
+            self.nbytes = 0
+
+    def stats(self):
+        return {
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bytes_served": self.bytes_served,
+            "bytes_fetched": self.bytes_fetched,
+            "evictions": self.evictions,
+        }
+
+    def stats_text(self):
+        s = self.stats()
+        total = s["hits"] + s["misses"]
+        ratio = f"{100.0 * s['hits'] / total:.0f}%" if total else "-"
+        return (
+            f"{s['bytes'] / 1048576:.0f}/{s['max_bytes'] / 1048576:.0f} MB on disk, "
+            f"blocks hit {s['hits']} / miss {s['misses']} ({ratio}), "
+            f"{s['bytes_fetched'] / 1048576:.1f} MB fetched, evictions {s['evictions']}"
+        )
+
+    def log_stats(self):
+        get_logger().info(f"Block cache: {self.stats_text()}")
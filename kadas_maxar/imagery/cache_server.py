@@ -0,0 +1,267 @@
+"""
+Local HTTP range server in front of the persistent block cache.
+
+GDAL has no Python hook to plug a custom /vsi handler, so the plugin points
+``/vsicurl/`` at ``http://127.0.0.1:<port>/c/<encoded url>/<file name>``.
+The server answers HEAD and ranged GET requests from ``BlockCache`` and only
+goes to the network for missing blocks. Only the Open Data bucket prefixes
+are served; the socket is bound to localhost.
+
+Upstream requests use urllib, which honours the proxy environment variables
+set by the plugin from the KADAS proxy settings. GDAL reaches the server
+without proxy through a path-specific option of the access profile; with
+GDAL < 3.6 ``127.0.0.1`` is added to ``NO_PROXY`` while the server runs.
+"""
+
+import base64
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.request import Request, urlopen
+
+from kadas_maxar.logger import get_logger
+from kadas_maxar.imagery.block_cache import BlockCache
+from kadas_maxar.imagery.gdal_profile import COG_URL_PREFIXES, CogAccessProfile
+
+# Preferred port: stable URLs across sessions keep cached VRT mosaics valid
+DEFAULT_PORT = 47821
+UPSTREAM_TIMEOUT = 60
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)$")
+# Body chunk for full-file responses
+_STREAM_CHUNK = 4 * 1024 * 1024
+
+
+def encode_url(url):
+    return base64.urlsafe_b64encode(url.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_url(token):
+    return base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode("utf-8")
+
+
+def _content_range_total(value):
+    try:
+        return int(value.rsplit("/", 1)[1])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def fetch_range(url, start, end):
+    """Upstream bytes ``start``..``end`` (inclusive) of ``url``."""
+    req = Request(url, headers={"Range": f"bytes={start}-{end}", "User-Agent": "KADAS-Vantor-Plugin"})
+    with urlopen(req, timeout=UPSTREAM_TIMEOUT) as response:
+        data = response.read()
+        expected = response.headers.get("Content-Length")
+    if expected is not None and len(data) != int(expected):
+        raise IOError(f"Short read from {url}: {len(data)} of {expected} bytes")
+    return data
+
+
+def fetch_info(url):
+    """(size, etag) of ``url`` from a one-byte ranged GET."""
+    req = Request(url, headers={"Range": "bytes=0-0", "User-Agent": "KADAS-Vantor-Plugin"})
+    with urlopen(req, timeout=UPSTREAM_TIMEOUT) as response:
+        size = _content_range_total(response.headers.get("Content-Range"))
+        if size is None:
+            size = int(response.headers.get("Content-Length", 0))
+        return size, response.headers.get("ETag")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _target(self):
+        parts = self.path.split("/")
+        if len(parts) < 3 or parts[1] != "c":
+            return None
+        try:
+            url = decode_url(parts[2])
+        except Exception:
+            return None
+        if not url.startswith(self.server.prefixes):
+            return None
+        return url
+
+    def _info(self, url):
+        cache = self.server.cache
+        info = cache.file_info(url)
+        if info is not None:
+            return info
+        try:
+            info = fetch_info(url)
+        except Exception as e:
+            # Offline: the blocks already cached stay usable until the next check
+            info = cache.file_info(url, fresh=False)
+            if info is None:
+                raise
+            get_logger().debug(f"Block cache: cannot revalidate {url}, using cached info: {e}")
+            return info
+        # A changed ETag drops the cached blocks of the file
+        cache.set_file_info(url, *info)
+        return info
+
+    def do_HEAD(self):
+        self._respond(body=False)
+
+    def do_GET(self):
+        self._respond(body=True)
+
+    def _respond(self, body):
+        url = self._target()
+        if url is None:
+            self.send_error(404)
+            return
+        try:
+            size, etag = self._info(url)
+        except Exception as e:
+            get_logger().warning(f"Block cache: cannot reach {url}: {e}")
+            self.send_error(502, str(e))
+            return
+
+        start, end, status = 0, size - 1, 200
+        match = _RANGE.match(self.headers.get("Range", "").strip())
+        if match:
+            first, last = match.groups()
+            if first:
+                start = int(first)
+                end = min(int(last), size - 1) if last else size - 1
+            elif last:  # suffix range
+                start = max(size - int(last), 0)
+            status = 206
+            if start >= size:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+        self.send_response(status)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Type", "image/tiff")
+        self.send_header("Content-Length", str(end - start + 1))
+        if etag:
+            self.send_header("ETag", etag)
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        if not body:
+            return
+        try:
+            position = start
+            while position <= end:
+                chunk_end = min(position + _STREAM_CHUNK - 1, end)
+                self.wfile.write(self.server.cache.read(url, position, chunk_end, fetch_range))
+                position = chunk_end + 1
+        except Exception as e:
+            get_logger().warning(f"Block cache: read of {url} [{start}-{end}] failed: {e}")
+            self.close_connection = True
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = False
+
+
+class CacheServer:
+    """Background localhost server backed by a BlockCache."""
+
+    def __init__(self, cache=None, port=DEFAULT_PORT, prefixes=COG_URL_PREFIXES):
+        self.cache = cache or BlockCache()
+        self.preferred_port = port
+        self.prefixes = tuple(prefixes)
+        self._server = None
+        self._thread = None
+        self._proxy_env = None  # NO_PROXY values replaced by _bypass_proxy
+
+    @property
+    def running(self):
+        return self._server is not None
+
+    @property
+    def prefix(self):
+        """URL prefix of the proxied files (for GDAL path-specific options)."""
+        return f"http://127.0.0.1:{self._server.server_address[1]}/c/"
+
+    def start(self):
+        if self._server is not None:
+            return self
+        try:
+            server = _Server(("127.0.0.1", self.preferred_port), _Handler)
+        except OSError:
+            server = _Server(("127.0.0.1", 0), _Handler)
+        server.cache = self.cache
+        server.prefixes = self.prefixes
+        self._server = server
+        self._thread = threading.Thread(target=server.serve_forever, name="kadas-maxar-block-cache", daemon=True)
+        self._thread.start()
+        if not CogAccessProfile.supports_path_options():
+            self._bypass_proxy()
+        get_logger().info(f"Block cache server on {self.prefix} ({self.cache.path})")
+        return self
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join(5)
+        self._server = None
+        self._thread = None
+        self._restore_proxy()
+        self.cache.log_stats()
+
+    def url_for(self, url):
+        """Local URL serving ``url`` through the cache (``url`` if not cacheable)."""
+        if self._server is None or not url.startswith(self.prefixes):
+            return url
+        name = url.rsplit("/", 1)[-1] or "file.tif"
+        return f"{self.prefix}{encode_url(url)}/{name}"
+
+    def _bypass_proxy(self):
+        """GDAL (curl) must reach 127.0.0.1 directly even with a proxy configured.
+
+        Only used without path-specific GDAL options; ``stop`` restores the
+        previous values.
+        """
+        self._proxy_env = {var: os.environ.get(var) for var in ("NO_PROXY", "no_proxy")}
+        for var, current in self._proxy_env.items():
+            hosts = [h.strip() for h in (current or "").split(",") if h.strip()]
+            if "127.0.0.1" not in hosts:
+                os.environ[var] = ",".join(hosts + ["127.0.0.1"])
+
+    def _restore_proxy(self):
+        if self._proxy_env is None:
+            return
+        for var, value in self._proxy_env.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+        self._proxy_env = None
+
+
+_server = None
+
+
+def block_cache_server(enabled=True, max_mb=None):
+    """Shared, lazily started CacheServer (None when disabled)."""
+    global _server
+    if not enabled:
+        if _server is not None:
+            _server.stop()
+            _server.cache.close()
+            _server = None
+        return None
+    if _server is None:
+        _server = CacheServer()
+    if max_mb is not None:
+        _server.cache.max_bytes = max_mb * 1024 * 1024
+    return _server.start()
+
+
+def shutdown_block_cache():
+    block_cache_server(enabled=False)
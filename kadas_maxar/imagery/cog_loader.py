@@ -0,0 +1,244 @@
+"""
+Background opening of COG raster layers.
+
+Constructing ``QgsRasterLayer("/vsicurl/...")`` blocks on the HTTP header and
+IFD requests of the remote GeoTIFF. ``CogLoadManager`` runs those opens in a
+small pool of QThreads (bounded by the ``max_downloads`` setting), hands every
+valid layer back to the GUI thread as soon as it is ready and emits a single
+aggregated report when the batch is done or cancelled.
+"""
+
+from qgis.PyQt.QtCore import QObject, QThread, QCoreApplication, pyqtSignal
+from qgis.core import Qgis, QgsRasterLayer
+
+from kadas_maxar.logger import get_logger
+from kadas_maxar.imagery.cog_metadata import cog_metadata_cache
+from kadas_maxar.imagery.gdal_profile import cog_access_profile
+from kadas_maxar.imagery.mosaic import build_mosaic
+from kadas_maxar.imagery.stretch import renderer_bands, stretch_cache
+
+
+class CogJob:
+    """One raster to open.
+
+    With ``sources`` the job is a mosaic: a VRT over the sources is built in
+    the worker and ``source`` is set to its path. ``build`` is a callable run
+    in the worker that returns the source (e.g. a pansharpening VRT).
+    Layers with the same ``group`` (acquisition) share one contrast stretch.
+    ``tree_group`` is the layer-tree group path (event, acquisition) and
+    ``footprint`` the WGS84 bbox of the record and ``outline`` its footprint
+    polygon (WKT), when known. ``members`` maps the URL of every COG read by
+    the layer to its GDAL source (by default ``url`` to ``source``).
+    """
+
+    __slots__ = ("source", "name", "provider", "url", "record_index", "imagery_type", "sources", "build",
+                 "group", "tree_group", "footprint", "outline", "members")
+
+    def __init__(self, source, name, provider="gdal", url=None, record_index=None, imagery_type=None,
+                 sources=None, build=None, group=None, members=None):
+        self.source = source
+        self.name = name
+        self.provider = provider
+        self.url = url or source
+        self.record_index = record_index
+        self.imagery_type = imagery_type
+        self.sources = sources
+        self.build = build
+        self.group = group
+        self.tree_group = ()
+        self.footprint = None
+        self.outline = None
+        if members is None:
+            members = {self.url: source} if source and self.url != source else {}
+        self.members = members
+
+    @property
+    def stats_key(self):
+        """Key of the cached statistics: the COG URL, or the generated VRT."""
+        return self.source if (self.sources or self.build) else self.url
+
+    def __repr__(self):
+        return f"CogJob({self.name!r})"
+
+
+class CogLoadReport:
+    """Aggregated outcome of a batch of COG opens."""
+
+    def __init__(self):
+        self.total = 0
+        self.loaded = []  # layer names
+        self.failed = []  # (CogJob, error message)
+        self.unavailable = 0  # footprints without the requested asset
+        self.cancelled = 0
+
+    @property
+    def done(self):
+        return len(self.loaded) + len(self.failed)
+
+    def summary(self):
+        """Short text for the status label."""
+        parts = [f"Caricate {len(self.loaded)}/{self.total} immagini"]
+        if self.failed:
+            parts.append(f"{len(self.failed)} errori")
+        if self.cancelled:
+            parts.append(f"{self.cancelled} annullate")
+        if self.unavailable:
+            parts.append(f"{self.unavailable} non disponibili")
+        return ", ".join(parts)
+
+    def failure_details(self, limit=10):
+        """Failure list for a single message box (at most ``limit`` lines)."""
+        lines = [f"- {job.name}: {error}" for job, error in self.failed[:limit]]
+        if len(self.failed) > limit:
+            lines.append(f"... e altri {len(self.failed) - limit}")
+        return "\n".join(lines)
+
+
+class CogOpenWorker(QThread):
+    """Opens one raster layer off the GUI thread."""
+
+    opened = pyqtSignal(object, object)  # CogJob, QgsRasterLayer
+    failed = pyqtSignal(object, str)  # CogJob, error message
+
+    def __init__(self, job):
+        super().__init__()
+        self.job = job
+
+    def run(self):
+        job = self.job
+        try:
+            with cog_access_profile().opening():
+                if job.sources:
+                    job.source = build_mosaic(job.sources)
+                elif job.build is not None:
+                    job.source = job.build()
+                layer = QgsRasterLayer(job.source, job.name, job.provider)
+            if not layer.isValid():
+                error = layer.error().summary() if layer.error() is not None else ""
+                self.failed.emit(job, error or "layer non valido")
+                return
+            self._cache_metadata(job)
+            self._cache_statistics(job, layer)
+            # Il layer è stato creato in questo thread: va spostato nel thread GUI
+            layer.moveToThread(QCoreApplication.instance().thread())
+            self.opened.emit(job, layer)
+        except Exception as e:
+            get_logger().error(f"Error opening {job.url}: {e}", exc_info=True)
+            self.failed.emit(job, str(e))
+
+    @staticmethod
+    def _cache_metadata(job):
+        """Metadati del COG remoto: le aperture successive usano un VRT locale."""
+        if job.sources or job.build is not None or not job.source.startswith("/vsicurl"):
+            return
+        try:
+            cog_metadata_cache().record(job.url, job.source)
+        except Exception as e:
+            get_logger().debug(f"No cached metadata for {job.name}: {e}")
+
+    @staticmethod
+    def _cache_statistics(job, layer):
+        """Statistiche dalla overview più piccola (solo dati non a 8 bit)."""
+        bands = renderer_bands(layer)
+        if not job.group or not bands or layer.dataProvider().dataType(bands[0]) == Qgis.Byte:
+            return
+        try:
+            stretch_cache().statistics(job.stats_key, job.source, bands, job.group)
+        except Exception as e:
+            get_logger().warning(f"No cached statistics for {job.name}: {e}")
+
+
+class CogLoadManager(QObject):
+    """Bounded pool of CogOpenWorker threads.
+
+    Jobs queued while a batch is running are added to the same report.
+    ``layerReady`` is emitted in the GUI thread for every valid layer,
+    ``finished`` once with the CogLoadReport.
+    """
+
+    layerReady = pyqtSignal(object, object)  # CogJob, QgsRasterLayer
+    progress = pyqtSignal(int, int)  # done, total
+    finished = pyqtSignal(object)  # CogLoadReport
+
+    def __init__(self, max_concurrent=3, parent=None):
+        super().__init__(parent)
+        self.max_concurrent = max(1, int(max_concurrent))
+        self._queue = []
+        self._running = set()
+        # Worker annullati ancora in esecuzione (GDAL open non interrompibile):
+        # tenuti in vita fino alla fine, il risultato viene scartato
+        self._orphans = set()
+        self.report = CogLoadReport()
+
+    def isRunning(self):
+        return bool(self._queue or self._running)
+
+    def start(self, jobs, unavailable=0):
+        """Queue ``jobs`` and start workers up to ``max_concurrent``."""
+        if not self.isRunning():
+            self.report = CogLoadReport()
+        self.report.total += len(jobs)
+        self.report.unavailable += unavailable
+        self._queue.extend(jobs)
+        self.progress.emit(self.report.done, self.report.total)
+        self._fill()
+        if not self.isRunning():
+            self._finish()
+
+    def cancel(self):
+        """Drop queued jobs; opens already in flight are discarded on arrival."""
+        if not self.isRunning():
+            return
+        self.report.cancelled += len(self._queue) + len(self._running)
+        self._queue = []
+        self._orphans |= self._running
+        self._running = set()
+        get_logger().info(f"COG loading cancelled ({self.report.cancelled} pending)")
+        self._finish()
+
+    def shutdown(self, timeout_ms=5000):
+        """Cancel and wait for the workers still running (plugin unload)."""
+        self.cancel()
+        for worker in list(self._orphans):
+            worker.wait(timeout_ms)
+        self._orphans.clear()
+
+    def _fill(self):
+        while self._queue and len(self._running) < self.max_concurrent:
+            worker = CogOpenWorker(self._queue.pop(0))
+            worker.opened.connect(self._on_opened)
+            worker.failed.connect(self._on_failed)
+            worker.finished.connect(self._on_worker_finished)
+            self._running.add(worker)
+            worker.start()
+
+    def _on_opened(self, job, layer):
+        if self.sender() in self._orphans:
+            # Layer non aggiunto: senza riferimenti viene distrutto
+            return
+        self.report.loaded.append(job.name)
+        get_logger().info(f"Loaded COG: {job.name}")
+        self.layerReady.emit(job, layer)
+        self.progress.emit(self.report.done, self.report.total)
+
+    def _on_failed(self, job, error):
+        if self.sender() in self._orphans:
+            return
+        self.report.failed.append((job, error))
+        get_logger().error(f"Failed to load COG: {job.url} ({error})")
+        self.progress.emit(self.report.done, self.report.total)
+
+    def _on_worker_finished(self):
+        worker = self.sender()
+        if worker in self._orphans:
+            self._orphans.discard(worker)
+            return
+        self._running.discard(worker)
+        self._fill()
+        if not self.isRunning():
+            self._finish()
+
+    def _finish(self):
+        report = self.report
+        get_logger().info(f"COG batch finished: {report.summary()}")
+        self.finished.emit(report)
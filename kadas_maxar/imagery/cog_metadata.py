@@ -0,0 +1,205 @@
+"""
+Persistent cache of COG metadata and local VRT wrappers.
+
+The first time a tile is opened, its parsed metadata (file size, raster
+size, bands, data types, block size, nodata, geotransform, CRS, overviews
+and the length of the header block, i.e. the bytes before the first tile)
+is stored as JSON per URL under the plugin cache directory.
+
+Later opens use a local VRT written from that metadata. Its sources carry
+``SourceProperties``, so GDAL does not open the remote file until pixels
+are read, and every COG overview is declared explicitly (a small VRT per
+level, opening the source with ``OVERVIEW_LEVEL``). Creating the layer
+therefore needs no network round-trip; the header is fetched on the first
+rendered block, from the block cache when it is enabled.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from xml.sax.saxutils import escape
+
+from kadas_maxar.logger import get_logger
+from kadas_maxar.paths import get_cache_dir
+
+try:
+    from osgeo import gdal
+except ImportError:
+    gdal = None
+
+METADATA_VERSION = 1
+
+
+def _key(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def read_metadata(source):
+    """Metadata dict of the raster ``source`` (opened with GDAL)."""
+    if gdal is None:
+        raise RuntimeError("GDAL Python bindings not available")
+    ds = gdal.Open(source)
+    if ds is None:
+        raise RuntimeError(gdal.GetLastErrorMsg() or f"Cannot open {source}")
+    first = ds.GetRasterBand(1)
+    bands = []
+    for i in range(ds.RasterCount):
+        band = ds.GetRasterBand(i + 1)
+        bands.append({
+            "type": gdal.GetDataTypeName(band.DataType),
+            "block": list(band.GetBlockSize()),
+            "nodata": band.GetNoDataValue(),
+            "color": gdal.GetColorInterpretationName(band.GetColorInterpretation()),
+        })
+    overviews = []
+    for i in range(first.GetOverviewCount()):
+        ovr = first.GetOverview(i)
+        overviews.append({"size": [ovr.XSize, ovr.YSize], "block": list(ovr.GetBlockSize())})
+
+    # Header COG: IFD e tag prima del primo blocco dati (di solito l'overview più piccola)
+    offsets = []
+    for band in [first] + [first.GetOverview(i) for i in range(first.GetOverviewCount())]:
+        offset = band.GetMetadataItem("BLOCK_OFFSET_0_0", "TIFF")
+        if offset:
+            offsets.append(int(offset))
+    stat = gdal.VSIStatL(source)
+    return {
+        "version": METADATA_VERSION,
+        "file_size": stat.size if stat is not None else None,
+        "header_bytes": min(offsets) if offsets else None,
+        "size": [ds.RasterXSize, ds.RasterYSize],
+        "geotransform": list(ds.GetGeoTransform()),
+        "srs": ds.GetProjection(),
+        "bands": bands,
+        "overviews": overviews,
+    }
+
+
+def _vrt_xml(meta, source, size, overview_level=None, overview_files=()):
+    width, height = size
+    gt = list(meta["geotransform"])
+    if overview_level is not None:
+        gt[1] *= meta["size"][0] / width
+        gt[5] *= meta["size"][1] / height
+    lines = [
+        f'<VRTDataset rasterXSize="{width}" rasterYSize="{height}">',
+        f"  <SRS>{escape(meta['srs'] or '')}</SRS>",
+        f"  <GeoTransform>{', '.join(repr(float(v)) for v in gt)}</GeoTransform>",
+    ]
+    block = meta["overviews"][overview_level]["block"] if overview_level is not None else None
+    for number, band in enumerate(meta["bands"], start=1):
+        bx, by = block or band["block"]
+        lines.append(f'  <VRTRasterBand dataType="{band["type"]}" band="{number}">')
+        if band["nodata"] is not None:
+            lines.append(f"    <NoDataValue>{band['nodata']!r}</NoDataValue>")
+        if band["color"] and band["color"] != "Undefined":
+            lines.append(f"    <ColorInterp>{band['color']}</ColorInterp>")
+        lines.append("    <SimpleSource>")
+        lines.append(f'      <SourceFilename relativeToVRT="0">{escape(source)}</SourceFilename>')
+        if overview_level is not None:
+            lines.append(f'      <OpenOptions><OOI key="OVERVIEW_LEVEL">{overview_level}</OOI></OpenOptions>')
+        lines.append(f"      <SourceBand>{number}</SourceBand>")
+        # Con SourceProperties il sorgente viene aperto solo alla prima lettura
+        lines.append(
+            f'      <SourceProperties RasterXSize="{width}" RasterYSize="{height}" '
+            f'DataType="{band["type"]}" BlockXSize="{bx}" BlockYSize="{by}"/>'
+        )
+        lines.append(f'      <SrcRect xOff="0" yOff="0" xSize="{width}" ySize="{height}"/>')
+        lines.append(f'      <DstRect xOff="0" yOff="0" xSize="{width}" ySize="{height}"/>')
+        lines.append("    </SimpleSource>")
+        for path in overview_files:
+            lines.append("    <Overview>")
+            lines.append(f"      <SourceFilename relativeToVRT=\"1\">{escape(os.path.basename(path))}</SourceFilename>")
+            lines.append(f"      <SourceBand>{number}</SourceBand>")
+            lines.append("    </Overview>")
+        lines.append("  </VRTRasterBand>")
+    lines.append("</VRTDataset>")
+    return "\n".join(lines) + "\n"
+
+
+def write_wrapper(meta, source, directory):
+    """Write the wrapper VRT (and one VRT per overview) for ``source``; returns its path."""
+    digest = _key(source)[:20]
+    path = os.path.join(directory, f"cog_{digest}.vrt")
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        return path
+    files = {}
+    overview_files = []
+    for level, overview in enumerate(meta["overviews"]):
+        ovr_path = os.path.join(directory, f"cog_{digest}_ovr{level}.vrt")
+        files[ovr_path] = _vrt_xml(meta, source, overview["size"], overview_level=level)
+        overview_files.append(ovr_path)
+    files[path] = _vrt_xml(meta, source, meta["size"], overview_files=overview_files)
+    # Il file principale per ultimo: la sua presenza indica un wrapper completo
+    for target, xml in files.items():
+        tmp = f"{target}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(xml)
+        os.replace(tmp, target)
+    return path
+
+
+class CogMetadataCache:
+    """Per-URL COG metadata on disk, with an in-memory index."""
+
+    def __init__(self, directory=None):
+        self.directory = directory or get_cache_dir("cog_meta")
+        self._lock = threading.Lock()
+        self._memory = {}
+
+    def _path(self, url):
+        return os.path.join(self.directory, f"{_key(url)}.json")
+
+    def get(self, url):
+        """Cached metadata of ``url`` or None."""
+        with self._lock:
+            meta = self._memory.get(url)
+        if meta is not None:
+            return meta
+        try:
+            with open(self._path(url), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("version") != METADATA_VERSION:
+            return None
+        with self._lock:
+            self._memory[url] = meta
+        return meta
+
+    def record(self, url, source):
+        """Read and store the metadata of ``url`` (opened as ``source``) if missing."""
+        meta = self.get(url)
+        if meta is not None:
+            return meta
+        meta = read_metadata(source)
+        tmp = f"{self._path(url)}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._path(url))
+        with self._lock:
+            self._memory[url] = meta
+        return meta
+
+    def wrapper(self, url, source):
+        """Local VRT opening ``source`` without network access, or None if unknown."""
+        meta = self.get(url)
+        if meta is None:
+            return None
+        try:
+            return write_wrapper(meta, source, self.directory)
+        except OSError as e:
+            get_logger().warning(f"Cannot write VRT wrapper for {url}: {e}")
+            return None
+
+
+_cache = None
+
+
+def cog_metadata_cache():
+    """Shared CogMetadataCache."""
+    global _cache
+    if _cache is None:
+        _cache = CogMetadataCache()
+    return _cache
@@ -0,0 +1,358 @@
+"""
+Parallel, resumable download of COG files.
+
+Every file is split into fixed-size chunks fetched with ranged GETs by a pool
+of ``max_downloads`` connections shared by the whole batch. Chunks are
+written in place into a preallocated ``<file>.part``; the queue (with the
+completed chunks of every file) is persisted as JSON under the plugin cache
+directory, so an interrupted batch resumes after a restart from the missing
+chunks only.
+
+A finished file is checked against the upstream size and, when the S3 ETag
+is a plain MD5 (single-part upload), against its checksum before the
+``.part`` file is renamed.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+from qgis.PyQt.QtCore import QThread, pyqtSignal
+
+from kadas_maxar.logger import get_logger
+from kadas_maxar.paths import get_cache_dir
+from kadas_maxar.imagery.cache_server import fetch_info, fetch_range
+
+CHUNK_SIZE = 8 * 1024 * 1024
+
+STATUS_QUEUED = "queued"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+# Queue file written at most once per interval while chunks complete
+_SAVE_INTERVAL = 1.0
+_MD5_ETAG = re.compile(r'^"?([0-9a-fA-F]{32})"?$')
+
+
+def default_download_dir():
+    return get_cache_dir("downloads", "files")
+
+
+def local_path(url, root):
+    """Local file for ``url``: the URL path mirrored under ``root``."""
+    parts = [p for p in urlparse(url).path.split("/") if p and p not in (".", "..")]
+    return os.path.join(root, *parts) if parts else os.path.join(root, "download.tif")
+
+
+class DownloadTask:
+    """One file of the download queue."""
+
+    __slots__ = ("url", "path", "name", "size", "etag", "chunks", "status", "error")
+
+    def __init__(self, url, path, name=None, size=None, etag=None, chunks=(), status=STATUS_QUEUED,
+                 error=None):
+        self.url = url
+        self.path = path
+        self.name = name or os.path.basename(path)
+        self.size = size
+        self.etag = etag
+        self.chunks = set(chunks)  # completed chunk numbers
+        self.status = status
+        self.error = error
+
+    @property
+    def part_path(self):
+        return f"{self.path}.part"
+
+    def chunk_count(self, chunk_size=CHUNK_SIZE):
+        return -(-self.size // chunk_size) if self.size else 0
+
+    def bytes_done(self, chunk_size=CHUNK_SIZE):
+        if not self.size:
+            return 0
+        done = len(self.chunks) * chunk_size
+        if self.chunk_count(chunk_size) - 1 in self.chunks:
+            done -= self.chunk_count(chunk_size) * chunk_size - self.size
+        return done
+
+    def to_dict(self):
+        return {
+            "url": self.url, "path": self.path, "name": self.name, "size": self.size,
+            "etag": self.etag, "chunks": sorted(self.chunks), "status": self.status,
+            "error": self.error,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{key: data.get(key) for key in cls.__slots__ if key in data})
+
+    def __repr__(self):
+        return f"DownloadTask({self.name!r}, {self.status})"
+
+
+class DownloadQueue:
+    """Persistent, ordered download queue keyed by URL."""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(get_cache_dir("downloads"), "queue.json")
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._tasks = {t["url"]: DownloadTask.from_dict(t) for t in data.get("tasks", [])}
+        except FileNotFoundError:
+            self._tasks = {}
+        except Exception as e:
+            get_logger().warning(f"Download queue unreadable, starting empty: {e}")
+            self._tasks = {}
+
+    def save(self):
+        with self._lock:
+            data = {"tasks": [task.to_dict() for task in self._tasks.values()]}
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def __iter__(self):
+        return iter(list(self._tasks.values()))
+
+    def get(self, url):
+        return self._tasks.get(url)
+
+    def add(self, task):
+        """Queue ``task``; False if the URL is already queued or downloaded."""
+        with self._lock:
+            existing = self._tasks.get(task.url)
+            if existing is None:
+                self._tasks[task.url] = task
+                return True
+            if existing.status == STATUS_QUEUED:
+                return False
+            if existing.status == STATUS_DONE and os.path.exists(existing.path):
+                return False
+            # Nuovo tentativo: i chunk già scaricati restano validi
+            existing.status, existing.error = STATUS_QUEUED, None
+            return True
+
+    def pending(self):
+        return [task for task in self._tasks.values() if task.status == STATUS_QUEUED]
+
+    def local_file(self, url):
+        """Path of the downloaded copy of ``url`` or None."""
+        task = self._tasks.get(url)
+        if task is not None and task.status == STATUS_DONE and os.path.exists(task.path):
+            return task.path
+        return None
+
+
+def verify(task, block=4 * 1024 * 1024):
+    """Error message if the downloaded ``.part`` does not match, else None."""
+    actual = os.path.getsize(task.part_path)
+    if actual != task.size:
+        return f"size {actual} != {task.size}"
+    match = _MD5_ETAG.match(task.etag or "")
+    if match is None:
+        # ETag multipart (``<md5>-<n>``): solo controllo dimensione
+        return None
+    md5 = hashlib.md5()
+    with open(task.part_path, "rb") as f:
+        for piece in iter(lambda: f.read(block), b""):
+            md5.update(piece)
+    if md5.hexdigest() != match.group(1).lower():
+        return "checksum MD5 non corrispondente"
+    return None
+
+
+class Downloader:
+    """Downloads queued tasks with one pool of ``max_workers`` connections.
+
+    ``fetch_info(url) -> (size, etag)`` and ``fetch_range(url, start, end)``
+    (inclusive range) default to the urllib helpers of the block cache.
+    """
+
+    def __init__(self, queue, max_workers=3, chunk_size=CHUNK_SIZE, fetch_info=fetch_info,
+                 fetch_range=fetch_range):
+        self.queue = queue
+        self.max_workers = max(1, int(max_workers))
+        self.chunk_size = chunk_size
+        self.fetch_info = fetch_info
+        self.fetch_range = fetch_range
+        self._cancelled = threading.Event()
+        self._last_save = 0.0
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def _prepare(self, task):
+        """Size/ETag and preallocated ``.part``; stale chunks are dropped."""
+        size, etag = self.fetch_info(task.url)
+        if task.size != size or (etag and task.etag and etag != task.etag):
+            task.chunks = set()
+        task.size, task.etag = size, etag
+        if not os.path.exists(task.part_path) or os.path.getsize(task.part_path) != size:
+            task.chunks = set()
+            os.makedirs(os.path.dirname(task.path) or ".", exist_ok=True)
+            with open(task.part_path, "wb") as f:
+                f.truncate(size)
+
+    def _chunk(self, task, chunk):
+        if self.cancelled or task.status != STATUS_QUEUED:
+            return False
+        start = chunk * self.chunk_size
+        end = min(start + self.chunk_size, task.size) - 1
+        data = self.fetch_range(task.url, start, end)
+        if len(data) != end - start + 1:
+            raise IOError(f"chunk {chunk}: {len(data)} of {end - start + 1} bytes")
+        with open(task.part_path, "r+b") as f:
+            f.seek(start)
+            f.write(data)
+        return True
+
+    def _save(self, force=False):
+        now = time.monotonic()
+        if force or now - self._last_save >= _SAVE_INTERVAL:
+            self._last_save = now
+            try:
+                self.queue.save()
+            except OSError as e:
+                get_logger().warning(f"Cannot save download queue: {e}")
+
+    def _fail(self, task, error):
+        task.status, task.error = STATUS_FAILED, error
+        get_logger().error(f"Download failed: {task.url} ({error})")
+
+    def _finalize(self, task):
+        """Verify and move the ``.part`` in place; errors mark the task failed.
+
+        A ``.part`` that cannot be moved (target locked, not writable) is
+        kept with its chunks, so a later retry only repeats the move.
+        """
+        try:
+            error = verify(task)
+        except OSError as e:
+            self._fail(task, f"cannot verify {task.part_path}: {e}")
+            return False
+        if error:
+            task.chunks = set()
+            try:
+                os.remove(task.part_path)
+            except OSError as e:
+                get_logger().warning(f"Cannot remove {task.part_path}: {e}")
+            self._fail(task, error)
+            return False
+        try:
+            os.replace(task.part_path, task.path)
+        except OSError as e:
+            self._fail(task, f"cannot move to {task.path}: {e}")
+            return False
+        task.status = STATUS_DONE
+        get_logger().info(f"Downloaded {task.url} -> {task.path}")
+        return True
+
+    def _finish(self, tasks, on_done, on_failed):
+        for task in tasks:
+            if self._finalize(task):
+                if on_done:
+                    on_done(task)
+            elif on_failed:
+                on_failed(task)
+            self._save(force=True)
+
+    def run(self, tasks, on_progress=None, on_done=None, on_failed=None):
+        """Download ``tasks``; callbacks are called from the calling thread."""
+        self._cancelled.clear()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            prepared = []
+            futures = {pool.submit(self._prepare, task): task for task in tasks}
+            for future in as_completed(futures):
+                task = futures[future]
+                try:
+                    future.result()
+                    prepared.append(task)
+                except Exception as e:
+                    self._fail(task, str(e))
+                    if on_failed:
+                        on_failed(task)
+            self._save(force=True)
+            total = sum(task.size for task in prepared)
+            done = sum(task.bytes_done(self.chunk_size) for task in prepared)
+            if on_progress:
+                on_progress(done, total)
+
+            remaining = {}
+            futures = {}
+            # In ordine di coda: i file finiscono uno dopo l'altro
+            for task in [task for task in tasks if task in prepared]:
+                missing = [c for c in range(task.chunk_count(self.chunk_size)) if c not in task.chunks]
+                remaining[task.url] = len(missing)
+                for chunk in missing:
+                    futures[pool.submit(self._chunk, task, chunk)] = (task, chunk)
+            # File già completi (ripresa dopo un'interruzione in fase di verifica)
+            self._finish([task for task in prepared if remaining[task.url] == 0], on_done, on_failed)
+
+            for future in as_completed(futures):
+                task, chunk = futures[future]
+                try:
+                    written = future.result()
+                except Exception as e:
+                    written = False
+                    if task.status == STATUS_QUEUED:
+                        self._fail(task, str(e))
+                        if on_failed:
+                            on_failed(task)
+                if written:
+                    task.chunks.add(chunk)
+                    done += min(self.chunk_size, task.size - chunk * self.chunk_size)
+                    if on_progress:
+                        on_progress(done, total)
+                    self._save()
+                remaining[task.url] -= 1
+                if remaining[task.url] == 0 and task.status == STATUS_QUEUED and not self.cancelled:
+                    self._finish([task], on_done, on_failed)
+        self._save(force=True)
+
+
+class DownloadWorker(QThread):
+    """Runs a Downloader batch off the GUI thread."""
+
+    progress = pyqtSignal(object, object)  # bytes done, bytes total (may exceed int32)
+    fileDone = pyqtSignal(object)  # DownloadTask
+    fileFailed = pyqtSignal(object)  # DownloadTask
+
+    def __init__(self, downloader, tasks):
+        super().__init__()
+        self.downloader = downloader
+        self.tasks = tasks
+        self.error = None  # exception that aborted the batch, if any
+
+    def cancel(self):
+        self.downloader.cancel()
+
+    def run(self):
+        try:
+            self.downloader.run(
+                self.tasks,
+                on_progress=self.progress.emit,
+                on_done=self.fileDone.emit,
+                on_failed=self.fileFailed.emit,
+            )
+        except Exception as e:
+            self.error = e
+            get_logger().error(f"Download batch failed: {e}", exc_info=True)
@@ -0,0 +1,189 @@
+"""
+AOI-clipped extraction of COG tiles.
+
+Instead of downloading whole tiles, ``gdal.Warp`` reads only the blocks of
+the remote COG intersecting the AOI, from the overview whose resolution is
+the closest one not coarser than the requested GSD, and writes a compact
+local GeoTIFF (COG when the driver is available) in the project CRS.
+Several tiles are warped in parallel by ``ExtractWorker``.
+"""
+
+import hashlib
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from qgis.PyQt.QtCore import QThread, pyqtSignal
+
+from kadas_maxar.logger import get_logger
+from kadas_maxar.paths import get_cache_dir
+from kadas_maxar.imagery.gdal_profile import cog_access_profile
+
+try:
+    from osgeo import gdal
+except ImportError:
+    gdal = None
+
+# Metres per degree of latitude (mean) for geographic project CRSs
+_METERS_PER_DEGREE = 111320.0
+
+
+def overview_level(native_res, factors, target_res):
+    """GDAL overview index to read for ``target_res`` (-1 = full resolution).
+
+    ``factors`` are the decimation factors of the overviews (2, 4, 8, ...).
+    The coarsest overview not coarser than the target is used, so the
+    output never has less detail than requested.
+    """
+    level = -1
+    if not target_res or not native_res:
+        return level
+    for index, factor in enumerate(factors):
+        if native_res * factor <= target_res * 1.0001:
+            level = index
+    return level
+
+
+def resolution_in_crs(gsd_m, geographic=False, latitude=0.0):
+    """(xres, yres) for a GSD in metres in a projected or geographic CRS."""
+    if not geographic:
+        return gsd_m, gsd_m
+    yres = gsd_m / _METERS_PER_DEGREE
+    xres = yres / max(math.cos(math.radians(latitude)), 0.01)
+    return xres, yres
+
+
+def extract_path(name, bounds, gsd, crs, directory=None):
+    """Output file of one extraction (same inputs, same file)."""
+    key = f"{name}|{','.join(f'{v:.3f}' for v in bounds)}|{gsd}|{crs}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+    safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in name)[:80]
+    return os.path.join(directory or get_cache_dir("extracts"), f"{safe}_{digest}.tif")
+
+
+class ExtractJob:
+    """One tile to clip to the AOI."""
+
+    __slots__ = ("source", "name", "output", "url")
+
+    def __init__(self, source, name, output, url=None):
+        self.source = source
+        self.name = name
+        self.output = output
+        self.url = url or source
+
+    def __repr__(self):
+        return f"ExtractJob({self.name!r})"
+
+
+def extract_window(source, output, bounds, dst_srs, gsd=0.0, geographic=False, cancelled=None):
+    """Warp the ``bounds`` window (xmin, ymin, xmax, ymax in ``dst_srs``) of
+    ``source`` to ``output``. ``gsd`` in metres, 0 = native resolution.
+    Returns ``output``.
+    """
+    if gdal is None:
+        raise RuntimeError("GDAL Python bindings not available")
+    if os.path.exists(output) and os.path.getsize(output) > 0:
+        return output
+
+    ds = gdal.Open(source)
+    if ds is None:
+        raise RuntimeError(gdal.GetLastErrorMsg() or f"Cannot open {source}")
+    band = ds.GetRasterBand(1)
+    native_res = abs(ds.GetGeoTransform()[1])
+    factors = [round(ds.RasterXSize / band.GetOverview(i).XSize) for i in range(band.GetOverviewCount())]
+    source_geographic = ds.GetSpatialRef() is not None and ds.GetSpatialRef().IsGeographic()
+    ds = None
+
+    kwargs = {}
+    level = -1
+    if gsd:
+        # La risoluzione nativa dei tile ARD è in metri (UTM)
+        level = overview_level(native_res if not source_geographic else 0, factors, gsd)
+        latitude = (bounds[1] + bounds[3]) / 2.0 if geographic else 0.0
+        kwargs["xRes"], kwargs["yRes"] = resolution_in_crs(gsd, geographic, latitude)
+        kwargs["targetAlignedPixels"] = True
+
+    creation = ["COMPRESS=DEFLATE", "PREDICTOR=2", "BIGTIFF=IF_SAFER"]
+    if gdal.GetDriverByName("COG") is not None:
+        fmt = "COG"
+    else:
+        fmt = "GTiff"
+        creation.append("TILED=YES")
+
+    def _progress(complete, message, data):
+        return 0 if cancelled is not None and cancelled() else 1
+
+    tmp = f"{output}.{os.getpid()}.{threading.get_ident()}.tmp"
+    options = gdal.WarpOptions(
+        format=fmt,
+        outputBounds=tuple(bounds),
+        dstSRS=dst_srs,
+        resampleAlg="average" if gsd else "near",
+        creationOptions=creation,
+        multithread=True,
+        callback=_progress,
+        options=["-ovr", str(level) if level >= 0 else "NONE"],
+        **kwargs,
+    )
+    result = gdal.Warp(tmp, source, options=options)
+    if result is None:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        if cancelled is not None and cancelled():
+            raise RuntimeError("annullato")
+        raise RuntimeError(gdal.GetLastErrorMsg() or "Warp failed")
+    result = None  # flush to disk
+    os.replace(tmp, output)
+    return output
+
+
+class ExtractWorker(QThread):
+    """Clips several tiles to the AOI with a pool of ``max_workers`` threads."""
+
+    extracted = pyqtSignal(object, str)  # ExtractJob, output path
+    failed = pyqtSignal(object, str)  # ExtractJob, error message
+    progress = pyqtSignal(int, int)  # done, total
+
+    def __init__(self, jobs, bounds, dst_srs, gsd=0.0, geographic=False, max_workers=3):
+        super().__init__()
+        self.jobs = jobs
+        self.bounds = bounds
+        self.dst_srs = dst_srs
+        self.gsd = gsd
+        self.geographic = geographic
+        self.max_workers = max(1, int(max_workers))
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def _run_job(self, job):
+        if self.cancelled:
+            raise RuntimeError("annullato")
+        with cog_access_profile().opening():
+            return extract_window(
+                job.source, job.output, self.bounds, self.dst_srs,
+                gsd=self.gsd, geographic=self.geographic, cancelled=self._cancelled.is_set,
+            )
+
+    def run(self):
+        done = 0
+        self.progress.emit(done, len(self.jobs))
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(len(self.jobs), 1))) as pool:
+            futures = {pool.submit(self._run_job, job): job for job in self.jobs}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    self.extracted.emit(job, future.result())
+                    get_logger().info(f"Extracted {job.name} -> {job.output}")
+                except Exception as e:
+                    get_logger().error(f"Extraction of {job.url} failed: {e}")
+                    self.failed.emit(job, str(e))
+                done += 1
+                self.progress.emit(done, len(self.jobs))
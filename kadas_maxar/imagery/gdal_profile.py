@@ -0,0 +1,171 @@
+"""
+GDAL /vsicurl access profile for Vantor COGs.
+
+With plain ``/vsicurl/`` and default configuration, opening a COG on S3 may
+list the parent "directory" to look for side-car files, issue a HEAD request,
+fetch the header in 16 KB pieces and send every tile range as its own HTTP/1.1
+request. The profile below tunes those options for the Vantor ARD bucket only:
+
+- GDAL >= 3.6: ``gdal.SetPathSpecificOption`` scoped to the bucket URL prefix,
+  so other layers and plugins keep their own configuration;
+- older GDAL: the readdir/HEAD settings are carried by the layer source
+  itself (``/vsicurl?list_dir=no&empty_dir=yes&use_head=no&url=...``) and the
+  remaining options are set thread-locally around each open.
+
+Nothing is written to the global GDAL configuration.
+
+When the persistent block cache is running (``cache_server``), sources point
+at its localhost URL and the options are registered for that prefix too,
+with the HTTP proxy disabled so that curl reaches 127.0.0.1 directly.
+"""
+
+from contextlib import contextmanager
+from urllib.parse import quote
+
+from kadas_maxar.logger import get_logger
+
+try:
+    from osgeo import gdal
+except ImportError:
+    gdal = None
+
+# URL prefixes of the Vantor/Maxar Open Data COGs
+COG_URL_PREFIXES = (
+    "https://maxar-opendata.s3.amazonaws.com/",
+    "https://maxar-opendata.s3.us-west-2.amazonaws.com/",
+)
+
+# Bytes read at open time: the whole IFD chain (all overviews) of an ARD tile
+# fits in one request instead of several 16 KB reads
+HEADER_BYTES = 65536
+
+# GDAL block cache for /vsicurl reads (bytes)
+VSI_CACHE_BYTES = 64 * 1024 * 1024
+
+# Options of the localhost block cache prefix, also with the profile disabled:
+# an empty proxy makes curl ignore the proxy settings (and *_proxy variables)
+LOCAL_OPTIONS = {"GDAL_HTTP_PROXY": ""}
+
+
+class CogAccessProfile:
+    """Set of GDAL options used to open and read Vantor COGs."""
+
+    def __init__(self, enabled=True, header_bytes=HEADER_BYTES, vsi_cache_bytes=VSI_CACHE_BYTES,
+                 prefixes=COG_URL_PREFIXES):
+        self.enabled = enabled
+        self.header_bytes = header_bytes
+        self.vsi_cache_bytes = vsi_cache_bytes
+        self.prefixes = tuple(prefixes)
+        self.cache_server = None  # CacheServer of the persistent block cache
+        self._installed = set()  # prefixes with path-specific options
+
+    def url_options(self):
+        """Options expressible in a ``/vsicurl?`` file name."""
+        return {
+            "list_dir": "no",  # no directory listing of the tile folder
+            "empty_dir": "yes",  # ... and no side-car file probing
+            "use_head": "no",  # file size from the first ranged GET
+            "max_retry": "3",
+            "retry_delay": "1",
+        }
+
+    def config_options(self, local=False):
+        """GDAL configuration options of the profile.
+
+        ``local``: options for the localhost block cache (plain HTTP/1.1).
+        """
+        options = {
+            "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+            "CPL_VSIL_CURL_ALLOWED_EXTENSIONS": ".tif,.tiff,.vrt",
+            "GDAL_HTTP_MERGE_CONSECUTIVE_RANGES": "YES",
+            "GDAL_INGESTED_BYTES_AT_OPEN": str(self.header_bytes),
+            "VSI_CACHE": "TRUE",
+            "VSI_CACHE_SIZE": str(self.vsi_cache_bytes),
+            "GDAL_HTTP_MAX_RETRY": "3",
+            "GDAL_HTTP_RETRY_DELAY": "1",
+        }
+        if local:
+            options.update(LOCAL_OPTIONS)
+        else:
+            options["GDAL_HTTP_MULTIPLEX"] = "YES"
+            options["GDAL_HTTP_VERSION"] = "2"
+        return options
+
+    @staticmethod
+    def supports_path_options():
+        return gdal is not None and hasattr(gdal, "SetPathSpecificOption")
+
+    def matches(self, url):
+        return any(url.startswith(prefix) for prefix in self.prefixes)
+
+    def _cache_running(self):
+        return self.cache_server is not None and self.cache_server.running
+
+    def install(self):
+        """Register the options for the bucket prefixes (GDAL >= 3.6).
+
+        The block cache prefix gets ``LOCAL_OPTIONS`` even when the profile
+        is disabled. Returns True if the profile's path-specific options are
+        active.
+        """
+        if not self.supports_path_options():
+            return False
+        wanted = {prefix: False for prefix in self.prefixes} if self.enabled else {}
+        if self._cache_running():
+            wanted[self.cache_server.prefix] = True
+        for prefix, local in wanted.items():
+            if prefix in self._installed:
+                continue
+            options = self.config_options(local=local) if self.enabled else LOCAL_OPTIONS
+            for key, value in options.items():
+                gdal.SetPathSpecificOption(f"/vsicurl/{prefix}", key, value)
+            self._installed.add(prefix)
+            get_logger().info(f"COG access profile installed for {prefix}")
+        return self.enabled
+
+    def uninstall(self):
+        """Remove the path-specific options (plugin unload)."""
+        for prefix in self._installed:
+            gdal.ClearPathSpecificOptions(f"/vsicurl/{prefix}")
+        self._installed = set()
+
+    def source(self, url):
+        """GDAL file name to open ``url`` with this profile."""
+        target = url
+        if self._cache_running():
+            target = self.cache_server.url_for(url)
+        if self.install() or not self.enabled or not self.matches(url):
+            return f"/vsicurl/{target}"
+        options = "&".join(f"{key}={value}" for key, value in self.url_options().items())
+        return f"/vsicurl?{options}&url={quote(target, safe=':/')}"
+
+    @contextmanager
+    def opening(self):
+        """Thread-local options around an open when path options are unavailable."""
+        if not self.enabled or gdal is None or self._installed:
+            yield
+            return
+        options = self.config_options()
+        previous = {key: gdal.GetThreadLocalConfigOption(key, None) for key in options}
+        for key, value in options.items():
+            gdal.SetThreadLocalConfigOption(key, value)
+        try:
+            yield
+        finally:
+            for key, value in previous.items():
+                gdal.SetThreadLocalConfigOption(key, value)
+
+
+_profile = None
+
+
+def cog_access_profile(enabled=None):
+    """Shared profile instance; ``enabled`` (if given) follows the settings."""
+    global _profile
+    if _profile is None:
+        _profile = CogAccessProfile()
+    if enabled is not None and enabled != _profile.enabled:
+        _profile.enabled = enabled
+        # Reinstalled with the new option set on the next source()
+        _profile.uninstall()
+    return _profile
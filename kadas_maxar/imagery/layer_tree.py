@@ -0,0 +1,96 @@
+"""
+Batched insertion of plugin layers into the layer tree.
+
+Layers handed over by the background loaders within ``FLUSH_MS`` of each
+other are added together: one ``addMapLayers(..., False)`` call (no
+automatic insertion at the root), then each layer is placed in its group
+(event, then acquisition) while the canvas is frozen, and the canvas is
+refreshed once. Loading dozens of tiles costs a handful of layer-tree and
+canvas updates instead of one per tile.
+"""
+
+from qgis.PyQt.QtCore import QObject, QTimer
+from qgis.core import QgsProject
+
+from kadas_maxar.logger import get_logger
+
+# Layers ready within this interval are inserted together (ms)
+FLUSH_MS = 300
+
+
+def group_node(root, path):
+    """Group node for ``path`` (names from the root), created where missing."""
+    node = root
+    for name in path:
+        child = node.findGroup(name)
+        if child is None:
+            child = node.insertGroup(0, name)
+        node = child
+    return node
+
+
+def insert_layers(project, items, grouped=True, canvas=None):
+    """Add ``items`` ((layer, group path)) to ``project`` in one batch."""
+    if not items:
+        return
+    if canvas is not None:
+        canvas.freeze(True)
+    try:
+        project.addMapLayers([layer for layer, _ in items], False)
+        root = project.layerTreeRoot()
+        for layer, path in items:
+            node = group_node(root, path) if grouped and path else root
+            # In cima, come addMapLayer
+            node.insertLayer(0, layer)
+    finally:
+        if canvas is not None:
+            canvas.freeze(False)
+            canvas.refresh()
+
+
+class LayerInsertQueue(QObject):
+    """Collects ready layers and inserts them in batches.
+
+    ``grouped`` is a callable so that the "group layers by event" setting
+    can change at runtime.
+    """
+
+    def __init__(self, canvas=None, grouped=lambda: True, parent=None):
+        super().__init__(parent)
+        self.canvas = canvas
+        self.grouped = grouped
+        self._items = []  # (layer, path, key)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(FLUSH_MS)
+        self._timer.timeout.connect(self.flush)
+
+    def add(self, layer, path=(), key=None):
+        """Queue ``layer`` for the group ``path``; ``key`` identifies it in ``pending``."""
+        self._items.append((layer, tuple(path), key))
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def pending(self, key):
+        return any(item_key == key for _, _, item_key in self._items if item_key is not None)
+
+    def layers(self):
+        return [layer for layer, _, _ in self._items]
+
+    def flush(self):
+        """Insert the queued layers now."""
+        self._timer.stop()
+        items, self._items = self._items, []
+        if not items:
+            return
+        try:
+            insert_layers(
+                QgsProject.instance(), [(layer, path) for layer, path, _ in items],
+                grouped=self.grouped(), canvas=self.canvas,
+            )
+        except Exception as e:
+            get_logger().error(f"Cannot insert {len(items)} layers: {e}", exc_info=True)
+
+    def clear(self):
+        self._timer.stop()
+        self._items = []
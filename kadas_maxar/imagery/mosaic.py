@@ -0,0 +1,143 @@
+"""
+Virtual mosaics (GDAL VRT) over several COG tiles.
+
+One ARD acquisition is split into many quadkey tiles; adding each tile as its
+own raster layer fills the layer tree and renders every tile separately. A
+VRT over the tiles' ``/vsicurl`` sources is added as a single layer instead,
+and GDAL only reads the tiles intersecting the rendered extent.
+
+Tiles of one group must share the CRS (ARD tiles are in the UTM zone of
+their quadkey), so groups are always split by EPSG code as well.
+"""
+
+import hashlib
+import os
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from kadas_maxar.paths import get_cache_dir
+
+try:
+    from osgeo import gdal
+except ImportError:
+    gdal = None
+
+MOSAIC_TILES = "tiles"  # one layer per tile (no mosaic)
+MOSAIC_ACQUISITION = "acquisition"  # one VRT per catalog_id and date
+MOSAIC_SELECTION = "selection"  # one VRT for the whole selection
+MOSAIC_MODES = (MOSAIC_TILES, MOSAIC_ACQUISITION, MOSAIC_SELECTION)
+
+# Parallel header reads before BuildVRT (fills the /vsicurl cache)
+WARMUP_THREADS = 8
+
+
+def group_records(records, mode):
+    """Group FootprintRecords for mosaicking.
+
+    Returns a list of (label, [records]) in selection order; with
+    MOSAIC_TILES every record is its own group.
+    """
+    if mode not in (MOSAIC_ACQUISITION, MOSAIC_SELECTION):
+        return [(None, [record]) for record in records]
+    groups = OrderedDict()
+    for record in records:
+        if mode == MOSAIC_ACQUISITION:
+            key = (record.catalog_id or "unknown", record.date, record.epsg)
+            label = f"{key[0]} ({key[1]})"
+        else:
+            key = (record.epsg,)
+            label = "selection"
+        groups.setdefault(key, (label, []))[1].append(record)
+    # label disambiguation when the same group spans several UTM zones
+    labels = [label for label, _ in groups.values()]
+    result = []
+    for (key, (label, members)) in groups.items():
+        if labels.count(label) > 1 and key[-1]:
+            label = f"{label} EPSG:{key[-1]}"
+        result.append((label, members))
+    return result
+
+
+def mosaic_path(sources, directory=None):
+    """Cache file for a VRT over ``sources`` (same sources, same file)."""
+    digest = hashlib.sha1("\n".join(sources).encode("utf-8")).hexdigest()[:20]
+    return os.path.join(directory or get_cache_dir("vrt"), f"mosaic_{digest}.vrt")
+
+
+def build_mosaic(sources, path=None):
+    """Write (or reuse) a VRT mosaic of ``sources`` and return its path.
+
+    The tiles' headers are fetched in parallel first so that BuildVRT, which
+    opens the sources one after the other, reads them from the /vsicurl cache.
+    """
+    if gdal is None:
+        raise RuntimeError("GDAL Python bindings not available")
+    path = path or mosaic_path(sources)
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        return path
+
+    def _warm(source):
+        try:
+            gdal.Open(source)
+        except Exception:
+            pass
+
+    with ThreadPoolExecutor(max_workers=min(WARMUP_THREADS, len(sources))) as pool:
+        list(pool.map(_warm, sources))
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    options = gdal.BuildVRTOptions(resolution="highest")
+    vrt = gdal.BuildVRT(tmp, list(sources), options=options)
+    if vrt is None:
+        raise RuntimeError(gdal.GetLastErrorMsg() or "BuildVRT failed")
+    count = vrt.RasterCount
+    vrt = None  # flush to disk
+    if not count:
+        os.remove(tmp)
+        raise RuntimeError("No valid source for the mosaic")
+    os.replace(tmp, path)
+    return path
+
+
+def _vrt_source(element, directory):
+    path = element.text or ""
+    if element.get("relativeToVRT") == "1":
+        path = os.path.normpath(os.path.join(directory, path))
+    return path
+
+
+def replace_source(source, old, new, directory=None):
+    """GDAL source reading ``new`` where ``source`` read ``old``.
+
+    ``source`` is either ``old`` itself or a VRT (mosaic, pansharpening,
+    band preset) referencing it; the VRT is copied with the reference
+    replaced. Returns None if ``source`` does not read ``old``.
+    """
+    if source == old:
+        return new
+    if not source.lower().endswith(".vrt") or not os.path.isfile(source):
+        return None
+    base = os.path.dirname(source)
+    old_path = old if old.startswith("/vsi") else os.path.normpath(old)
+    try:
+        tree = ET.parse(source)
+    except ET.ParseError as e:
+        raise ValueError(f"Invalid VRT {source}: {e}") from e
+    replaced = 0
+    for element in tree.iter("SourceFilename"):
+        if _vrt_source(element, base) == old_path:
+            element.text = new
+            element.set("relativeToVRT", "0")
+            replaced += 1
+    if not replaced:
+        return None
+    xml = ET.tostring(tree.getroot(), encoding="unicode")
+    digest = hashlib.sha1(xml.encode("utf-8")).hexdigest()[:20]
+    path = os.path.join(directory or base, f"local_{digest}.vrt")
+    if not os.path.exists(path):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(xml)
+        os.replace(tmp, path)
+    return path
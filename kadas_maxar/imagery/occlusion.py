@@ -0,0 +1,55 @@
+"""
+Occlusion culling of stacked plugin rasters.
+
+Walking the layer order from the top, the visible part of each raster's
+footprint (clipped to the view) is compared with the union of the opaque
+footprints above it: a raster whose visible part is entirely covered
+cannot contribute a pixel and is skipped by the render (see
+``activation.ViewActivator``).
+
+Only layers with a real footprint outline (``OUTLINE_PROPERTY``, WGS84
+WKT) and full opacity occlude others; layers known only by their bbox
+(mosaics) can be occluded but never occlude. The geometry operations are
+those of ``QgsGeometry`` (``intersection``, ``difference``, ``combine``,
+``area``, ``isEmpty``).
+"""
+
+# Custom property with the footprint outline (WKT, WGS84)
+OUTLINE_PROPERTY = "maxar/outline"
+# Visible remainder (fraction of the visible footprint) still treated as hidden
+TOLERANCE = 1e-4
+
+
+def polygons_wkt(polygons):
+    """MULTIPOLYGON WKT of [[ring, ...], ...] (rings as [(x, y), ...]), None if empty."""
+    parts = []
+    for polygon in polygons:
+        rings = [
+            "(" + ", ".join(f"{x!r} {y!r}" for x, y in ring) + ")"
+            for ring in polygon if len(ring) >= 4
+        ]
+        if rings:
+            parts.append("(" + ", ".join(rings) + ")")
+    return f"MULTIPOLYGON({', '.join(parts)})" if parts else None
+
+
+def occluded_ids(layers, view, tolerance=TOLERANCE):
+    """Ids of the layers fully covered, inside ``view``, by opaque layers above.
+
+    ``layers``: (id, footprint geometry, occludes) from the top of the render
+    order down; ``view``: geometry of the map view.
+    """
+    covered = None
+    hidden = set()
+    for layer_id, geometry, occludes in layers:
+        visible = geometry.intersection(view)
+        if visible.isEmpty():
+            continue
+        if covered is not None:
+            rest = visible.difference(covered)
+            if rest.isEmpty() or rest.area() <= tolerance * visible.area():
+                hidden.add(layer_id)
+                continue
+        if occludes:
+            covered = visible if covered is None else covered.combine(visible)
+    return hidden
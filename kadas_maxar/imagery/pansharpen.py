@@ -0,0 +1,86 @@
+"""
+Pansharpened virtual rasters (GDAL VRTPansharpenedDataset).
+
+The VRT references the remote ``pan_analytic`` and ``ms_analytic`` COGs of
+one tile; GDAL pansharpens each requested block on the fly, from the
+sources' overviews when the map is zoomed out, so only the visible blocks
+of both COGs are fetched.
+"""
+
+import hashlib
+import os
+from xml.sax.saxutils import escape
+
+from kadas_maxar.paths import get_cache_dir
+from kadas_maxar.imagery.band_presets import band_numbers
+
+try:
+    from osgeo import gdal
+except ImportError:
+    gdal = None
+
+
+def rgb_bands(platform, band_count=None):
+    """(r, g, b) MS band numbers for ``platform`` or None if unknown.
+
+    WV02/WV03 (8 bands): 5, 3, 2; GE01/QB02/WV04 (4 bands): 3, 2, 1.
+    """
+    return band_numbers(platform, ("red", "green", "blue"), band_count)
+
+
+def pansharpen_xml(pan_source, ms_source, bands, algorithm="WeightedBrovey", resampling="Cubic"):
+    """VRTPansharpenedDataset definition for the given sources and bands."""
+    spectral = "\n".join(
+        f'    <SpectralBand dstBand="{i + 1}">\n'
+        f'      <SourceFilename relativeToVRT="0">{escape(ms_source)}</SourceFilename>\n'
+        f"      <SourceBand>{band}</SourceBand>\n"
+        f"    </SpectralBand>"
+        for i, band in enumerate(bands)
+    )
+    return (
+        '<VRTDataset subClass="VRTPansharpenedDataset">\n'
+        "  <PansharpeningOptions>\n"
+        f"    <Algorithm>{algorithm}</Algorithm>\n"
+        f"    <Resampling>{resampling}</Resampling>\n"
+        "    <NumThreads>ALL_CPUS</NumThreads>\n"
+        "    <PanchroBand>\n"
+        f'      <SourceFilename relativeToVRT="0">{escape(pan_source)}</SourceFilename>\n'
+        "      <SourceBand>1</SourceBand>\n"
+        "    </PanchroBand>\n"
+        f"{spectral}\n"
+        "  </PansharpeningOptions>\n"
+        "</VRTDataset>\n"
+    )
+
+
+def pansharpen_path(pan_source, ms_source, bands, directory=None):
+    """Cache file of the VRT (same sources and bands, same file)."""
+    key = "\n".join([pan_source, ms_source, ",".join(str(b) for b in bands)])
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+    return os.path.join(directory or get_cache_dir("vrt"), f"pansharpened_{digest}.vrt")
+
+
+def build_pansharpened(pan_source, ms_source, platform=None, path=None):
+    """Write (or reuse) the pansharpening VRT and return its path.
+
+    For platforms without a known band mapping the MS header is read to
+    choose the bands from the band count.
+    """
+    bands = rgb_bands(platform)
+    if bands is None:
+        if gdal is None:
+            raise RuntimeError("GDAL Python bindings not available")
+        ds = gdal.Open(ms_source)
+        if ds is None:
+            raise RuntimeError(gdal.GetLastErrorMsg() or f"Cannot open {ms_source}")
+        bands = rgb_bands(platform, ds.RasterCount)
+        if bands is None:
+            raise RuntimeError(f"Unknown MS band layout ({ds.RasterCount} bands)")
+    path = path or pansharpen_path(pan_source, ms_source, bands)
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        return path
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(pansharpen_xml(pan_source, ms_source, bands))
+    os.replace(tmp, path)
+    return path
@@ -0,0 +1,233 @@
+"""
+View-driven prefetch of COG overviews.
+
+When the canvas stops moving, the windows about to be rendered (the current
+view and its eight neighbours, at the same scale) are read in a background
+thread at the overview level GDAL will pick for the current map scale. The
+reads fill the /vsicurl cache and the persistent block cache, so the render
+and the next pan find the blocks locally instead of fetching them tile by
+tile.
+
+Every navigation bumps a generation counter: queued windows of an older
+generation are skipped, and a window in progress stops at the next block.
+The worker runs at the lowest thread priority.
+"""
+
+import queue
+import threading
+
+from qgis.PyQt.QtCore import QObject, QThread, QTimer
+from qgis.core import QgsCoordinateTransform, QgsProject, QgsRasterLayer, QgsRectangle
+
+from kadas_maxar.logger import get_logger
+from kadas_maxar.imagery.extract import overview_level
+from kadas_maxar.imagery.gdal_profile import cog_access_profile
+
+try:
+    from osgeo import gdal
+except ImportError:
+    gdal = None
+
+# Wait for the canvas to settle before prefetching (ms)
+DEBOUNCE_MS = 400
+# Upper bound of blocks read per navigation (all layers, all windows)
+MAX_BLOCKS = 512
+
+
+def viewport_windows(xmin, ymin, xmax, ymax, ring=1):
+    """Current view followed by the surrounding views of the same size."""
+    width, height = xmax - xmin, ymax - ymin
+    windows = [(xmin, ymin, xmax, ymax)]
+    for dy in range(-ring, ring + 1):
+        for dx in range(-ring, ring + 1):
+            if dx or dy:
+                windows.append((xmin + dx * width, ymin + dy * height,
+                                xmax + dx * width, ymax + dy * height))
+    return windows
+
+
+def pixel_window(bounds, geotransform, width, height):
+    """(xoff, yoff, xsize, ysize) of ``bounds`` in a north-up raster, or None."""
+    x0, px, _, y0, _, py = geotransform
+    left = int((bounds[0] - x0) / px)
+    right = int(-(-(bounds[2] - x0) // px))
+    top = int((bounds[3] - y0) / py)
+    bottom = int(-(-(bounds[1] - y0) // py))
+    left, top = max(left, 0), max(top, 0)
+    right, bottom = min(right, width), min(bottom, height)
+    if right <= left or bottom <= top:
+        return None
+    return left, top, right - left, bottom - top
+
+
+def prefetch_window(source, bounds, resolution, cancelled=None, budget=MAX_BLOCKS, datasets=None):
+    """Read the blocks of ``source`` covering ``bounds`` at the overview
+    matching ``resolution`` (map units per screen pixel, raster CRS).
+
+    Returns the number of blocks read. ``datasets`` caches open datasets.
+    """
+    if gdal is None or budget <= 0:
+        return 0
+    datasets = {} if datasets is None else datasets
+    ds = datasets.get(source)
+    if ds is None:
+        ds = datasets[source] = gdal.Open(source)
+    if ds is None:
+        return 0
+    gt = ds.GetGeoTransform()
+    band = ds.GetRasterBand(1)
+    factors = [round(ds.RasterXSize / band.GetOverview(i).XSize) for i in range(band.GetOverviewCount())]
+    level = overview_level(abs(gt[1]), factors, resolution)
+    target = band if level < 0 else band.GetOverview(level)
+    scale = 1 if level < 0 else ds.RasterXSize / target.XSize
+    window = pixel_window(bounds, (gt[0], gt[1] * scale, 0, gt[3], 0, gt[5] * scale), target.XSize, target.YSize)
+    if window is None:
+        return 0
+
+    bands = [ds.GetRasterBand(i + 1) for i in range(ds.RasterCount)]
+    if level >= 0:
+        bands = [b.GetOverview(level) for b in bands]
+    bx, by = target.GetBlockSize()
+    xoff, yoff, xsize, ysize = window
+    read = 0
+    # Un blocco alla volta (tutte le bande): si interrompe subito se la vista cambia
+    for row in range(yoff // by * by, yoff + ysize, by):
+        for col in range(xoff // bx * bx, xoff + xsize, bx):
+            if (cancelled is not None and cancelled()) or read >= budget:
+                return read
+            w, h = min(bx, target.XSize - col), min(by, target.YSize - row)
+            for b in bands:
+                b.ReadRaster(col, row, w, h)
+            read += 1
+    return read
+
+
+class PrefetchWorker(QThread):
+    """Consumes prefetch requests of the current generation."""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = queue.Queue()
+        self.generation = 0
+        self._stop = threading.Event()
+        self._datasets = {}
+        self._budget = {}  # generation -> blocks left
+
+    def submit(self, generation, items):
+        """``items``: (source, bounds, resolution) in the raster CRS."""
+        self.generation = generation
+        self._budget = {generation: MAX_BLOCKS}
+        for item in items:
+            self.requests.put((generation,) + tuple(item))
+
+    def stop(self):
+        self._stop.set()
+        self.requests.put(None)
+
+    def _stale(self, generation):
+        return self._stop.is_set() or generation != self.generation
+
+    def run(self):
+        while not self._stop.is_set():
+            item = self.requests.get()
+            if item is None:
+                break
+            generation, source, bounds, resolution = item
+            if self._stale(generation):
+                continue
+            if len(self._datasets) > 32:
+                self._datasets.clear()
+            try:
+                with cog_access_profile().opening():
+                    read = prefetch_window(
+                        source, bounds, resolution,
+                        cancelled=lambda: self._stale(generation),
+                        budget=self._budget.get(generation, 0),
+                        datasets=self._datasets,
+                    )
+                if generation in self._budget:
+                    self._budget[generation] -= read
+            except Exception as e:
+                get_logger().debug(f"Prefetch of {source} failed: {e}")
+        self._datasets.clear()
+
+
+def is_remote_raster(layer):
+    """Raster layers read over HTTP (COG or VRT mosaic of COGs)."""
+    if not isinstance(layer, QgsRasterLayer) or layer.providerType() != "gdal":
+        return False
+    source = layer.source()
+    return source.startswith("/vsicurl") or source.lower().endswith(".vrt")
+
+
+class ViewPrefetcher(QObject):
+    """Prefetches the visible remote raster layers after each navigation.
+
+    ``enabled`` is a callable so that the setting can change at runtime.
+    """
+
+    def __init__(self, canvas, enabled=lambda: True, parent=None):
+        super().__init__(parent)
+        self.canvas = canvas
+        self.enabled = enabled
+        self.generation = 0
+        self.worker = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(DEBOUNCE_MS)
+        self._timer.timeout.connect(self._prefetch)
+        canvas.extentsChanged.connect(self._on_extent_changed)
+
+    def _on_extent_changed(self):
+        # Nuova navigazione: il lavoro accodato non serve più
+        self.generation += 1
+        if self.worker is not None:
+            self.worker.generation = self.generation
+        self._timer.start()
+
+    def _visible_layers(self):
+        root = QgsProject.instance().layerTreeRoot()
+        for layer in QgsProject.instance().mapLayers().values():
+            if not is_remote_raster(layer):
+                continue
+            node = root.findLayer(layer.id())
+            if node is not None and node.isVisible():
+                yield layer
+
+    def _prefetch(self):
+        if not self.enabled():
+            return
+        settings = self.canvas.mapSettings()
+        canvas_crs = settings.destinationCrs()
+        extent = self.canvas.extent()
+        width_px = max(settings.outputSize().width(), 1)
+        items = []
+        for layer in self._visible_layers():
+            transform = QgsCoordinateTransform(canvas_crs, layer.crs(), QgsProject.instance())
+            layer_extent = layer.extent()
+            try:
+                view = transform.transformBoundingBox(extent)
+            except Exception:
+                continue
+            resolution = view.width() / width_px
+            windows = viewport_windows(view.xMinimum(), view.yMinimum(), view.xMaximum(), view.yMaximum())
+            for bounds in windows:
+                if layer_extent.intersects(QgsRectangle(*bounds)):
+                    items.append((layer.source(), bounds, resolution))
+        if not items:
+            return
+        if self.worker is None:
+            self.worker = PrefetchWorker()
+            self.worker.start(QThread.LowestPriority)
+        self.worker.submit(self.generation, items)
+
+    def stop(self):
+        self._timer.stop()
+        try:
+            self.canvas.extentsChanged.disconnect(self._on_extent_changed)
+        except Exception:
+            pass
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker.wait(5000)
+            self.worker = None
@@ -0,0 +1,192 @@
+"""
+Cached raster statistics and contrast stretch for imagery layers.
+
+Per-band 2-98 % cuts are computed once from the smallest overview of a
+source (a few KB instead of sampling the full-resolution COG over the
+network) and persisted per URL and band. Tiles of the same acquisition are
+grouped: the shared stretch is the median of the members' cuts, so
+neighbouring tiles render with the same colours.
+"""
+
+import json
+import os
+import threading
+
+from kadas_maxar.logger import get_logger
+from kadas_maxar.paths import get_cache_dir
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from osgeo import gdal
+except ImportError:
+    gdal = None
+
+DEFAULT_CUT = (2.0, 98.0)
+# Pixels read per band at most (sources without overviews are subsampled)
+MAX_SAMPLE_SIZE = 1024
+# Custom property of the layers sharing a stretch
+GROUP_PROPERTY = "maxar/stretch_group"
+
+
+def compute_band_stats(source, bands, cut=DEFAULT_CUT):
+    """{band: (low, high)} percentiles of ``bands`` from the smallest overview."""
+    if gdal is None or np is None:
+        raise RuntimeError("GDAL/numpy not available")
+    ds = gdal.Open(source)
+    if ds is None:
+        raise RuntimeError(gdal.GetLastErrorMsg() or f"Cannot open {source}")
+    stats = {}
+    for number in bands:
+        band = ds.GetRasterBand(number)
+        count = band.GetOverviewCount()
+        target = band.GetOverview(count - 1) if count else band
+        scale = max(target.XSize, target.YSize) / MAX_SAMPLE_SIZE
+        if scale > 1:
+            values = target.ReadAsArray(
+                buf_xsize=max(int(target.XSize / scale), 1), buf_ysize=max(int(target.YSize / scale), 1)
+            )
+        else:
+            values = target.ReadAsArray()
+        values = values.ravel()
+        nodata = band.GetNoDataValue()
+        if nodata is not None:
+            values = values[values != nodata]
+        values = values[np.isfinite(values)] if values.dtype.kind == "f" else values
+        if values.size == 0:
+            continue
+        low, high = np.percentile(values, cut)
+        stats[number] = (float(low), float(high))
+    return stats
+
+
+class StretchCache:
+    """Persistent per-source band statistics and acquisition groups."""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(get_cache_dir("stats"), "stretch.json")
+        self._lock = threading.Lock()
+        self._bands = {}  # key -> {band: (low, high)}
+        self._groups = {}  # group -> [key]
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._bands = {
+                key: {int(band): tuple(values) for band, values in bands.items()}
+                for key, bands in data.get("bands", {}).items()
+            }
+            self._groups = {group: list(keys) for group, keys in data.get("groups", {}).items()}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            get_logger().warning(f"Stretch cache unreadable, starting empty: {e}")
+
+    def save(self):
+        with self._lock:
+            data = {
+                "bands": {key: {str(b): list(v) for b, v in bands.items()} for key, bands in self._bands.items()},
+                "groups": self._groups,
+            }
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+
+    def get(self, key, bands):
+        """Cached cuts of ``key`` if all ``bands`` are known, else None."""
+        with self._lock:
+            cached = dict(self._bands.get(key, {}))
+        if all(band in cached for band in bands):
+            return {band: cached[band] for band in bands}
+        return None
+
+    def put(self, key, stats, group=None):
+        with self._lock:
+            self._bands.setdefault(key, {}).update(stats)
+            if group:
+                members = self._groups.setdefault(group, [])
+                if key not in members:
+                    members.append(key)
+
+    def statistics(self, key, source, bands, group=None):
+        """Cuts of ``bands`` for ``key``, computed from ``source`` if missing."""
+        stats = self.get(key, bands)
+        if stats is None:
+            stats = compute_band_stats(source, bands)
+            self.put(key, stats, group)
+            try:
+                self.save()
+            except OSError as e:
+                get_logger().warning(f"Cannot save stretch cache: {e}")
+        elif group:
+            self.put(key, {}, group)
+        return stats
+
+    def stretch(self, key, group=None):
+        """{band: (low, high)}: median of the group members, else ``key``'s own."""
+        with self._lock:
+            keys = self._groups.get(group, []) if group else []
+            members = [dict(self._bands[k]) for k in keys if k in self._bands]
+            if not members:
+                return dict(self._bands.get(key, {}))
+        result = {}
+        for band in set().union(*members):
+            lows = sorted(m[band][0] for m in members if band in m)
+            highs = sorted(m[band][1] for m in members if band in m)
+            result[band] = (lows[len(lows) // 2], highs[len(highs) // 2])
+        return result
+
+
+_cache = None
+
+
+def stretch_cache():
+    """Shared StretchCache."""
+    global _cache
+    if _cache is None:
+        _cache = StretchCache()
+    return _cache
+
+
+def renderer_bands(layer):
+    """Bands used by the layer's grey or RGB renderer ([] for other renderers)."""
+    renderer = layer.renderer()
+    kind = renderer.type() if renderer is not None else ""
+    if kind == "multibandcolor":
+        return [b for b in (renderer.redBand(), renderer.greenBand(), renderer.blueBand()) if b > 0]
+    if kind == "singlebandgray":
+        return [renderer.grayBand()]
+    return []
+
+
+def apply_stretch(layer, stretch):
+    """Set min/max contrast enhancement from ``stretch`` ({band: (low, high)})."""
+    from qgis.core import QgsContrastEnhancement
+
+    renderer = layer.renderer()
+    bands = renderer_bands(layer)
+    if not bands or not all(band in stretch for band in bands):
+        return False
+
+    def enhancement(band):
+        low, high = stretch[band]
+        ce = QgsContrastEnhancement(layer.dataProvider().dataType(band))
+        ce.setContrastEnhancementAlgorithm(QgsContrastEnhancement.StretchToMinimumMaximum)
+        ce.setMinimumValue(low)
+        ce.setMaximumValue(high)
+        return ce
+
+    if renderer.type() == "multibandcolor":
+        renderer.setRedContrastEnhancement(enhancement(renderer.redBand()))
+        renderer.setGreenContrastEnhancement(enhancement(renderer.greenBand()))
+        renderer.setBlueContrastEnhancement(enhancement(renderer.blueBand()))
+    else:
+        renderer.setContrastEnhancement(enhancement(renderer.grayBand()))
+    layer.triggerRepaint()
+    return True
@@ -194,6 +194,7 @@ class KadasMaxar(QObject):
         """Clean up and unload the plugin."""
         # Close dock widgets
         if self._maxar_dock is not None:
+            self._maxar_dock.shutdown()
             self._maxar_dock.close()
             self._maxar_dock = None
         
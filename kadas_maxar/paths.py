@@ -0,0 +1,16 @@
+import os
+
+
+def get_cache_dir(*parts):
+    """
+    Restituisce (e crea se necessario) una directory di cache del plugin.
+    - Radice da KADAS_MAXAR_CACHE o ~/.kadas/maxar_cache
+    - Le sottocartelle vengono passate come argomenti: get_cache_dir("snapshots")
+    """
+    base = os.environ.get('KADAS_MAXAR_CACHE', os.path.expanduser('~/.kadas/maxar_cache'))
+    path = os.path.join(base, *parts)
+    try:
+        os.makedirs(path, exist_ok=True)
+    except Exception:
+        pass
+    return path
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark: plain /vsicurl/ vs the plugin COG access profile.
+
+For every COG the script measures, in a fresh Python process per run (so no
+GDAL cache is shared between runs):
+- open time (header + IFDs)
+- first paint: open + read of the overview closest to a 1024 px preview
+- HTTP requests and bytes transferred (GDAL network statistics, GDAL >= 3.2)
+
+Usage:
+    python benchmark_cog_access.py URL [URL ...]
+    python benchmark_cog_access.py --event Kahramanmaras-turkey-earthquake-23 --count 5
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from urllib.request import Request, urlopen
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PARENT_DIR = os.path.abspath(os.path.join(THIS_DIR, "..", ".."))
+if PARENT_DIR not in sys.path:
+    sys.path.insert(0, PARENT_DIR)
+
+GEOJSON_URL = "https://raw.githubusercontent.com/opengeos/maxar-open-data/master/datasets/{event}.geojson"
+PREVIEW_SIZE = 1024
+MODES = ("baseline", "profile")
+
+
+def event_urls(event, count):
+    """First ``count`` visual COG URLs of an event."""
+    req = Request(GEOJSON_URL.format(event=event))
+    req.add_header("User-Agent", "KADAS-Vantor-Benchmark/1.0")
+    with urlopen(req, timeout=120) as response:
+        features = json.loads(response.read().decode("utf-8")).get("features", [])
+    urls = [f["properties"].get("visual") for f in features]
+    return [url for url in urls if url][:count]
+
+
+def network_totals(gdal):
+    """(requests, downloaded bytes) from GDAL network statistics."""
+    try:
+        stats = json.loads(gdal.NetworkStatsGetAsSerializedJSON() or "{}")
+    except Exception:
+        return None, None
+    methods = stats.get("methods", {})
+    requests = sum(m.get("count", 0) for m in methods.values())
+    downloaded = sum(m.get("downloaded_bytes", 0) for m in methods.values())
+    return requests, downloaded
+
+
+def run_child(mode, url):
+    """Single measurement (runs in its own process)."""
+    from osgeo import gdal
+    from kadas_maxar.imagery.gdal_profile import CogAccessProfile
+
+    gdal.UseExceptions()
+    gdal.SetConfigOption("CPL_VSIL_NETWORK_STATS_ENABLED", "YES")
+    profile = CogAccessProfile(enabled=(mode == "profile"))
+    source = profile.source(url)
+
+    start = time.perf_counter()
+    with profile.opening():
+        ds = gdal.Open(source)
+        opened = time.perf_counter()
+        band = ds.GetRasterBand(1)
+        level = None
+        for i in range(band.GetOverviewCount()):
+            ovr = band.GetOverview(i)
+            if max(ovr.XSize, ovr.YSize) <= PREVIEW_SIZE:
+                level = i
+                break
+        if level is None:
+            ds.ReadRaster(0, 0, ds.RasterXSize, ds.RasterYSize,
+                          buf_xsize=PREVIEW_SIZE, buf_ysize=PREVIEW_SIZE)
+        else:
+            for b in range(1, ds.RasterCount + 1):
+                ds.GetRasterBand(b).GetOverview(level).ReadRaster()
+        painted = time.perf_counter()
+    requests, downloaded = network_totals(gdal)
+    ds = None
+    profile.uninstall()
+    return {
+        "open_s": opened - start,
+        "first_paint_s": painted - start,
+        "requests": requests,
+        "bytes": downloaded,
+    }
+
+
+def measure(mode, url):
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", mode, url],
+        capture_output=True, text=True, timeout=600,
+    )
+    if out.returncode != 0:
+        return {"error": (out.stderr.strip().splitlines() or ["failed"])[-1]}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def fmt(value, pattern):
+    return pattern.format(value) if value is not None else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("urls", nargs="*", help="COG URLs")
+    parser.add_argument("--event", help="Take the COG URLs from an event GeoJSON")
+    parser.add_argument("--count", type=int, default=5, help="Number of COGs taken from --event")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per COG and mode")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "URL"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(*args.child)))
+        return 0
+
+    urls = list(args.urls)
+    if args.event:
+        urls += event_urls(args.event, args.count)
+    if not urls:
+        parser.error("no COG URLs given")
+
+    totals = {mode: {"open_s": 0.0, "first_paint_s": 0.0, "requests": 0, "bytes": 0, "runs": 0} for mode in MODES}
+    print(f"{'mode':9} {'open s':>8} {'paint s':>8} {'req':>5} {'KB':>9}  cog")
+    for url in urls:
+        for _ in range(args.repeat):
+            for mode in MODES:
+                result = measure(mode, url)
+                name = url.rsplit("/", 1)[-1]
+                if "error" in result:
+                    print(f"{mode:9} error: {result['error']}  {name}")
+                    continue
+                total = totals[mode]
+                total["runs"] += 1
+                for key in ("open_s", "first_paint_s", "requests", "bytes"):
+                    total[key] += result[key] or 0
+                print(
+                    f"{mode:9} {result['open_s']:8.2f} {result['first_paint_s']:8.2f} "
+                    f"{fmt(result['requests'], '{:5d}')} {fmt(result['bytes'] and result['bytes'] / 1024, '{:9.0f}')}  {name}"
+                )
+
+    print("\nAverage per COG")
+    for mode in MODES:
+        total = totals[mode]
+        runs = max(total["runs"], 1)
+        print(
+            f"{mode:9} open {total['open_s'] / runs:6.2f} s  first paint {total['first_paint_s'] / runs:6.2f} s  "
+            f"{total['requests'] / runs:6.1f} requests  {total['bytes'] / runs / 1024:8.0f} KB"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
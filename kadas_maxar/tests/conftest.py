@@ -364,6 +364,33 @@ if 'qgis' not in sys.modules:
             pass
         def setSuffix(self, s):
             pass
+    class _QDoubleSpinBox:
+        def __init__(self, *a, **k):
+            self._value = 0.0
+            self._callbacks = []
+            self.valueChanged = self
+        def connect(self, cb):
+            self._callbacks.append(cb)
+        def value(self):
+            return self._value
+        def setValue(self, v):
+            old_value = self._value
+            self._value = float(v)
+            if old_value != self._value:
+                for cb in self._callbacks:
+                    cb(self._value)
+        def setRange(self, min_val, max_val):
+            pass
+        def setDecimals(self, decimals):
+            pass
+        def setSingleStep(self, step):
+            pass
+        def setSuffix(self, s):
+            pass
+        def setSpecialValueText(self, text):
+            pass
+        def setToolTip(self, tooltip):
+            pass
     
     class _QProgressBar:
         def __init__(self, *a, **k):
@@ -477,6 +504,7 @@ if 'qgis' not in sys.modules:
     QtWidgets.QListWidget = _QListWidget
     QtWidgets.QDateEdit = _QDateEdit
     QtWidgets.QSpinBox = _QSpinBox
+    QtWidgets.QDoubleSpinBox = _QDoubleSpinBox
     QtWidgets.QTableWidget = _QTableWidget
     QtWidgets.QTableWidgetItem = _QTableWidgetItem
     QtWidgets.QTabWidget = _QTabWidget
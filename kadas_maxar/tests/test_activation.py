@@ -0,0 +1,80 @@
+from kadas_maxar.imagery.activation import (
+    PINNED_PROPERTY,
+    SUPPRESSED_PROPERTY,
+    LayerSuppression,
+    expand,
+    far_from_view,
+)
+
+
+class Layer:
+    def __init__(self, layer_id):
+        self._id = layer_id
+        self.properties = {}
+
+    def id(self):
+        return self._id
+
+    def customProperty(self, key, default=None):
+        return self.properties.get(key, default)
+
+    def setCustomProperty(self, key, value):
+        self.properties[key] = value
+
+    def removeCustomProperty(self, key):
+        self.properties.pop(key, None)
+
+
+class Node:
+    def __init__(self):
+        self.checked = True
+
+    def itemVisibilityChecked(self):
+        return self.checked
+
+    def setItemVisibilityChecked(self, checked):
+        self.checked = checked
+
+
+class Project:
+    def __init__(self, ids):
+        self.layers = {i: Layer(i) for i in ids}
+        self.nodes = {i: Node() for i in ids}
+
+    def mapLayer(self, layer_id):
+        return self.layers.get(layer_id)
+
+    def layerTreeRoot(self):
+        return type('Root', (), {'findLayer': lambda _, layer_id: self.nodes.get(layer_id)})()
+
+
+def test_expand_and_far_from_view():
+    assert expand((0, 0, 2, 1), 1.0) == (-2, -1, 4, 2)
+    footprints = {'near': (3, 0, 4, 1), 'far': (10, 10, 11, 11), 'inside': (0.5, 0.5, 1, 1), 'unknown': None}
+    assert far_from_view(footprints, (0, 0, 2, 1)) == {'far'}
+    assert far_from_view(footprints, (0, 0, 2, 1), margin=0) == {'far', 'near'}
+
+
+def test_suppression_hides_and_restores():
+    project = Project(['a', 'b', 'c'])
+    suppression = LayerSuppression(project)
+    project.nodes['c'].checked = False  # nascosto dall'utente
+
+    assert suppression.apply({'a', 'c'}, ['a', 'b', 'c']) == (1, 0)
+    assert not project.nodes['a'].checked and project.layers['a'].properties[SUPPRESSED_PROPERTY]
+    assert SUPPRESSED_PROPERTY not in project.layers['c'].properties
+
+    assert suppression.apply(set(), ['a', 'b', 'c']) == (0, 1)
+    assert project.nodes['a'].checked and not project.nodes['c'].checked
+    assert SUPPRESSED_PROPERTY not in project.layers['a'].properties
+
+
+def test_user_reactivation_pins_layer():
+    project = Project(['a'])
+    suppression = LayerSuppression(project)
+    suppression.apply({'a'}, ['a'])
+    project.nodes['a'].checked = True  # l'utente lo riattiva
+    assert suppression.apply({'a'}, ['a']) == (0, 0)
+    assert project.layers['a'].properties[PINNED_PROPERTY]
+    assert suppression.apply({'a'}, ['a']) == (0, 0)
+    assert project.nodes['a'].checked
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from kadas_maxar.imagery.band_presets import (
+    PRESET_FALSE_COLOR,
+    PRESET_NDVI,
+    PRESET_NDWI,
+    band_numbers,
+    build_preset_vrt,
+    index_vrt_xml,
+    normalized_difference,
+)
+
+SUBSET_XML = """<VRTDataset rasterXSize="10" rasterYSize="10">
+  <VRTRasterBand dataType="UInt16" band="1">
+    <SimpleSource><SourceFilename relativeToVRT="0">/vsicurl/ms.tif</SourceFilename><SourceBand>7</SourceBand></SimpleSource>
+  </VRTRasterBand>
+  <VRTRasterBand dataType="UInt16" band="2">
+    <SimpleSource><SourceFilename relativeToVRT="0">/vsicurl/ms.tif</SourceFilename><SourceBand>5</SourceBand></SimpleSource>
+  </VRTRasterBand>
+</VRTDataset>"""
+
+
+def test_band_numbers_by_platform():
+    assert band_numbers('WV03', ('nir', 'red', 'green')) == (7, 5, 3)
+    assert band_numbers('GE01', ('nir', 'red', 'green')) == (4, 3, 2)
+    assert band_numbers('XX01', ('red',)) is None
+    assert band_numbers('XX01', ('red',), band_count=4) == (3,)
+    assert band_numbers('GE01', ('coastal',)) is None
+
+
+def test_index_vrt_has_one_derived_band():
+    xml = index_vrt_xml(SUBSET_XML)
+    assert xml.count('<VRTRasterBand') == 1
+    assert 'subClass="VRTDerivedRasterBand"' in xml
+    assert '<PixelFunctionType>norm_diff</PixelFunctionType>' in xml
+    assert xml.index('<SourceBand>7</SourceBand>') < xml.index('<SourceBand>5</SourceBand>')
+    assert 'PixelFunctionLanguage>Python<' in index_vrt_xml(SUBSET_XML, python=True)
+
+
+def test_normalized_difference():
+    a = np.array([[3, 0]], dtype='uint16')
+    b = np.array([[1, 0]], dtype='uint16')
+    out = np.zeros((1, 2), dtype='float32')
+    normalized_difference([a, b], out)
+    assert out.tolist() == [[0.5, 0.0]]
+
+
+def test_preset_vrts_read_only_needed_bands(tmp_path):
+    gdal = pytest.importorskip('osgeo.gdal')
+    src = str(tmp_path / 'ms.tif')
+    ds = gdal.GetDriverByName('GTiff').Create(src, 20, 20, 4, gdal.GDT_UInt16)
+    ds.SetGeoTransform((500000, 2, 0, 4000000, 0, -2))
+    for band, value in zip(range(1, 5), (100, 200, 300, 500)):
+        ds.GetRasterBand(band).Fill(value)
+    ds = None
+
+    fc = gdal.Open(build_preset_vrt(src, PRESET_FALSE_COLOR, 'GE01', path=str(tmp_path / 'fc.vrt')))
+    assert fc.RasterCount == 3
+    assert fc.GetRasterBand(1).ReadAsArray().max() == 500
+
+    ndvi = gdal.Open(build_preset_vrt(src, PRESET_NDVI, 'GE01', path=str(tmp_path / 'ndvi.vrt')))
+    assert ndvi.RasterCount == 1
+    assert ndvi.GetRasterBand(1).ReadAsArray()[0, 0] == pytest.approx(0.25)
+
+    ndwi = gdal.Open(build_preset_vrt(src, PRESET_NDWI, 'GE01', path=str(tmp_path / 'ndwi.vrt')))
+    assert ndwi.GetRasterBand(1).ReadAsArray()[0, 0] == pytest.approx(-3 / 7)
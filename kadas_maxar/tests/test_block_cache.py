@@ -0,0 +1,162 @@
+import os
+import time
+from urllib.request import Request, urlopen
+
+from kadas_maxar.imagery import block_cache, cache_server, gdal_profile
+from kadas_maxar.imagery.block_cache import BlockCache
+from kadas_maxar.imagery.cache_server import CacheServer, decode_url, encode_url
+
+URL = 'https://maxar-opendata.s3.amazonaws.com/events/Event/ard/37/031133012123/2023-02-07/X-visual.tif'
+DATA = bytes(range(256)) * 40  # 10240 bytes
+
+
+class FakeUpstream:
+    def __init__(self, data=DATA):
+        self.data = data
+        self.calls = []
+
+    def __call__(self, url, start, end):
+        self.calls.append((start, end))
+        return self.data[start:end + 1]
+
+
+def _cache(tmp_path, **kwargs):
+    kwargs.setdefault('block_size', 1024)
+    return BlockCache(path=str(tmp_path / 'blocks.sqlite'), **kwargs)
+
+
+def test_read_fetches_missing_runs_once(tmp_path):
+    cache = _cache(tmp_path)
+    upstream = FakeUpstream()
+    assert cache.read(URL, 100, 2999, upstream) == DATA[100:3000]
+    assert upstream.calls == [(0, 3071)]
+    # second read: cached blocks 1-2, one run for blocks 3-4
+    assert cache.read(URL, 2000, 5000, upstream) == DATA[2000:5001]
+    assert upstream.calls[1:] == [(3072, 5119)]
+    assert cache.read(URL, 0, 5119, upstream) == DATA[:5120]
+    assert len(upstream.calls) == 2
+    assert cache.stats()['hits'] == 2 + 5
+
+
+def test_partial_last_block_and_persistence(tmp_path):
+    upstream = FakeUpstream()
+    cache = _cache(tmp_path)
+    assert cache.read(URL, 10000, 10239, upstream) == DATA[10000:]
+    cache.close()
+    reopened = _cache(tmp_path)
+    assert reopened.nbytes == 10240 - 9 * 1024
+    assert reopened.read(URL, 9300, 10239, upstream) == DATA[9300:]
+    assert len(upstream.calls) == 1
+
+
+def test_lru_eviction_under_budget(tmp_path):
+    cache = _cache(tmp_path, max_bytes=4096)
+    upstream = FakeUpstream()
+    for block in range(8):
+        cache.read(URL, block * 1024, block * 1024 + 1, upstream)
+    assert cache.nbytes <= 4096
+    assert cache.evictions >= 4
+    upstream.calls.clear()
+    cache.read(URL, 7 * 1024, 7 * 1024 + 10, upstream)  # most recent: still cached
+    assert upstream.calls == []
+    cache.read(URL, 0, 10, upstream)  # oldest: evicted
+    assert upstream.calls == [(0, 1023)]
+
+
+def test_etag_change_drops_blocks(tmp_path):
+    cache = _cache(tmp_path)
+    upstream = FakeUpstream()
+    cache.set_file_info(URL, len(DATA), '"v1"')
+    cache.read(URL, 0, 2047, upstream)
+    cache.set_file_info(URL, len(DATA), '"v1"')
+    assert cache.nbytes == 2048
+    cache.set_file_info(URL, len(DATA), '"v2"')
+    assert cache.nbytes == 0
+    assert cache.file_info(URL) == (len(DATA), '"v2"')
+
+
+def test_url_token_roundtrip():
+    assert decode_url(encode_url(URL)) == URL
+
+
+def test_server_serves_ranges_from_cache(tmp_path, monkeypatch):
+    upstream = FakeUpstream()
+    monkeypatch.setattr(cache_server, 'fetch_range', upstream)
+    monkeypatch.setattr(cache_server, 'fetch_info', lambda url: (len(DATA), '"v1"'))
+    server = CacheServer(_cache(tmp_path), port=0).start()
+    try:
+        local = server.url_for(URL)
+        assert local.startswith(server.prefix) and local.endswith('/X-visual.tif')
+        assert server.url_for('https://example.com/a.tif') == 'https://example.com/a.tif'
+
+        with urlopen(Request(local, headers={'Range': 'bytes=1000-1999'})) as response:
+            assert response.status == 206
+            assert response.headers['Content-Range'] == f'bytes 1000-1999/{len(DATA)}'
+            assert response.read() == DATA[1000:2000]
+        with urlopen(Request(local, headers={'Range': 'bytes=-240'})) as response:
+            assert response.read() == DATA[-240:]
+        with urlopen(Request(local, method='HEAD')) as response:
+            assert int(response.headers['Content-Length']) == len(DATA)
+        calls = len(upstream.calls)
+        with urlopen(Request(local, headers={'Range': 'bytes=1024-1500'})) as response:
+            assert response.read() == DATA[1024:1501]
+        assert len(upstream.calls) == calls
+    finally:
+        server.stop()
+
+
+def test_file_info_is_revalidated_after_ttl(tmp_path, monkeypatch):
+    cache = _cache(tmp_path, revalidate_after=60)
+    upstream = FakeUpstream()
+    cache.set_file_info(URL, len(DATA), '"v1"')
+    cache.read(URL, 0, 2047, upstream)
+    assert cache.file_info(URL) == (len(DATA), '"v1"')
+
+    now = time.time()
+    monkeypatch.setattr(block_cache.time, 'time', lambda: now + 61)
+    assert cache.file_info(URL) is None
+    assert cache.file_info(URL, fresh=False) == (len(DATA), '"v1"')
+    # Stesso ETag: i blocchi restano validi per un altro intervallo
+    cache.set_file_info(URL, len(DATA), '"v1"')
+    assert cache.file_info(URL) == (len(DATA), '"v1"')
+    assert cache.nbytes == 2048
+
+
+def test_server_revalidates_stale_files(tmp_path, monkeypatch):
+    cache = _cache(tmp_path, revalidate_after=0)
+    upstream = FakeUpstream()
+    info = [(len(DATA), '"v1"')]
+    monkeypatch.setattr(cache_server, 'fetch_range', upstream)
+    monkeypatch.setattr(cache_server, 'fetch_info', lambda url: info[0])
+    server = CacheServer(cache, port=0).start()
+    try:
+        local = server.url_for(URL)
+        with urlopen(Request(local, headers={'Range': 'bytes=0-99'})) as response:
+            assert response.read() == DATA[:100]
+        # Il file remoto cambia: i blocchi vecchi non vengono più serviti
+        upstream.data = DATA[::-1]
+        info[0] = (len(DATA), '"v2"')
+        with urlopen(Request(local, headers={'Range': 'bytes=0-99'})) as response:
+            assert response.headers['ETag'] == '"v2"'
+            assert response.read() == DATA[::-1][:100]
+
+        # Upstream irraggiungibile: informazioni in cache
+        def offline(url):
+            raise OSError('offline')
+        monkeypatch.setattr(cache_server, 'fetch_info', offline)
+        with urlopen(Request(local, headers={'Range': 'bytes=0-99'})) as response:
+            assert response.read() == DATA[::-1][:100]
+    finally:
+        server.stop()
+
+
+def test_proxy_bypass_is_restored_on_stop(tmp_path, monkeypatch):
+    monkeypatch.setattr(gdal_profile, 'gdal', None)  # GDAL < 3.6: NO_PROXY
+    monkeypatch.setenv('NO_PROXY', 'intranet.local')
+    monkeypatch.delenv('no_proxy', raising=False)
+    server = CacheServer(_cache(tmp_path), port=0).start()
+    assert os.environ['NO_PROXY'] == 'intranet.local,127.0.0.1'
+    assert os.environ['no_proxy'] == '127.0.0.1'
+    server.stop()
+    assert os.environ['NO_PROXY'] == 'intranet.local'
+    assert 'no_proxy' not in os.environ
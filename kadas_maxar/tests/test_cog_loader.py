@@ -0,0 +1,161 @@
+import pytest
+
+from kadas_maxar.imagery import cog_loader
+from kadas_maxar.imagery.cog_loader import CogJob, CogLoadManager, CogLoadReport
+
+
+class Signal:
+    def __init__(self):
+        self.slots = []
+        self.calls = []
+
+    def connect(self, slot):
+        self.slots.append(slot)
+
+    def emit(self, *args):
+        self.calls.append(args)
+        for slot in list(self.slots):
+            slot(*args)
+
+
+class StubWorker:
+    """CogOpenWorker replacement: the test decides when and how it ends."""
+
+    current = None
+
+    def __init__(self, job):
+        self.job = job
+        self.opened = Signal()
+        self.failed = Signal()
+        self.finished = Signal()
+        self.started = False
+
+    def start(self):
+        self.started = True
+
+    def wait(self, timeout_ms=None):
+        pass
+
+    def complete(self, error=None):
+        StubWorker.current = self
+        if error:
+            self.failed.emit(self.job, error)
+        else:
+            self.opened.emit(self.job, f'layer {self.job.name}')
+        self.finished.emit()
+
+
+@pytest.fixture
+def loader(monkeypatch):
+    workers = []
+
+    def worker(job):
+        workers.append(StubWorker(job))
+        return workers[-1]
+
+    monkeypatch.setattr(cog_loader, 'CogOpenWorker', worker)
+    manager = CogLoadManager(max_concurrent=2)
+    for name in ('layerReady', 'progress', 'finished'):
+        setattr(manager, name, Signal())
+    manager.sender = lambda: StubWorker.current
+    return manager, workers
+
+
+def _jobs(count, prefix='tile'):
+    return [CogJob(f'/vsicurl/https://h/{prefix}{i}.tif', f'{prefix} {i}') for i in range(count)]
+
+
+def test_job_defaults():
+    job = CogJob('/vsicurl/https://host/a.tif', 'Maxar visual - A')
+    assert job.provider == 'gdal'
+    assert job.url == '/vsicurl/https://host/a.tif'
+
+
+def test_report_summary_and_details():
+    report = CogLoadReport()
+    report.total = 14
+    report.loaded = ['a', 'b']
+    report.failed = [(CogJob('/vsicurl/x', f'tile {i}'), 'HTTP 403') for i in range(12)]
+    report.unavailable = 1
+    assert report.done == 14
+    assert report.summary() == 'Caricate 2/14 immagini, 12 errori, 1 non disponibili'
+    details = report.failure_details(limit=10).splitlines()
+    assert len(details) == 11
+    assert details[0] == '- tile 0: HTTP 403'
+    assert details[-1] == '... e altri 2'
+
+
+def test_pool_limit_and_queue_drain(loader):
+    manager, workers = loader
+    manager.start(_jobs(5), unavailable=1)
+    assert [w.started for w in workers] == [True, True]
+    assert len(manager._queue) == 3
+
+    workers[0].complete()
+    # Il posto liberato viene occupato dal primo job in coda
+    assert len(workers) == 3 and workers[2].job.name == 'tile 2'
+    workers[1].complete(error='HTTP 403')
+    workers[2].complete()
+    assert len(workers) == 5 and not manager._queue
+    assert not manager.finished.calls
+    workers[3].complete()
+    workers[4].complete()
+
+    assert not manager.isRunning()
+    assert len(manager.finished.calls) == 1
+    report = manager.finished.calls[0][0]
+    assert report.loaded == ['tile 0', 'tile 2', 'tile 3', 'tile 4']
+    assert [(job.name, error) for job, error in report.failed] == [('tile 1', 'HTTP 403')]
+    assert (report.total, report.unavailable) == (5, 1)
+    assert [args[0].name for args in manager.layerReady.calls] == report.loaded
+    assert manager.progress.calls[-1] == (5, 5)
+
+
+def test_cancel_drops_results_of_running_workers(loader):
+    manager, workers = loader
+    manager.start(_jobs(4))
+    manager.cancel()
+    assert len(manager.finished.calls) == 1
+    report = manager.finished.calls[0][0]
+    assert report.cancelled == 4 and not manager.isRunning()
+
+    # I worker annullati terminano dopo: risultato scartato, nessun nuovo avvio
+    workers[0].complete()
+    workers[1].complete(error='timeout')
+    assert len(workers) == 2
+    assert not manager.layerReady.calls
+    assert not report.loaded and not report.failed
+    assert not manager._orphans
+    assert len(manager.finished.calls) == 1
+
+    manager.cancel()
+    assert len(manager.finished.calls) == 1
+
+
+def test_start_during_batch_extends_report(loader):
+    manager, workers = loader
+    manager.start(_jobs(1, 'a'))
+    report = manager.report
+    manager.start(_jobs(2, 'b'), unavailable=2)
+    assert manager.report is report
+    assert (report.total, report.unavailable) == (3, 2)
+    assert len(workers) == 2
+
+    for worker in list(workers):
+        worker.complete()
+    workers[2].complete()
+    assert len(manager.finished.calls) == 1
+    assert manager.finished.calls[0][0] is report
+    assert report.loaded == ['a 0', 'b 0', 'b 1']
+
+    # Nuovo batch a pool fermo: nuovo report
+    manager.start(_jobs(1, 'c'))
+    assert manager.report is not report and manager.report.total == 1
+
+
+def test_empty_batch_finishes_once(loader):
+    manager, workers = loader
+    manager.start([], unavailable=3)
+    assert not workers
+    assert len(manager.finished.calls) == 1
+    assert manager.finished.calls[0][0].summary() == 'Caricate 0/0 immagini, 3 non disponibili'
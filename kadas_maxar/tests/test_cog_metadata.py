@@ -0,0 +1,79 @@
+import json
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from kadas_maxar.imagery.cog_metadata import CogMetadataCache, METADATA_VERSION, write_wrapper
+
+META = {
+    'version': METADATA_VERSION,
+    'file_size': 123456,
+    'header_bytes': 16384,
+    'size': [1024, 512],
+    'geotransform': [500000.0, 0.5, 0.0, 4000000.0, 0.0, -0.5],
+    'srs': 'PROJCS["WGS 84 / UTM zone 33N"]',
+    'bands': [
+        {'type': 'Byte', 'block': [512, 512], 'nodata': 0.0, 'color': 'Red'},
+        {'type': 'Byte', 'block': [512, 512], 'nodata': 0.0, 'color': 'Green'},
+        {'type': 'Byte', 'block': [512, 512], 'nodata': 0.0, 'color': 'Blue'},
+    ],
+    'overviews': [{'size': [512, 256], 'block': [512, 512]}, {'size': [256, 128], 'block': [512, 512]}],
+}
+
+
+def test_cache_roundtrip(tmp_path):
+    cache = CogMetadataCache(str(tmp_path))
+    assert cache.get('https://h/a.tif') is None
+    assert cache.wrapper('https://h/a.tif', '/vsicurl/https://h/a.tif') is None
+    with open(cache._path('https://h/a.tif'), 'w') as f:
+        json.dump(META, f)
+    assert CogMetadataCache(str(tmp_path)).get('https://h/a.tif')['header_bytes'] == 16384
+
+    with open(cache._path('https://h/old.tif'), 'w') as f:
+        json.dump(dict(META, version=0), f)
+    assert cache.get('https://h/old.tif') is None
+
+
+def test_wrapper_declares_sources_lazily(tmp_path):
+    path = write_wrapper(META, '/vsicurl/https://h/a.tif?x=1&y=2', str(tmp_path))
+    root = ET.parse(path).getroot()
+    assert root.get('rasterXSize') == '1024' and root.get('rasterYSize') == '512'
+    bands = root.findall('VRTRasterBand')
+    assert len(bands) == 3
+    source = bands[0].find('SimpleSource')
+    assert source.find('SourceFilename').text == '/vsicurl/https://h/a.tif?x=1&y=2'
+    assert source.find('SourceProperties').get('BlockXSize') == '512'
+    assert bands[0].find('NoDataValue').text == '0.0'
+    assert len(bands[0].findall('Overview')) == 2
+
+    ovr = ET.parse(str(tmp_path / bands[0].findall('Overview')[1].find('SourceFilename').text)).getroot()
+    assert ovr.get('rasterXSize') == '256'
+    assert ovr.find('GeoTransform').text.split(', ')[1] == '2.0'
+    assert ovr.find('VRTRasterBand/SimpleSource/OpenOptions/OOI').text == '1'
+
+    # Stesso sorgente: il file esistente viene riutilizzato
+    assert write_wrapper(META, '/vsicurl/https://h/a.tif?x=1&y=2', str(tmp_path)) == path
+
+
+def test_record_and_open_wrapper(tmp_path):
+    gdal = pytest.importorskip('osgeo.gdal')
+    tif = str(tmp_path / 'cog.tif')
+    ds = gdal.GetDriverByName('GTiff').Create(tif, 1024, 1024, 3, gdal.GDT_Byte, ['TILED=YES'])
+    ds.SetGeoTransform((500000, 0.5, 0, 4000000, 0, -0.5))
+    for i in range(3):
+        ds.GetRasterBand(i + 1).Fill(10 * (i + 1))
+        ds.GetRasterBand(i + 1).SetNoDataValue(0)
+    ds.BuildOverviews('AVERAGE', [2, 4])
+    ds = None
+
+    cache = CogMetadataCache(str(tmp_path / 'meta'))
+    meta = cache.record('https://h/cog.tif', tif)
+    assert meta['size'] == [1024, 1024]
+    assert len(meta['bands']) == 3 and meta['bands'][0]['nodata'] == 0
+    assert [o['size'] for o in meta['overviews']] == [[512, 512], [256, 256]]
+    assert meta['header_bytes'] > 0
+
+    wrapper = gdal.Open(cache.wrapper('https://h/cog.tif', tif))
+    assert wrapper.GetGeoTransform() == (500000, 0.5, 0, 4000000, 0, -0.5)
+    assert wrapper.GetRasterBand(1).GetOverviewCount() == 2
+    assert wrapper.GetRasterBand(2).GetOverview(1).ReadAsArray().max() == 20
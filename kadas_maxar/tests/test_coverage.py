@@ -0,0 +1,86 @@
+import numpy as np
+
+from kadas_maxar.data.coverage import AoiGrid, cover_costs, greedy_cover, points_in_polygons
+from kadas_maxar.data.footprints import FootprintRecord
+
+
+def square(x0, y0, x1, y1):
+    return [[(x0, y0), (x1, y0), (x1, y1), (x0, y1), (x0, y0)]]
+
+
+def test_points_in_polygons_with_hole():
+    outer = [(0, 0), (4, 0), (4, 4), (0, 4), (0, 0)]
+    hole = [(1, 1), (3, 1), (3, 3), (1, 3), (1, 1)]
+    x = np.array([0.5, 2.0, 3.5, 5.0])
+    y = np.array([0.5, 2.0, 3.5, 2.0])
+    assert points_in_polygons(x, y, [[outer, hole]]).tolist() == [True, False, True, False]
+
+
+def test_grid_cells_and_area():
+    grid = AoiGrid((0, 0, 1, 1), max_cells=10)
+    assert grid.size == 100 and grid.mask.all()
+    assert len(grid.cells([square(0, 0, 0.5, 1)])) == 50
+    assert len(grid.cells([square(5, 5, 6, 6)])) == 0
+    # AOI poligonale: solo le celle dentro il triangolo
+    triangle = AoiGrid((0, 0, 1, 1), [[[(0, 0), (1, 0), (0, 1), (0, 0)]]], max_cells=10)
+    assert 40 <= triangle.mask.sum() <= 55
+    assert len(triangle.cells([square(0, 0, 1, 1)])) == triangle.mask.sum()
+    # 1° x 1° all'equatore ~ 12'300 km²
+    assert abs(grid.area_km2(grid.mask) - 111.32 ** 2) / 111.32 ** 2 < 0.01
+
+
+def test_greedy_cover_prefers_few_cheap_tiles():
+    grid = AoiGrid((0, 0, 2, 1), max_cells=20)
+    tiles = [
+        square(0, 0, 1, 1),      # metà sinistra
+        square(1, 0, 2, 1),      # metà destra
+        square(0, 0, 2, 1),      # tutto, ma nuvoloso
+        square(0.2, 0.2, 0.8, 0.8),
+    ]
+    cells = [grid.cells([t]) for t in tiles]
+    chosen, uncovered = greedy_cover(cells, [1.0, 1.0, 1.5, 1.0], grid.size, grid.mask)
+    assert chosen == [2] and not uncovered.any()
+    chosen, uncovered = greedy_cover(cells, [1.0, 1.0, 5.0, 1.0], grid.size, grid.mask)
+    assert sorted(chosen) == [0, 1] and not uncovered.any()
+
+
+def test_greedy_cover_reports_gaps():
+    grid = AoiGrid((0, 0, 2, 1), max_cells=20)
+    chosen, uncovered = greedy_cover([grid.cells([square(0, 0, 1, 1)])], [1.0], grid.size, grid.mask)
+    assert chosen == [0] and uncovered.sum() == grid.size // 2
+
+
+def test_cover_costs_preferences():
+    records = [
+        FootprintRecord(0, datetime="2024-01-01T10:00:00Z", gsd=0.5, cloud_cover=50),
+        FootprintRecord(1, datetime="2024-03-01T10:00:00Z", gsd=0.3, cloud_cover=0),
+        FootprintRecord(2, datetime="2024-02-01T10:00:00Z", gsd=None, cloud_cover=None),
+    ]
+    costs = cover_costs(records, "cloud")
+    assert costs[1] < costs[2] < costs[0]
+    assert cover_costs(records, "recent")[1] == min(cover_costs(records, "recent"))
+    from datetime import date
+    post = cover_costs(records, "post_event", event_date=date(2024, 1, 15))
+    assert post[0] > post[2] and post[0] > post[1]
+
+
+def test_coverage_engine_incremental():
+    from kadas_maxar.data.coverage import CoverageEngine
+
+    grid = AoiGrid((0, 0, 2, 1), max_cells=20)
+    footprints = {0: [square(0, 0, 1, 1)], 1: [square(0.5, 0, 1.5, 1)], 2: [square(5, 5, 6, 6)]}
+    engine = CoverageEngine(grid)
+    assert engine.update([0, 1], footprints.get)
+    stats = engine.stats()
+    assert stats['footprints'] == 2 and stats['max_depth'] == 2
+    assert abs(stats['ratio'] - 0.75) < 1e-9
+    assert stats['depth_cells'] == [50, 100, 50, 0]
+    assert engine.gap_rectangles() == [(1.5, 0.0, 2.0, 1.0)]
+
+    # Nuovo filtro: esce 1, entra 2 (fuori AOI)
+    assert engine.update([0, 2], footprints.get)
+    stats = engine.stats()
+    assert stats['max_depth'] == 1 and abs(stats['ratio'] - 0.5) < 1e-9
+    assert engine.gap_rectangles() == [(1.0, 0.0, 2.0, 1.0)]
+    assert engine.update([], footprints.get) and not engine.depth.any()
+    assert not CoverageEngine(grid).update([0], footprints.get, cancelled=lambda: True)
@@ -0,0 +1,128 @@
+import hashlib
+import os
+
+from kadas_maxar.imagery.downloads import (
+    STATUS_DONE,
+    STATUS_FAILED,
+    STATUS_QUEUED,
+    DownloadQueue,
+    DownloadTask,
+    Downloader,
+    local_path,
+)
+
+URL = 'https://maxar-opendata.s3.amazonaws.com/events/Event/ard/37/031133012123/2023-02-07/X-visual.tif'
+DATA = os.urandom(10000)
+MD5 = f'"{hashlib.md5(DATA).hexdigest()}"'
+
+
+class FakeUpstream:
+    def __init__(self, data=DATA, etag=MD5, fail_at=None):
+        self.data = data
+        self.etag = etag
+        self.fail_at = fail_at
+        self.ranges = []
+
+    def info(self, url):
+        return len(self.data), self.etag
+
+    def fetch(self, url, start, end):
+        if self.fail_at is not None and start == self.fail_at:
+            raise IOError('connection reset')
+        self.ranges.append((start, end))
+        return self.data[start:end + 1]
+
+
+def _setup(tmp_path, upstream, **kwargs):
+    queue = DownloadQueue(path=str(tmp_path / 'queue.json'))
+    task = DownloadTask(URL, local_path(URL, str(tmp_path / 'files')))
+    queue.add(task)
+    downloader = Downloader(queue, max_workers=3, chunk_size=1024,
+                            fetch_info=upstream.info, fetch_range=upstream.fetch, **kwargs)
+    return queue, task, downloader
+
+
+def test_local_path_mirrors_url(tmp_path):
+    path = local_path(URL, str(tmp_path))
+    assert path == os.path.join(str(tmp_path), 'events', 'Event', 'ard', '37', '031133012123',
+                                '2023-02-07', 'X-visual.tif')
+
+
+def test_parallel_chunks_verified_and_renamed(tmp_path):
+    upstream = FakeUpstream()
+    queue, task, downloader = _setup(tmp_path, upstream)
+    done, progress = [], []
+    downloader.run([task], on_progress=lambda d, t: progress.append((d, t)), on_done=done.append)
+    assert done == [task] and task.status == STATUS_DONE
+    assert open(task.path, 'rb').read() == DATA
+    assert not os.path.exists(task.part_path)
+    assert sorted(upstream.ranges)[-1] == (9216, 9999)
+    assert progress[-1] == (10000, 10000)
+    assert queue.local_file(URL) == task.path
+    assert DownloadQueue(path=queue.path).get(URL).status == STATUS_DONE
+
+
+def test_resume_fetches_only_missing_chunks(tmp_path):
+    upstream = FakeUpstream(fail_at=5120)
+    queue, task, downloader = _setup(tmp_path, upstream)
+    downloader.run([task])
+    assert task.status == STATUS_FAILED
+    assert 5 not in task.chunks
+    missing = [(c * 1024, min(c * 1024 + 1023, 9999)) for c in range(10) if c not in task.chunks]
+
+    # "riavvio": coda riletta dal disco, solo i chunk mancanti vengono scaricati
+    upstream = FakeUpstream()
+    queue = DownloadQueue(path=queue.path)
+    task = queue.get(URL)
+    assert queue.add(DownloadTask(URL, task.path)) and task.status == STATUS_QUEUED
+    Downloader(queue, chunk_size=1024, fetch_info=upstream.info, fetch_range=upstream.fetch).run([task])
+    assert sorted(upstream.ranges) == missing
+    assert task.status == STATUS_DONE
+    assert open(task.path, 'rb').read() == DATA
+
+
+def test_checksum_mismatch_fails(tmp_path):
+    upstream = FakeUpstream(etag='"%s"' % ('0' * 32))
+    queue, task, downloader = _setup(tmp_path, upstream)
+    failed = []
+    downloader.run([task], on_failed=failed.append)
+    assert failed == [task] and 'MD5' in task.error
+    assert not os.path.exists(task.part_path) and not os.path.exists(task.path)
+    assert task.chunks == set()
+
+
+def test_rename_error_fails_task_and_keeps_part(tmp_path, monkeypatch):
+    upstream = FakeUpstream()
+    queue, task, downloader = _setup(tmp_path, upstream)
+
+    def locked(src, dst):
+        raise PermissionError(13, 'file in use', dst)
+    monkeypatch.setattr(os, 'replace', locked)
+    failed = []
+    downloader.run([task], on_failed=failed.append)
+    assert failed == [task] and task.status == STATUS_FAILED
+    assert 'file in use' in task.error
+    # .part e chunk restano: un nuovo tentativo ripete solo lo spostamento
+    assert os.path.exists(task.part_path) and len(task.chunks) == 10
+    assert queue.pending() == []
+
+    monkeypatch.undo()
+    task.status, task.error = STATUS_QUEUED, None
+    upstream.ranges.clear()
+    downloader.run([task])
+    assert task.status == STATUS_DONE and upstream.ranges == []
+    assert open(task.path, 'rb').read() == DATA
+
+
+def test_multipart_etag_checks_size_only(tmp_path):
+    upstream = FakeUpstream(etag='"abc-3"')
+    queue, task, downloader = _setup(tmp_path, upstream)
+    downloader.run([task])
+    assert task.status == STATUS_DONE
+
+
+def test_queue_deduplicates(tmp_path):
+    queue = DownloadQueue(path=str(tmp_path / 'queue.json'))
+    assert queue.add(DownloadTask(URL, str(tmp_path / 'a.tif')))
+    assert not queue.add(DownloadTask(URL, str(tmp_path / 'a.tif')))
+    assert len(queue.pending()) == 1
@@ -0,0 +1,67 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from kadas_maxar.data.event_cache import EventCache
+from kadas_maxar.data.footprints import FootprintStore
+from kadas_maxar.data.spatial_index import SpatialIndex
+
+
+def _store(event, count=10):
+    features = []
+    for i in range(count):
+        x = float(i)
+        features.append({
+            'properties': {'quadkey': '1202301', 'catalog_id': event},
+            'geometry': {'type': 'Polygon', 'coordinates': [[[x, 0], [x + 0.5, 0], [x + 0.5, 0.5], [x, 0]]]},
+        })
+    return FootprintStore.from_features(features, event=event)
+
+
+def test_spatial_index_query_matches_linear_scan():
+    rng = np.random.default_rng(0)
+    mins = rng.uniform(-10, 10, size=(500, 2))
+    sizes = rng.uniform(0.01, 0.5, size=(500, 2))
+    bounds = np.hstack([mins, mins + sizes])
+    bounds[7] = np.nan
+    index = SpatialIndex(bounds)
+    assert len(index) == 499
+    for bbox in [(-1, -1, 1, 1), (5, 5, 5.01, 5.01), (-20, -20, 20, 20), (30, 30, 31, 31)]:
+        expected = np.nonzero(
+            (bounds[:, 0] <= bbox[2]) & (bounds[:, 2] >= bbox[0])
+            & (bounds[:, 1] <= bbox[3]) & (bounds[:, 3] >= bbox[1])
+        )[0]
+        assert index.query(bbox).tolist() == expected.tolist()
+
+
+def test_spatial_index_from_store_and_empty():
+    store = _store('A')
+    index = SpatialIndex.from_store(store)
+    assert index.query((2.1, 0.1, 3.2, 0.2)).tolist() == [2, 3]
+    assert SpatialIndex(np.zeros((0, 4))).query((0, 0, 1, 1)).tolist() == []
+
+
+def test_lru_order_and_stats():
+    cache = EventCache(max_entries=2)
+    cache.put('A', _store('A'))
+    cache.put('B', _store('B'))
+    assert cache.get('A') is not None  # A is now most recent
+    cache.put('C', _store('C'))
+    assert 'B' not in cache
+    assert 'A' in cache and 'C' in cache
+    assert cache.get('B') is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions']) == (1, 1, 1)
+
+
+def test_memory_budget():
+    one = EventCache().put('A', _store('A', 200)).nbytes
+    cache = EventCache(max_entries=10, max_bytes=int(one * 2.5))
+    for event in 'ABCD':
+        cache.put(event, _store(event, 200))
+    assert len(cache) == 2
+    assert cache.nbytes <= cache.max_bytes
+    # an event larger than the whole budget is not cached at all
+    assert EventCache(max_bytes=one // 2).put('A', _store('A', 200)) is None
+    cache.resize(max_entries=0)
+    assert len(cache) == 0
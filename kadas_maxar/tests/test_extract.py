@@ -0,0 +1,46 @@
+import pytest
+
+from kadas_maxar.imagery.extract import extract_path, extract_window, overview_level, resolution_in_crs
+
+
+def test_overview_level_not_coarser_than_target():
+    factors = [2, 4, 8, 16]
+    assert overview_level(0.3, factors, 0) == -1
+    assert overview_level(0.3, factors, 0.5) == -1
+    assert overview_level(0.3, factors, 0.6) == 0
+    assert overview_level(0.3, factors, 2.0) == 1
+    assert overview_level(0.3, factors, 100.0) == 3
+
+
+def test_resolution_in_geographic_crs():
+    assert resolution_in_crs(2.0) == (2.0, 2.0)
+    xres, yres = resolution_in_crs(111.32, geographic=True, latitude=60.0)
+    assert yres == pytest.approx(0.001)
+    assert xres == pytest.approx(0.002)
+
+
+def test_extract_path_is_stable(tmp_path):
+    a = extract_path('Maxar visual AOI - A', (1, 2, 3, 4), 2.0, 'EPSG:2056', directory=str(tmp_path))
+    assert a == extract_path('Maxar visual AOI - A', (1, 2, 3, 4), 2.0, 'EPSG:2056', directory=str(tmp_path))
+    assert a != extract_path('Maxar visual AOI - A', (1, 2, 3, 5), 2.0, 'EPSG:2056', directory=str(tmp_path))
+    assert a.endswith('.tif') and ' ' not in a.rsplit('/', 1)[-1]
+
+
+def test_extract_window_reads_overview(tmp_path):
+    gdal = pytest.importorskip('osgeo.gdal')
+    from osgeo import osr
+    src = str(tmp_path / 'tile.tif')
+    ds = gdal.GetDriverByName('GTiff').Create(src, 512, 512, 1, gdal.GDT_Byte, ['TILED=YES'])
+    ds.SetGeoTransform((500000, 0.5, 0, 4000000, 0, -0.5))
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(32637)
+    ds.SetProjection(srs.ExportToWkt())
+    ds.GetRasterBand(1).Fill(7)
+    ds.BuildOverviews('AVERAGE', [2, 4])
+    ds = None
+
+    out = extract_window(src, str(tmp_path / 'aoi.tif'), (500000, 3999900, 500100, 4000000),
+                         srs.ExportToWkt(), gsd=2.0)
+    ds = gdal.Open(out)
+    assert (ds.RasterXSize, ds.RasterYSize) == (50, 50)
+    assert ds.GetRasterBand(1).ReadAsArray().min() == 7
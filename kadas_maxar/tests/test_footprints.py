@@ -0,0 +1,57 @@
+from kadas_maxar.data.footprints import FootprintRecord, FootprintStore
+
+
+BASE = 'https://maxar-opendata.s3.amazonaws.com/events/Event/ard/37/031133012123/2023-02-07/'
+
+
+def _props(**extra):
+    props = {
+        'datetime': '2023-02-07T08:29:44Z',
+        'platform': 'WV03',
+        'gsd': 0.35,
+        'cloud_cover': 3.0,
+        'catalog_id': '10300100E3CDF600',
+        'quadkey': '031133012123',
+        'visual': BASE + '10300100E3CDF600-visual.tif',
+        'ms_analytic': BASE + '10300100E3CDF600-ms.tif',
+        'pan_analytic': BASE + '10300100E3CDF600-pan.tif',
+    }
+    props.update(extra)
+    return props
+
+
+def test_record_urls_share_base():
+    record = FootprintRecord.from_properties(0, _props())
+    assert record.url('visual') == BASE + '10300100E3CDF600-visual.tif'
+    assert record.url('pan_analytic') == BASE + '10300100E3CDF600-pan.tif'
+    assert record._ms_analytic == '10300100E3CDF600-ms.tif'
+    assert record.date == '2023-02-07'
+    assert not hasattr(record, '__dict__')
+
+
+def test_record_missing_and_foreign_urls():
+    record = FootprintRecord.from_properties(0, _props(ms_analytic=None, pan_analytic='https://other.host/x-pan.tif'))
+    assert record.url('ms_analytic') is None
+    assert record.url('pan_analytic') == 'https://other.host/x-pan.tif'
+    assert record.url('visual').startswith(BASE)
+
+
+def test_strings_are_interned():
+    a = FootprintRecord.from_properties(0, _props())
+    b = FootprintRecord.from_properties(1, _props())
+    assert a.platform is b.platform
+    assert a.catalog_id is b.catalog_id
+    assert a._url_base is b._url_base
+
+
+def test_store_from_features():
+    features = [
+        {'properties': _props(), 'geometry': {'type': 'Polygon', 'coordinates': [[[0, 0], [1, 0], [1, 1], [0, 0]]]}},
+        {'properties': _props(quadkey='031133012130'), 'geometry': None},
+    ]
+    store = FootprintStore.from_features(features, event='Event')
+    assert len(store) == 2
+    assert store[1].index == 1
+    assert store[1].quadkey == '031133012130'
+    assert store.rings.bounds(0) == (0.0, 0.0, 1.0, 1.0)
+    assert store.rings.bounds(1) is None
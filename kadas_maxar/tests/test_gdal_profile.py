@@ -0,0 +1,89 @@
+import types
+from urllib.parse import parse_qs
+
+from kadas_maxar.imagery import gdal_profile
+from kadas_maxar.imagery.gdal_profile import CogAccessProfile
+
+COG = 'https://maxar-opendata.s3.amazonaws.com/events/Event/ard/37/031133012123/2023-02-07/X-visual.tif'
+
+
+class FakeOldGdal:
+    """GDAL < 3.6: thread-local config only."""
+
+    def __init__(self):
+        self.thread_local = {}
+
+    def GetThreadLocalConfigOption(self, key, default):
+        return self.thread_local.get(key, default)
+
+    def SetThreadLocalConfigOption(self, key, value):
+        if value is None:
+            self.thread_local.pop(key, None)
+        else:
+            self.thread_local[key] = value
+
+
+class FakeGdal(FakeOldGdal):
+    def __init__(self):
+        super().__init__()
+        self.path_options = {}
+
+    def SetPathSpecificOption(self, prefix, key, value):
+        self.path_options.setdefault(prefix, {})[key] = value
+
+    def ClearPathSpecificOptions(self, prefix):
+        self.path_options.pop(prefix, None)
+
+
+def test_url_options_without_path_specific_support(monkeypatch):
+    monkeypatch.setattr(gdal_profile, 'gdal', None)
+    profile = CogAccessProfile()
+    source = profile.source(COG)
+    assert source.startswith('/vsicurl?')
+    options = parse_qs(source[len('/vsicurl?'):])
+    assert options['list_dir'] == ['no']
+    assert options['empty_dir'] == ['yes']
+    assert options['url'] == [COG]
+    # other hosts and a disabled profile keep plain /vsicurl/
+    assert profile.source('https://example.com/a.tif') == '/vsicurl/https://example.com/a.tif'
+    assert CogAccessProfile(enabled=False).source(COG) == f'/vsicurl/{COG}'
+
+
+def test_path_specific_options_are_scoped(monkeypatch):
+    fake = FakeGdal()
+    monkeypatch.setattr(gdal_profile, 'gdal', fake)
+    profile = CogAccessProfile()
+    assert profile.source(COG) == f'/vsicurl/{COG}'
+    scoped = fake.path_options['/vsicurl/https://maxar-opendata.s3.amazonaws.com/']
+    assert scoped['GDAL_HTTP_MERGE_CONSECUTIVE_RANGES'] == 'YES'
+    assert scoped['GDAL_HTTP_MULTIPLEX'] == 'YES'
+    assert fake.thread_local == {}
+    profile.uninstall()
+    assert fake.path_options == {}
+
+
+def test_thread_local_options_are_restored(monkeypatch):
+    fake = FakeOldGdal()
+    monkeypatch.setattr(gdal_profile, 'gdal', fake)
+    fake.thread_local['VSI_CACHE'] = 'FALSE'
+    with CogAccessProfile().opening():
+        assert fake.thread_local['GDAL_HTTP_VERSION'] == '2'
+        assert fake.thread_local['VSI_CACHE'] == 'TRUE'
+    assert fake.thread_local == {'VSI_CACHE': 'FALSE'}
+
+
+def test_block_cache_prefix_bypasses_proxy(monkeypatch):
+    fake = FakeGdal()
+    monkeypatch.setattr(gdal_profile, 'gdal', fake)
+    prefix = 'http://127.0.0.1:47821/c/'
+    server = types.SimpleNamespace(running=True, prefix=prefix, url_for=lambda url: f'{prefix}x/X-visual.tif')
+    for enabled, installed in ((True, 3), (False, 1)):
+        fake.path_options.clear()
+        profile = CogAccessProfile(enabled=enabled)
+        profile.cache_server = server
+        assert profile.source(COG) == f'/vsicurl/{prefix}x/X-visual.tif'
+        scoped = fake.path_options[f'/vsicurl/{prefix}']
+        assert scoped['GDAL_HTTP_PROXY'] == ''
+        assert 'GDAL_HTTP_MULTIPLEX' not in scoped
+        # Profilo disattivato: solo l'esclusione del proxy per la cache locale
+        assert len(fake.path_options) == installed
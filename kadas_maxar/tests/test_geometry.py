@@ -0,0 +1,45 @@
+from kadas_maxar.data.geometry import (
+    COORD_SCALE,
+    GEOM_MULTIPOLYGON,
+    GEOM_NONE,
+    GEOM_POLYGON,
+    RingStore,
+    decode_ring,
+    encode_ring,
+)
+
+
+def test_ring_roundtrip_within_quantum():
+    ring = [[-122.4194155, 37.7749295], [-122.41, 37.77], [179.9999999, -89.9999999], [-122.4194155, 37.7749295]]
+    buf = bytearray()
+    encode_ring(ring, buf)
+    decoded = decode_ring(bytes(buf))
+    assert len(decoded) == len(ring)
+    for (x, y), (ex, ey) in zip(decoded, ring):
+        assert abs(x - ex) <= 0.5 / COORD_SCALE
+        assert abs(y - ey) <= 0.5 / COORD_SCALE
+
+
+def test_store_polygon_and_multipolygon():
+    square = [[[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0], [0.0, 0.0]]]
+    store = RingStore.from_features([
+        {'geometry': {'type': 'Polygon', 'coordinates': square}},
+        {'geometry': None},
+        {'geometry': {'type': 'MultiPolygon', 'coordinates': [square, [[[2.0, 2.0], [3.0, 2.0], [3.0, 3.0], [2.0, 2.0]]]]}},
+    ])
+    assert len(store) == 3
+    assert store.geom_type(0) == GEOM_POLYGON
+    assert store.geom_type(1) == GEOM_NONE
+    assert store.geom_type(2) == GEOM_MULTIPOLYGON
+    assert store.geometry(0) == {'type': 'Polygon', 'coordinates': square}
+    assert store.geometry(1) is None
+    assert store.bounds(1) is None
+    assert store.bounds(2) == (0.0, 0.0, 3.0, 3.0)
+    assert len(store.polygons(2)) == 2
+
+
+def test_store_is_compact():
+    ring = [[36.0 + i * 1e-3, 37.0 + i * 1e-3] for i in range(5)]
+    store = RingStore.from_features([{'geometry': {'type': 'Polygon', 'coordinates': [ring]}}] * 1000)
+    # well under 100 bytes per vertex (5000 vertices)
+    assert store.nbytes < 5000 * 20
@@ -0,0 +1,98 @@
+from datetime import date
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from kadas_maxar.data.footprints import FootprintRecord, FootprintStore
+from kadas_maxar.data.geometry import RingStore
+from kadas_maxar.data.global_index import GlobalFootprintIndex, KM_PER_DEGREE, day_ordinals
+from kadas_maxar.data.snapshot import SnapshotStore
+
+
+def _store(event, boxes, days, clouds):
+    rings = RingStore()
+    records = []
+    for i, ((x0, y0, x1, y1), day, cloud) in enumerate(zip(boxes, days, clouds)):
+        rings.append({"type": "Polygon", "coordinates": [[[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]]]})
+        records.append(FootprintRecord(i, datetime=f"{day}T10:00:00Z" if day else "", cloud_cover=cloud))
+    return FootprintStore(records, rings, event=event)
+
+
+def test_day_ordinals():
+    assert day_ordinals(["2023-02-07T08:29:44Z", "", None, "garbage"]).tolist() == [
+        date(2023, 2, 7).toordinal(), -1, -1, -1,
+    ]
+
+
+def test_nearest_across_events_with_filters():
+    index = GlobalFootprintIndex()
+    index.add_store("quake", _store(
+        "quake",
+        [(0, 0, 1, 1), (0, 0, 1, 1), (3, 0, 4, 1)],
+        ["2023-02-07", "2023-02-10", "2023-02-08"],
+        [0, 80, 5],
+    ))
+    index.add_store("flood", _store("flood", [(1.5, 0, 2, 1)], ["2024-05-01"], [None]))
+    hits = index.nearest(0.5, 0.5, k=3)
+    # Dentro il bbox: distanza 0, prima la più recente
+    assert [(h.event, h.index) for h in hits] == [("quake", 1), ("quake", 0), ("flood", 0)]
+    assert hits[0].distance_km == 0.0 and hits[0].date == date(2023, 2, 10)
+    assert hits[2].distance_km == pytest.approx(1.0 * KM_PER_DEGREE * np.cos(np.radians(0.5)))
+
+    assert [(h.event, h.index) for h in index.nearest(0.5, 0.5, k=2, max_cloud=10)] == [("quake", 0), ("flood", 0)]
+    assert [(h.event, h.index) for h in index.nearest(0.5, 0.5, k=5, since=date(2024, 1, 1))] == [("flood", 0)]
+    assert [(h.event, h.index) for h in index.nearest(0.5, 0.5, k=5, until=date(2023, 2, 8))] == [
+        ("quake", 0), ("quake", 2),
+    ]
+    # Lontano da tutto: i più vicini comunque
+    assert [(h.event, h.index) for h in index.nearest(60, 40, k=1)] == [("quake", 2)]
+
+    index.discard("flood")
+    assert "flood" not in index and len(index) == 3
+    assert all(h.event == "quake" for h in index.nearest(1.7, 0.5, k=3))
+
+
+def test_nearest_matches_brute_force():
+    rng = np.random.default_rng(3)
+    index = GlobalFootprintIndex()
+    all_bounds = []
+    for event in range(4):
+        x0, y0 = rng.uniform(0, 30, 500) + 40 * event, rng.uniform(0, 30, 500)
+        bounds = np.c_[x0, y0, x0 + 0.2, y0 + 0.2]
+        index.add(f"ev{event}", bounds, ["2023-01-01"] * 500, rng.uniform(0, 100, 500))
+        all_bounds.append(bounds)
+    bounds = np.concatenate(all_bounds)
+    clouds = np.concatenate([index._events[f"ev{e}"][3] for e in range(4)])
+    for x, y in [(15, 15), (55, 10), (200, -50)]:
+        hits = index.nearest(x, y, k=7, max_cloud=30)
+        dx = np.maximum(np.maximum(bounds[:, 0] - x, x - bounds[:, 2]), 0) * np.cos(np.radians(y))
+        dy = np.maximum(np.maximum(bounds[:, 1] - y, y - bounds[:, 3]), 0)
+        expected = np.sort(KM_PER_DEGREE * np.hypot(dx, dy)[clouds <= 30])[:7]
+        assert [h.distance_km for h in hits] == pytest.approx(expected.tolist())
+
+
+def test_snapshot_events_are_indexed_from_columns(tmp_path):
+    features = [
+        {
+            "type": "Feature",
+            "properties": {"datetime": "2023-02-07T08:29:44Z", "cloud_cover": 12.5, "quadkey": "0"},
+            "geometry": {"type": "Polygon", "coordinates": [[[1, 1], [2, 1], [2, 2], [1, 2], [1, 1]]]},
+        },
+        {"type": "Feature", "properties": {"quadkey": "3"}, "geometry": None},
+    ]
+    store = SnapshotStore(str(tmp_path))
+    store.save("quake", features, etag="a")
+    snapshots = list(store.snapshots())
+    assert [s.event for s in snapshots] == ["quake"]
+    snapshot = snapshots[0]
+    assert snapshot.column("datetime") == ["2023-02-07T08:29:44Z", None]
+    assert snapshot.column("missing") is None
+
+    index = GlobalFootprintIndex()
+    index.add_snapshot(snapshot, version=snapshot.path)
+    assert index.version("quake") == snapshot.path
+    hits = index.nearest(1.5, 1.5, k=2)
+    assert [(h.index, h.distance_km, h.cloud_cover) for h in hits][0] == (0, 0.0, 12.5)
+    # Senza geometria: bbox dal quadkey "3" (quadrante sud-est)
+    assert hits[1].index == 1 and hits[1].date is None and hits[1].cloud_cover is None
@@ -0,0 +1,152 @@
+import xml.etree.ElementTree as ET
+
+from kadas_maxar.data.layer_registry import LayerRegistry, mosaic_key
+
+
+class Signal:
+    def __init__(self):
+        self.slots = []
+
+    def connect(self, slot):
+        self.slots.append(slot)
+
+    def disconnect(self, slot):
+        self.slots.remove(slot)
+
+    def emit(self, *args):
+        for slot in list(self.slots):
+            slot(*args)
+
+
+class Layer:
+    count = 0
+
+    def __init__(self):
+        Layer.count += 1
+        self._id = f'layer{Layer.count}'
+        self.properties = {}
+
+    def id(self):
+        return self._id
+
+    def setCustomProperty(self, key, value):
+        self.properties[key] = value
+
+    def customProperty(self, key, default=None):
+        return self.properties.get(key, default)
+
+
+class Project:
+    def __init__(self, layers=()):
+        self.layers = {layer.id(): layer for layer in layers}
+        self.layersAdded = Signal()
+        self.layersWillBeRemoved = Signal()
+        self.remove_calls = 0
+
+    def mapLayers(self):
+        return dict(self.layers)
+
+    def mapLayer(self, layer_id):
+        return self.layers.get(layer_id)
+
+    def addMapLayer(self, layer):
+        self.layers[layer.id()] = layer
+        self.layersAdded.emit([layer])
+
+    def removeMapLayers(self, layer_ids):
+        self.remove_calls += 1
+        self.layersWillBeRemoved.emit(list(layer_ids))
+        for layer_id in layer_ids:
+            self.layers.pop(layer_id, None)
+
+
+def test_find_and_remove_tagged_layers():
+    project = Project()
+    registry = LayerRegistry(project)
+    cog, foreign = Layer(), Layer()
+    LayerRegistry.tag(cog, 'https://h/a.tif', 'visual')
+    project.addMapLayer(cog)
+    project.addMapLayer(foreign)
+
+    assert registry.find('https://h/a.tif', 'visual') is cog
+    assert registry.find('https://h/a.tif', 'ms_analytic') is None
+    assert len(registry) == 1
+
+    assert registry.remove_all() == 1
+    assert project.remove_calls == 1
+    assert list(project.layers) == [foreign.id()]
+    assert registry.find('https://h/a.tif', 'visual') is None
+
+
+def test_existing_project_layers_and_user_removal():
+    saved = Layer()
+    LayerRegistry.tag(saved, 'https://h/b.tif', 'visual')
+    project = Project([saved, Layer()])
+    registry = LayerRegistry(project)
+    assert registry.find('https://h/b.tif', 'visual') is saved
+
+    project.removeMapLayers([saved.id()])
+    assert registry.find('https://h/b.tif', 'visual') is None
+    assert registry.remove_all() == 0
+
+    registry.disconnect()
+    assert not project.layersAdded.slots and not project.layersWillBeRemoved.slots
+
+
+def test_layer_ids_by_kind():
+    project = Project()
+    registry = LayerRegistry(project)
+    footprints, cog = Layer(), Layer()
+    LayerRegistry.tag(footprints, 'Event_1', 'footprints')
+    LayerRegistry.tag(cog, 'https://h/a.tif', 'visual')
+    project.addMapLayer(footprints)
+    project.addMapLayer(cog)
+    assert registry.layer_ids('footprints') == [footprints.id()]
+    assert sorted(registry.layer_ids()) == sorted([footprints.id(), cog.id()])
+
+
+def test_mosaic_key_ignores_order():
+    assert mosaic_key(['a', 'b']) == mosaic_key(['b', 'a'])
+    assert mosaic_key(['a', 'b']) != mosaic_key(['a', 'c'])
+    assert mosaic_key(['a']).startswith('mosaic:')
+
+
+def test_layers_reading_a_cog_through_wrapper_and_mosaic(tmp_path):
+    from kadas_maxar.imagery.cog_metadata import write_wrapper
+    from kadas_maxar.imagery.mosaic import replace_source
+    from kadas_maxar.tests.test_cog_metadata import META
+
+    url, other = 'https://h/a.tif', 'https://h/b.tif'
+    wrapper = write_wrapper(META, f'/vsicurl/{url}', str(tmp_path))
+    mosaic = tmp_path / 'mosaic.vrt'
+    mosaic.write_text(
+        '<VRTDataset><VRTRasterBand band="1">'
+        f'<SimpleSource><SourceFilename relativeToVRT="1">{wrapper.rsplit("/", 1)[1]}</SourceFilename></SimpleSource>'
+        f'<SimpleSource><SourceFilename relativeToVRT="0">/vsicurl/{other}</SourceFilename></SimpleSource>'
+        '</VRTRasterBand></VRTDataset>'
+    )
+    project = Project()
+    registry = LayerRegistry(project)
+    tile, tiles = Layer(), Layer()
+    LayerRegistry.tag(tile, url, 'visual', {url: wrapper})
+    LayerRegistry.tag(tiles, mosaic_key([url, other]), 'visual', {url: wrapper, other: f'/vsicurl/{other}'})
+    project.addMapLayer(tile)
+    project.addMapLayer(tiles)
+
+    # La sorgente del layer è il VRT locale, senza l'URL remoto
+    assert url not in wrapper
+    assert {layer.id() for layer in registry.reading(url)} == {tile.id(), tiles.id()}
+    assert registry.reading(other) == [tiles]
+
+    # Download completato: il tile passa al file, il mosaico a un VRT che lo legge
+    local = str(tmp_path / 'a.tif')
+    assert replace_source(wrapper, LayerRegistry.members_of(tile)[url], local) == local
+    switched = replace_source(str(mosaic), LayerRegistry.members_of(tiles)[url], local)
+    assert switched != str(mosaic)
+    names = [e.text for e in ET.parse(switched).getroot().iter('SourceFilename')]
+    assert names == [local, f'/vsicurl/{other}']
+    assert replace_source(str(mosaic), '/vsicurl/https://h/c.tif', local) is None
+
+    project.removeMapLayers([tiles.id()])
+    assert registry.reading(url) == [tile]
+    assert registry.reading(other) == []
@@ -0,0 +1,70 @@
+from kadas_maxar.imagery.layer_tree import group_node, insert_layers
+
+
+class Group:
+    def __init__(self, name=''):
+        self.name = name
+        self.children = []
+
+    def findGroup(self, name):
+        return next((c for c in self.children if isinstance(c, Group) and c.name == name), None)
+
+    def insertGroup(self, index, name):
+        group = Group(name)
+        self.children.insert(index, group)
+        return group
+
+    def insertLayer(self, index, layer):
+        self.children.insert(index, layer)
+
+
+class Project:
+    def __init__(self):
+        self.root = Group()
+        self.add_calls = []
+
+    def addMapLayers(self, layers, add_to_legend=True):
+        self.add_calls.append((list(layers), add_to_legend))
+
+    def layerTreeRoot(self):
+        return self.root
+
+
+class Canvas:
+    def __init__(self):
+        self.events = []
+
+    def freeze(self, frozen):
+        self.events.append(('freeze', frozen))
+
+    def refresh(self):
+        self.events.append(('refresh',))
+
+
+def test_group_node_reuses_groups():
+    root = Group()
+    node = group_node(root, ('Event_1', 'A (2024-01-01)'))
+    assert group_node(root, ('Event_1', 'A (2024-01-01)')) is node
+    assert [g.name for g in root.children] == ['Event_1']
+    group_node(root, ('Event_1', 'B (2024-01-02)'))
+    assert len(root.children[0].children) == 2
+
+
+def test_insert_layers_one_batch_into_groups():
+    project, canvas = Project(), Canvas()
+    items = [('l1', ('Event_1', 'A')), ('l2', ('Event_1', 'A')), ('l3', ('Event_1', 'B'))]
+    insert_layers(project, items, canvas=canvas)
+
+    assert project.add_calls == [(['l1', 'l2', 'l3'], False)]
+    event = project.root.findGroup('Event_1')
+    assert event.findGroup('A').children == ['l2', 'l1']
+    assert event.findGroup('B').children == ['l3']
+    assert canvas.events == [('freeze', True), ('freeze', False), ('refresh',)]
+
+
+def test_insert_layers_ungrouped_at_root():
+    project = Project()
+    insert_layers(project, [('l1', ('Event_1', 'A')), ('l2', ())], grouped=False)
+    assert project.root.children == ['l2', 'l1']
+    insert_layers(project, [])
+    assert len(project.add_calls) == 1
@@ -0,0 +1,57 @@
+import pytest
+
+from kadas_maxar.data.footprints import FootprintRecord
+from kadas_maxar.imagery.mosaic import (
+    MOSAIC_ACQUISITION,
+    MOSAIC_SELECTION,
+    MOSAIC_TILES,
+    build_mosaic,
+    group_records,
+    mosaic_path,
+)
+
+
+def _record(index, catalog_id, date, epsg=32637):
+    return FootprintRecord(index, datetime=f'{date}T08:00:00Z', catalog_id=catalog_id,
+                           quadkey=f'03113301212{index}', epsg=epsg)
+
+
+def test_group_records_modes():
+    records = [
+        _record(0, 'A', '2023-02-07'),
+        _record(1, 'B', '2023-02-08'),
+        _record(2, 'A', '2023-02-07'),
+        _record(3, 'A', '2023-02-07', epsg=32636),
+    ]
+    assert [len(members) for _, members in group_records(records, MOSAIC_TILES)] == [1, 1, 1, 1]
+
+    groups = group_records(records, MOSAIC_ACQUISITION)
+    assert [(label, [r.index for r in members]) for label, members in groups] == [
+        ('A (2023-02-07) EPSG:32637', [0, 2]),
+        ('B (2023-02-08)', [1]),
+        ('A (2023-02-07) EPSG:32636', [3]),
+    ]
+
+    groups = group_records(records, MOSAIC_SELECTION)
+    assert [[r.index for r in members] for _, members in groups] == [[0, 1, 2], [3]]
+
+
+def test_mosaic_path_is_stable(tmp_path):
+    a = mosaic_path(['/vsicurl/x', '/vsicurl/y'], directory=str(tmp_path))
+    assert a == mosaic_path(['/vsicurl/x', '/vsicurl/y'], directory=str(tmp_path))
+    assert a != mosaic_path(['/vsicurl/y', '/vsicurl/x'], directory=str(tmp_path))
+    assert a.endswith('.vrt')
+
+
+def test_build_mosaic_from_local_tiles(tmp_path):
+    gdal = pytest.importorskip('osgeo.gdal')
+    sources = []
+    for i in range(2):
+        path = str(tmp_path / f'tile{i}.tif')
+        ds = gdal.GetDriverByName('GTiff').Create(path, 10, 10, 3, gdal.GDT_Byte)
+        ds.SetGeoTransform((500000 + 10 * i, 1, 0, 4000000, 0, -1))
+        ds = None
+        sources.append(path)
+    vrt = build_mosaic(sources, path=str(tmp_path / 'm.vrt'))
+    ds = gdal.Open(vrt)
+    assert (ds.RasterXSize, ds.RasterYSize, ds.RasterCount) == (20, 10, 3)
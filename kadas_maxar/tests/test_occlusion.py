@@ -0,0 +1,68 @@
+from kadas_maxar.imagery.occlusion import occluded_ids, polygons_wkt
+
+
+class Cells:
+    """Geometria fittizia: insieme di celle unitarie."""
+
+    def __init__(self, cells):
+        self.cells = frozenset(cells)
+
+    @classmethod
+    def rect(cls, x0, y0, x1, y1):
+        return cls((x, y) for x in range(x0, x1) for y in range(y0, y1))
+
+    def intersection(self, other):
+        return Cells(self.cells & other.cells)
+
+    def difference(self, other):
+        return Cells(self.cells - other.cells)
+
+    def combine(self, other):
+        return Cells(self.cells | other.cells)
+
+    def area(self):
+        return len(self.cells)
+
+    def isEmpty(self):
+        return not self.cells
+
+
+VIEW = Cells.rect(0, 0, 10, 10)
+
+
+def test_layer_below_two_opaque_layers_is_hidden():
+    layers = [
+        ('left', Cells.rect(0, 0, 5, 10), True),
+        ('right', Cells.rect(5, 0, 12, 10), True),
+        ('below', Cells.rect(2, 2, 8, 8), True),
+    ]
+    assert occluded_ids(layers, VIEW) == {'below'}
+
+
+def test_partial_cover_and_outside_view():
+    layers = [
+        ('top', Cells.rect(0, 0, 5, 10), True),
+        ('partly', Cells.rect(3, 0, 7, 10), True),
+        ('outside', Cells.rect(20, 20, 30, 30), True),
+    ]
+    assert occluded_ids(layers, VIEW) == set()
+    # Coperto solo fuori dalla vista: conta la parte visibile
+    layers = [('top', Cells.rect(0, 0, 10, 10), True), ('bigger', Cells.rect(-5, -5, 15, 15), True)]
+    assert occluded_ids(layers, VIEW) == {'bigger'}
+
+
+def test_transparent_layers_do_not_occlude():
+    layers = [
+        ('glass', Cells.rect(0, 0, 10, 10), False),
+        ('below', Cells.rect(0, 0, 10, 10), True),
+        ('bottom', Cells.rect(0, 0, 10, 10), True),
+    ]
+    assert occluded_ids(layers, VIEW) == {'bottom'}
+
+
+def test_polygons_wkt():
+    ring = [(0, 0), (1, 0), (1, 1), (0, 0)]
+    assert polygons_wkt([[ring]]) == 'MULTIPOLYGON(((0 0, 1 0, 1 1, 0 0)))'
+    assert polygons_wkt([[ring], [ring]]).count('((') == 2
+    assert polygons_wkt([]) is None
+    assert polygons_wkt([[[(0, 0), (1, 1)]]]) is None
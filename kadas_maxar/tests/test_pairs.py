@@ -0,0 +1,72 @@
+from datetime import date
+
+from kadas_maxar.data.footprints import FootprintRecord, FootprintStore
+from kadas_maxar.data.geometry import RingStore
+from kadas_maxar.data.pairs import MATCH_BBOX, MATCH_QUADKEY, find_pairs, join
+
+
+def record(index, day, quadkey="", cloud=None, catalog=None):
+    return FootprintRecord(
+        index, datetime=f"{day}T10:00:00Z", cloud_cover=cloud,
+        catalog_id=catalog or f"cat-{day}", quadkey=quadkey,
+    )
+
+
+def store(records, event="ev", boxes=None):
+    rings = RingStore()
+    for i in range(len(records)):
+        box = (boxes or {}).get(i)
+        if box is None:
+            rings.append(None)
+        else:
+            x0, y0, x1, y1 = box
+            rings.append({"type": "Polygon", "coordinates": [[[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]]]})
+    return FootprintStore(records, rings, event=event)
+
+
+def test_quadkey_join_matches_equal_and_nested_tiles():
+    a = store([record(0, "2023-01-01", "1202"), record(1, "2023-01-01", "3333")])
+    b = store([record(0, "2023-02-01", "1202"), record(1, "2023-02-01", "120"), record(2, "2023-02-01", "12021")])
+    matches = sorted((i, j) for i, j, _ in join(a, [0, 1], b, [0, 1, 2]))
+    assert matches == [(0, 0), (0, 1), (0, 2)]
+
+
+def test_pairs_within_event_are_ordered_and_ranked():
+    s = store([
+        record(0, "2023-01-01", "1202", cloud=0),
+        record(1, "2023-01-20", "1202", cloud=0),
+        record(2, "2023-01-05", "1202", cloud=100),
+        record(3, "2023-01-10", "0000", cloud=0),
+    ])
+    pairs = find_pairs(s)
+    assert all(p.before.datetime < p.after.datetime for p in pairs)
+    assert all(p.match == MATCH_QUADKEY for p in pairs)
+    assert {(p.before.index, p.after.index) for p in pairs} == {(0, 1), (0, 2), (2, 1)}
+    # 19 giorni senza nuvole contro 4 giorni con il 50% medio di nuvole (+15)
+    assert [(p.before.index, p.after.index) for p in pairs] == [(0, 1), (0, 2), (2, 1)]
+    assert [p.score for p in pairs] == [19.0, 19.0, 30.0]
+
+
+def test_event_date_and_limits():
+    s = store([
+        record(0, "2023-01-01", "1202"),
+        record(1, "2023-01-08", "1202"),
+        record(2, "2023-03-01", "1202", cloud=80),
+        record(3, "2023-01-15", "1202", catalog="cat-2023-01-08"),
+    ])
+    pairs = find_pairs(s, event_date=date(2023, 1, 10))
+    assert {(p.before.index, p.after.index) for p in pairs} == {(0, 2), (1, 2), (0, 3)}
+    assert {(p.before.index, p.after.index) for p in find_pairs(s, event_date=date(2023, 1, 10), max_cloud=50)} == {(0, 3)}
+    assert find_pairs(s, event_date=date(2023, 1, 10), max_days=10) == []
+    assert len(find_pairs(s, per_footprint=1)) == 3
+
+
+def test_pairs_across_events_with_mismatched_grids():
+    before = store([record(0, "2022-06-01", "1202"), record(1, "2022-06-01")], event="pre", boxes={1: (10, 10, 11, 11)})
+    after = store([record(0, "2023-06-01", "12021"), record(1, "2023-06-01")], event="post", boxes={1: (10.5, 10.5, 12, 12)})
+    pairs = find_pairs(after, before)
+    assert {(p.before_event, p.before.index, p.after_event, p.after.index, p.match) for p in pairs} == {
+        ("pre", 0, "post", 0, MATCH_QUADKEY),
+        ("pre", 1, "post", 1, MATCH_BBOX),
+    }
+    assert all(p.days == 365 for p in pairs)
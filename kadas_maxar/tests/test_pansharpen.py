@@ -0,0 +1,48 @@
+import pytest
+
+from kadas_maxar.imagery.pansharpen import build_pansharpened, pansharpen_xml, rgb_bands
+
+
+def test_rgb_bands_by_platform_and_band_count():
+    assert rgb_bands('WV03') == (5, 3, 2)
+    assert rgb_bands('wv02') == (5, 3, 2)
+    assert rgb_bands('GE01') == (3, 2, 1)
+    assert rgb_bands('QB02') == (3, 2, 1)
+    assert rgb_bands('XX01') is None
+    assert rgb_bands('XX01', band_count=8) == (5, 3, 2)
+    assert rgb_bands('', band_count=4) == (3, 2, 1)
+
+
+def test_pansharpen_xml_references_sources():
+    xml = pansharpen_xml('/vsicurl/https://h/pan.tif', '/vsicurl/https://h/ms.tif?a=1&b=2', (5, 3, 2))
+    assert 'subClass="VRTPansharpenedDataset"' in xml
+    assert '<SourceFilename relativeToVRT="0">/vsicurl/https://h/pan.tif</SourceFilename>' in xml
+    assert 'ms.tif?a=1&amp;b=2' in xml
+    assert xml.count('<SpectralBand ') == 3
+    assert '<SpectralBand dstBand="1">' in xml and '<SourceBand>5</SourceBand>' in xml
+
+
+def test_build_pansharpened_is_cached(tmp_path):
+    path = str(tmp_path / 'p.vrt')
+    assert build_pansharpened('/vsicurl/pan', '/vsicurl/ms', 'WV03', path=path) == path
+    content = open(path).read()
+    assert build_pansharpened('/vsicurl/pan', '/vsicurl/ms', 'WV03', path=path) == path
+    assert open(path).read() == content
+
+
+def test_pansharpened_vrt_opens(tmp_path):
+    gdal = pytest.importorskip('osgeo.gdal')
+    pan = str(tmp_path / 'pan.tif')
+    ms = str(tmp_path / 'ms.tif')
+    ds = gdal.GetDriverByName('GTiff').Create(pan, 400, 400, 1, gdal.GDT_UInt16)
+    ds.SetGeoTransform((500000, 0.5, 0, 4000000, 0, -0.5))
+    ds.GetRasterBand(1).Fill(400)
+    ds = None
+    ds = gdal.GetDriverByName('GTiff').Create(ms, 100, 100, 4, gdal.GDT_UInt16)
+    ds.SetGeoTransform((500000, 2, 0, 4000000, 0, -2))
+    for i in range(4):
+        ds.GetRasterBand(i + 1).Fill(100 * (i + 1))
+    ds = None
+    vrt = gdal.Open(build_pansharpened(pan, ms, 'GE01', path=str(tmp_path / 'p.vrt')))
+    assert (vrt.RasterXSize, vrt.RasterYSize, vrt.RasterCount) == (400, 400, 3)
+    assert vrt.GetRasterBand(1).ReadAsArray(0, 0, 8, 8).mean() > 0
@@ -0,0 +1,67 @@
+import numpy as np
+
+from kadas_maxar.data.coverage import points_in_polygons
+from kadas_maxar.data.poi import best_per_point, bbox_candidates, covering, read_csv_points
+from kadas_maxar.data.spatial_index import SpatialIndex
+
+
+def square(x0, y0, x1, y1):
+    return [[(x0, y0), (x1, y0), (x1, y1), (x0, y1), (x0, y0)]]
+
+
+def triangle(x0, y0, x1, y1):
+    return [[(x0, y0), (x1, y0), (x0, y1), (x0, y0)]]
+
+
+def test_covering_refines_bbox_candidates_with_outlines():
+    polygons = [[triangle(0, 0, 2, 2)], [square(1, 1, 3, 3)], [square(10, 10, 11, 11)]]
+    index = SpatialIndex([(0, 0, 2, 2), (1, 1, 3, 3), (10, 10, 11, 11)])
+    x = np.array([0.5, 1.5, 1.8, 2.5, 20.0])
+    y = np.array([0.5, 1.5, 1.8, 2.5, 20.0])
+    pts, fps = bbox_candidates(index, x, y)
+    assert sorted(zip(pts.tolist(), fps.tolist())) == [(0, 0), (1, 0), (1, 1), (2, 0), (2, 1), (3, 1)]
+    pts, fps = covering(index, x, y, lambda i: polygons[i])
+    # (1.5, 1.5) e (1.8, 1.8) sono fuori dal triangolo
+    assert list(zip(pts.tolist(), fps.tolist())) == [(0, 0), (1, 1), (2, 1), (3, 1)]
+    pts, fps = covering(index, x, y, lambda i: polygons[i], allowed=[0])
+    assert list(zip(pts.tolist(), fps.tolist())) == [(0, 0)]
+
+
+def test_footprints_without_outline_cover_their_bbox():
+    index = SpatialIndex([(0, 0, 1, 1)])
+    pts, fps = covering(index, [0.9], [0.9], lambda i: [])
+    assert pts.tolist() == [0] and fps.tolist() == [0]
+
+
+def test_covering_matches_brute_force_in_small_chunks():
+    rng = np.random.default_rng(1)
+    x0, y0 = rng.uniform(0, 5, 300), rng.uniform(0, 5, 300)
+    polygons = [[triangle(a, b, a + 0.7, b + 0.7)] for a, b in zip(x0, y0)]
+    index = SpatialIndex(np.c_[x0, y0, x0 + 0.7, y0 + 0.7])
+    x, y = rng.uniform(0, 5, 2000), rng.uniform(0, 5, 2000)
+    pts, fps = covering(index, x, y, lambda i: polygons[i])
+    expected = {
+        (p, f) for f in range(300)
+        for p in np.nonzero(points_in_polygons(x, y, polygons[f]))[0].tolist()
+    }
+    assert set(zip(pts.tolist(), fps.tolist())) == expected
+
+    from kadas_maxar.data import poi
+    table = poi.EdgeTable(fps, lambda i: polygons[i])
+    assert table.contains(x, y, pts, fps, chunk_edges=7).all()
+
+
+def test_best_per_point():
+    pts = np.array([0, 0, 2, 2, 2])
+    fps = np.array([1, 2, 0, 1, 2])
+    best, counts = best_per_point(pts, fps, [5.0, 1.0, 3.0], 4)
+    assert best.tolist() == [1, -1, 1, -1]
+    assert counts.tolist() == [2, 0, 3, 0]
+
+
+def test_read_csv_points(tmp_path):
+    path = tmp_path / "sites.csv"
+    path.write_text("Name;Latitude;Longitude\nOspedale;46,5;8,9\nPonte;x;9\nRifugio;47.0;9.5\n", encoding="utf-8")
+    x, y, names = read_csv_points(str(path))
+    assert x.tolist() == [8.9, 9.5] and y.tolist() == [46.5, 47.0]
+    assert names == ["Ospedale", "Rifugio"]
@@ -0,0 +1,33 @@
+import pytest
+
+from kadas_maxar.imagery.prefetch import pixel_window, prefetch_window, viewport_windows
+
+
+def test_viewport_windows_current_first():
+    windows = viewport_windows(0, 0, 10, 5)
+    assert windows[0] == (0, 0, 10, 5)
+    assert len(windows) == 9
+    assert (-10, -5, 0, 0) in windows and (10, 5, 20, 10) in windows
+
+
+def test_pixel_window_clipped_to_raster():
+    gt = (1000, 2, 0, 5000, 0, -2)
+    assert pixel_window((1000, 4800, 1200, 5000), gt, 500, 500) == (0, 0, 100, 100)
+    assert pixel_window((1101, 4899, 1103, 4901), gt, 500, 500) == (50, 49, 2, 2)
+    assert pixel_window((900, 4000, 3000, 6000), gt, 500, 500) == (0, 0, 500, 500)
+    assert pixel_window((5000, 4000, 6000, 4500), gt, 500, 500) is None
+
+
+def test_prefetch_window_reads_matching_overview(tmp_path):
+    gdal = pytest.importorskip('osgeo.gdal')
+    src = str(tmp_path / 'tile.tif')
+    ds = gdal.GetDriverByName('GTiff').Create(src, 1024, 1024, 3, gdal.GDT_Byte,
+                                              ['TILED=YES', 'BLOCKXSIZE=256', 'BLOCKYSIZE=256'])
+    ds.SetGeoTransform((0, 1, 0, 1024, 0, -1))
+    ds.BuildOverviews('AVERAGE', [2, 4])
+    ds = None
+    # full extent at 4 units/pixel: overview 4x (256x256) = one block
+    assert prefetch_window(src, (0, 0, 1024, 1024), 4.0) == 1
+    # full resolution: 16 blocks, capped by the budget
+    assert prefetch_window(src, (0, 0, 1024, 1024), 1.0, budget=5) == 5
+    assert prefetch_window(src, (0, 0, 1024, 1024), 1.0, cancelled=lambda: True) == 0
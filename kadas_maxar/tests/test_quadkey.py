@@ -0,0 +1,47 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from kadas_maxar.data.quadkey import (
+    QuadkeyIndex,
+    quadkey_bounds,
+    quadkey_to_tile,
+    quadkeys_to_bounds,
+)
+
+
+def test_quadkey_to_tile():
+    # Bing Maps documentation example
+    assert quadkey_to_tile('213') == (3, 5, 3)
+    with pytest.raises(ValueError):
+        quadkey_to_tile('124')
+
+
+def test_bounds_level_one():
+    min_lon, min_lat, max_lon, max_lat = quadkey_bounds('1')
+    assert (min_lon, max_lon) == (0.0, 180.0)
+    assert min_lat == pytest.approx(0.0, abs=1e-9)
+    assert max_lat == pytest.approx(85.0511287798, abs=1e-9)
+
+
+def test_vectorized_matches_scalar():
+    keys = ['031133012123', '1202', '', '3', '0311330121230', 'x12']
+    bounds = quadkeys_to_bounds(keys)
+    for key, row in zip(keys, bounds):
+        if key in ('', 'x12'):
+            assert np.isnan(row).all()
+        else:
+            assert row.tolist() == pytest.approx(quadkey_bounds(key))
+
+
+def test_index_prefix_counts_and_extent():
+    keys = ['120230', '120231', '120300', '031133', '12023']
+    index = QuadkeyIndex(keys)
+    assert sorted(index.prefix('12023')) == [0, 1, 4]
+    assert sorted(index.prefix('1203')) == [2]
+    assert index.prefix('2') == []
+    assert index.counts(4) == {'1202': 3, '1203': 1, '0311': 1}
+    # two horizontally adjacent tiles span exactly their parent's bounds
+    assert index.extent([0, 1])[0] == pytest.approx(quadkey_bounds('12023')[0])
+    assert index.extent([0, 1])[2] == pytest.approx(quadkey_bounds('12023')[2])
+    assert 3 not in index.intersecting(quadkey_bounds('12023'))
@@ -0,0 +1,114 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from kadas_maxar.data.snapshot import (
+    FootprintSnapshot,
+    SnapshotError,
+    SnapshotStore,
+    write_snapshot,
+)
+
+
+def _features():
+    return [
+        {
+            'type': 'Feature',
+            'properties': {
+                'datetime': '2023-02-07T08:29:44Z',
+                'platform': 'WV03',
+                'gsd': 0.35,
+                'cloud_cover': 0,
+                'catalog_id': '10300100E3CDF600',
+                'quadkey': '031133012123',
+                'utm_zone': 37,
+                'visual': 'https://example.com/a-visual.tif',
+            },
+            'geometry': {
+                'type': 'Polygon',
+                'coordinates': [[[36.0, 37.0], [36.1, 37.0], [36.1, 37.1], [36.0, 37.1], [36.0, 37.0]]],
+            },
+        },
+        {
+            'type': 'Feature',
+            'properties': {
+                'datetime': '2023-02-08T08:00:00Z',
+                'platform': 'GE01',
+                'gsd': 0.5,
+                'cloud_cover': 12.5,
+                'catalog_id': '10500100E3CDF700',
+                'quadkey': '031133012130',
+                'tags': ['post'],
+            },
+            'geometry': {
+                'type': 'MultiPolygon',
+                'coordinates': [
+                    [[[1.0, 2.0], [3.0, 2.0], [3.0, 4.0], [1.0, 2.0]]],
+                    [[[5.0, 6.0], [7.0, 6.0], [7.0, 8.0], [5.0, 6.0]]],
+                ],
+            },
+        },
+    ]
+
+
+def test_roundtrip(tmp_path):
+    features = _features()
+    path = str(tmp_path / 'event.snap')
+    write_snapshot(path, features, etag='"abc"', source='https://example.com/e.geojson', event='event')
+
+    snap = FootprintSnapshot(path)
+    assert len(snap) == 2
+    assert snap.etag == '"abc"'
+    assert snap[0]['properties'] == features[0]['properties']
+    assert snap[0]['geometry'] == features[0]['geometry']
+    assert snap[1]['properties'] == features[1]['properties']
+    assert snap[1]['geometry'] == features[1]['geometry']
+    assert isinstance(snap[0]['properties']['utm_zone'], int)
+    assert snap.bbox[1].tolist() == [1.0, 2.0, 7.0, 8.0]
+
+
+def test_rejects_other_version(tmp_path):
+    path = tmp_path / 'bad.snap'
+    path.write_bytes(b'NOTASNAP' + b'\0' * 16)
+    with pytest.raises(SnapshotError):
+        FootprintSnapshot(str(path))
+
+
+def test_store_keyed_by_etag(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    assert store.open('Event-A') is None
+
+    first = store.save('Event-A', _features(), etag='"v1"')
+    assert store.open('Event-A').etag == '"v1"'
+
+    second = store.save('Event-A', _features()[:1], etag='"v2"')
+    assert first != second
+    snap = store.open('Event-A')
+    assert snap.etag == '"v2"'
+    assert len(snap) == 1
+    assert store.open('Event-A', etag='"v1"') is None
+
+
+def test_store_from_snapshot_reads_columns(tmp_path, monkeypatch):
+    from kadas_maxar.data.footprints import FootprintStore
+
+    features = _features()
+    path = str(tmp_path / 'event.snap')
+    write_snapshot(path, features, event='event')
+    snap = FootprintSnapshot(path)
+
+    def no_properties(index):
+        raise AssertionError('per-feature properties() on open')
+    monkeypatch.setattr(snap, 'properties', no_properties)
+
+    store = FootprintStore.from_snapshot(snap)
+    expected = FootprintStore.from_features(features)
+    assert store.event == 'event'
+    for got, want in zip(store.records, expected.records):
+        assert (got.datetime, got.platform, got.gsd, got.cloud_cover, got.catalog_id, got.quadkey, got.epsg) == (
+            want.datetime, want.platform, want.gsd, want.cloud_cover, want.catalog_id, want.quadkey, want.epsg
+        )
+        assert [got.url(t) for t in ('visual', 'ms_analytic')] == [want.url(t) for t in ('visual', 'ms_analytic')]
+    assert snap.column_values('tags') == [None, ['post']]
+    assert snap.column_values('utm_zone') == [37, None]
+    assert snap.column_values('missing') is None
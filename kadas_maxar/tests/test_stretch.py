@@ -0,0 +1,48 @@
+import pytest
+
+from kadas_maxar.imagery import stretch as stretch_module
+from kadas_maxar.imagery.stretch import StretchCache, compute_band_stats
+
+
+def test_statistics_computed_once_and_persisted(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_stats(source, bands, cut=None):
+        calls.append((source, tuple(bands)))
+        return {band: (10.0 * band, 100.0 * band) for band in bands}
+
+    monkeypatch.setattr(stretch_module, 'compute_band_stats', fake_stats)
+    path = str(tmp_path / 'stretch.json')
+    cache = StretchCache(path=path)
+    assert cache.statistics('https://h/a.tif', '/vsicurl/a', [1, 2], group='A') == {1: (10.0, 100.0), 2: (20.0, 200.0)}
+    cache.statistics('https://h/a.tif', '/vsicurl/a', [2], group='A')
+    assert len(calls) == 1
+
+    reopened = StretchCache(path=path)
+    assert reopened.get('https://h/a.tif', [1, 2]) == {1: (10.0, 100.0), 2: (20.0, 200.0)}
+    assert reopened.get('https://h/a.tif', [3]) is None
+    assert reopened.stretch('https://h/a.tif', 'A') == {1: (10.0, 100.0), 2: (20.0, 200.0)}
+
+
+def test_group_stretch_is_median_of_members(tmp_path):
+    cache = StretchCache(path=str(tmp_path / 'stretch.json'))
+    cache.put('a', {1: (10.0, 200.0)}, group='G')
+    cache.put('b', {1: (30.0, 100.0)}, group='G')
+    cache.put('c', {1: (20.0, 900.0)}, group='G')
+    cache.put('d', {1: (0.0, 1.0)})
+    assert cache.stretch('d', 'G') == {1: (20.0, 200.0)}
+    assert cache.stretch('d') == {1: (0.0, 1.0)}
+    assert cache.stretch('d', 'other') == {1: (0.0, 1.0)}
+
+
+def test_compute_band_stats_from_smallest_overview(tmp_path):
+    gdal = pytest.importorskip('osgeo.gdal')
+    np = pytest.importorskip('numpy')
+    src = str(tmp_path / 'pan.tif')
+    ds = gdal.GetDriverByName('GTiff').Create(src, 200, 200, 1, gdal.GDT_UInt16)
+    ds.GetRasterBand(1).WriteArray(np.arange(200 * 200, dtype='uint16').reshape(200, 200) % 1000)
+    ds.GetRasterBand(1).SetNoDataValue(0)
+    ds.BuildOverviews('NEAREST', [2, 4])
+    ds = None
+    low, high = compute_band_stats(src, [1])[1]
+    assert 0 < low < 100 and 900 < high < 1000